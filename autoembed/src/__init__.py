@@ -1,9 +1,13 @@
 import warnings
+import importlib
 
 from logging import Logger
 from loguru import logger
 from kink import di
 
+from autoembed.src.domain.interfaces.embedding_inference_model_interface import (
+    EmbeddingInferenceModelInterface,
+)
 from autoembed.src.domain.interfaces.embedding_model_interface import (
     EmbeddingModelInterface,
 )
@@ -15,9 +19,6 @@ from autoembed.src.domain.interfaces.model_registry_interface import (
     ModelRegistryInterface,
 )
 
-from autoembed.src.infrastructure.model.embedding_model_keras_adapter import (
-    KerasAutoencoder,
-)
 from autoembed.src.infrastructure.data_repository.data_repository_local_csv_adapter import (
     DataRepositoryLocalCSVAdapter,
 )
@@ -31,4 +32,5 @@ di[Logger] = logger
 
 di[DataRepositoryInterface] = DataRepositoryLocalCSVAdapter()
 di[ModelRegistryInterface] = LocalModelRegistryAdapter(base_path="models")
-di[EmbeddingModelInterface] = KerasAutoencoder
+di[EmbeddingModelInterface] = lambda _: importlib.import_module("autoembed.src.infrastructure.model.embedding_model_keras_adapter").KerasAutoencoder
+di[EmbeddingInferenceModelInterface] = lambda container: container[EmbeddingModelInterface]
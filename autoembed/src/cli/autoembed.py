@@ -1,3 +1,4 @@
+import os
 from enum import Enum
 from logging import Logger
 
@@ -5,23 +6,92 @@ import yaml
 import typer
 from kink import di
 
+from autoembed.src.domain.embedding_quantizer import get_quantizer
+from autoembed.src.domain.interfaces.data_repository_interface import DataRepositoryInterface
+from autoembed.src.domain.interfaces.embedding_inference_model_interface import EmbeddingInferenceModelInterface
 from autoembed.src.domain.interfaces.embeddings_repository_interface import EmbeddingsRepositoryInterface
+from autoembed.src.domain.interfaces.features_cache_interface import FeaturesCacheInterface
+from autoembed.src.infrastructure.cache.features_cache_local_mmap_adapter import FeaturesCacheLocalMmapAdapter
+from autoembed.src.infrastructure.data_repository.data_repository_local_csv_adapter import DataRepositoryLocalCSVAdapter
+from autoembed.src.infrastructure.data_repository.data_repository_local_parquet_adapter import DataRepositoryLocalParquetAdapter
 from autoembed.src.infrastructure.embeddings.embedding_chromadb_adapter import EmbeddingsChromaDbAdapter
+from autoembed.src.infrastructure.embeddings.embedding_ivf_pq_adapter import EmbeddingsIvfPqAdapter
+from autoembed.src.infrastructure.embeddings.embedding_local_exact_adapter import EmbeddingsLocalExactSearchAdapter
+from autoembed.src.infrastructure.model.embedding_model_numpy_adapter import NumpyEncoder
+from autoembed.src.infrastructure.model.distributed_runtime import (
+    TF_CONFIG_ENVIRONMENT_VARIABLE,
+    build_tf_config,
+    configure_distribution_strategy,
+    get_worker_context,
+    launch_local_workers,
+)
+from autoembed.src.infrastructure.model.tensorflow_runtime import configure_tensorflow_runtime
+from autoembed.src.usescases.commands.evaluate.evaluate_quantization_command import EvaluateQuantizationCommand
+from autoembed.src.usescases.commands.evaluate.evaluate_quantization_usecase import EvaluateQuantizationUseCase
 from autoembed.src.usescases.commands.visualize.generate_interactive_visualization_command import GenerateInteractiveVisualizationCommand
 from autoembed.src.usescases.commands.visualize.generate_interactive_visualization_command_usecase import GenerateInteractiveVisualizationCommandUsecase
-from autoembed.src.yaml.auto_embed_yaml_schema import AutoEmbedByYamlFileSchema
+from autoembed.src.yaml.auto_embed_yaml_schema import AutoEmbedByYamlFileSchema, VectorStore
 from autoembed.src.usescases.commands.prediction.predict_for_model_release_command import PredictForModelReleaseCommand
 from autoembed.src.usescases.commands.prediction.predict_for_model_release_usecase import PredictForModelReleaseUsecase
+from autoembed.src.usescases.commands.search.search_hyperparameters_command import SearchHyperparametersCommand
+from autoembed.src.usescases.commands.search.search_hyperparameters_usecase import SearchHyperparametersUseCase
 from autoembed.src.usescases.commands.train.train_embedding_model_command import TrainEmbeddingModelCommand
 from autoembed.src.usescases.commands.train.train_embeddings_model_usecase import TrainEmbeddingModelUseCase
 
 
 class AutoEmbedMode(str, Enum):
     TRAIN = "train"
+    SEARCH = "search"
     PREDICT = "predict"
+    EVALUATE_QUANTIZATION = "evaluate-quantization"
     SERVE = "serve"
     VISUALIZE = "visualize"
 
+
+DATA_REPOSITORY_ADAPTERS = {
+    "csv": DataRepositoryLocalCSVAdapter,
+    "parquet": DataRepositoryLocalParquetAdapter,
+}
+
+def build_embeddings_repository(engine: str, vector_store: VectorStore) -> EmbeddingsRepositoryInterface:
+    if engine == "exact":
+        return EmbeddingsLocalExactSearchAdapter(
+            vector_collection_name=vector_store.vector_collection_name,
+            distance=vector_store.distance,
+            max_workers=vector_store.search_threads,
+            quantizer=get_quantizer(vector_store.quantization.type, n_subvectors=vector_store.quantization.n_subvectors, n_bits=vector_store.quantization.n_bits),
+            train_sample_size=vector_store.quantization.train_sample_size,
+        )
+    if vector_store.quantization.type != "none":
+        raise ValueError(f"The {engine} engine stores float32 vectors, quantization {vector_store.quantization.type} needs the exact engine")
+    return EmbeddingsChromaDbAdapter(
+        vector_collection_name=vector_store.vector_collection_name,
+        coarse_prefix_size=vector_store.coarse_prefix_size,
+        rerank_factor=vector_store.rerank_factor,
+    )
+
+
+def build_ivf_pq_embeddings_repository(vector_store: VectorStore) -> EmbeddingsIvfPqAdapter:
+    if vector_store.quantization.type != "none":
+        raise ValueError(f"The ivf_pq engine stores its own product-quantized residuals, quantization {vector_store.quantization.type} needs the exact engine")
+
+    ivf_pq = vector_store.ivf_pq
+    repository = EmbeddingsIvfPqAdapter(
+        vector_collection_name=vector_store.vector_collection_name,
+        nlist=ivf_pq.nlist,
+        nprobe=ivf_pq.nprobe,
+        n_subvectors=ivf_pq.n_subvectors,
+        n_bits=ivf_pq.n_bits,
+        train_sample_size=ivf_pq.train_sample_size,
+    )
+    if ivf_pq.train_from and repository.requires_training:
+        training_embeddings = build_embeddings_repository(ivf_pq.train_from, vector_store).get_all_embeddings()
+        if not len(training_embeddings):
+            raise ValueError(f"The {ivf_pq.train_from} collection {vector_store.vector_collection_name} has no embeddings to train the ivf_pq collection on")
+        repository.train(training_embeddings.vectors)
+    return repository
+
+
 def autoembed(mode: AutoEmbedMode, yaml_path: str):
         
     logger = di[Logger]
@@ -33,28 +103,82 @@ def autoembed(mode: AutoEmbedMode, yaml_path: str):
 
     auto_embed_yaml_schema = AutoEmbedByYamlFileSchema.from_yaml_as_dict(yaml_as_dict)
     logger.info(f"Executing command: {mode} with parameters: {auto_embed_yaml_schema.to_json()}")
-    
-    di[EmbeddingsRepositoryInterface] = EmbeddingsChromaDbAdapter(
-        vector_collection_name=auto_embed_yaml_schema.vector_store.vector_collection_name
-    )
+
+    distributed = auto_embed_yaml_schema.distributed if mode == AutoEmbedMode.TRAIN else None
+    if distributed is not None and distributed.num_workers > 1 and TF_CONFIG_ENVIRONMENT_VARIABLE not in os.environ:
+        if not distributed.worker_hosts:
+            logger.info(f"🚀 Launching {distributed.num_workers} local training workers")
+            launch_local_workers(distributed.num_workers)
+            return
+        os.environ[TF_CONFIG_ENVIRONMENT_VARIABLE] = build_tf_config(distributed.worker_hosts, distributed.worker_index)
+
+    if mode in (AutoEmbedMode.TRAIN, AutoEmbedMode.SEARCH) or auto_embed_yaml_schema.runtime.inference_engine == "keras":
+        configure_tensorflow_runtime(
+            intra_op_threads=auto_embed_yaml_schema.runtime.intra_op_threads,
+            inter_op_threads=auto_embed_yaml_schema.runtime.inter_op_threads,
+        )
+
+    worker_context = get_worker_context()
+    if distributed is not None and worker_context.is_distributed:
+        logger.info(f"🚀 Training as worker {worker_context.worker_index} of {worker_context.num_workers}")
+        configure_distribution_strategy()
+
+    if auto_embed_yaml_schema.vector_store.engine == "ivf_pq":
+        di[EmbeddingsRepositoryInterface] = build_ivf_pq_embeddings_repository(auto_embed_yaml_schema.vector_store)
+    else:
+        di[EmbeddingsRepositoryInterface] = build_embeddings_repository(auto_embed_yaml_schema.vector_store.engine, auto_embed_yaml_schema.vector_store)
+
+    if auto_embed_yaml_schema.cache is not None and worker_context.is_distributed:
+        # A cache hit on some workers only would make them preprocess and train differently from the others, whose collectives would then wait forever
+        logger.warning("⚠️ The features cache is disabled for distributed training, every worker preprocesses its training data")
+    elif auto_embed_yaml_schema.cache is not None:
+        di[FeaturesCacheInterface] = FeaturesCacheLocalMmapAdapter(
+            path=auto_embed_yaml_schema.cache.path,
+            max_size_bytes=int(auto_embed_yaml_schema.cache.max_size_gb * 1024**3) if auto_embed_yaml_schema.cache.max_size_gb else None,
+            max_age_seconds=auto_embed_yaml_schema.cache.max_age_days * 24 * 3600 if auto_embed_yaml_schema.cache.max_age_days else None,
+        )
 
     if mode == AutoEmbedMode.TRAIN:
         if auto_embed_yaml_schema.data.training is None:
             raise ValueError(f"Training data is required for mode: {mode}")
 
+        di[DataRepositoryInterface] = DATA_REPOSITORY_ADAPTERS[auto_embed_yaml_schema.data.training.type](max_workers=auto_embed_yaml_schema.data.training.num_workers)
+
         command = TrainEmbeddingModelCommand(
             project_name=auto_embed_yaml_schema.project_name,
             vector_store=auto_embed_yaml_schema.vector_store,
             training_data=auto_embed_yaml_schema.data.training,
             modeling=auto_embed_yaml_schema.modeling,
+            runtime=auto_embed_yaml_schema.runtime,
         )
         usecase = TrainEmbeddingModelUseCase()
         usecase.execute(command)
 
+    elif mode == AutoEmbedMode.SEARCH:
+        if auto_embed_yaml_schema.search is None:
+            raise ValueError(f"Search section is required for mode: {mode}")
+
+        di[DataRepositoryInterface] = DATA_REPOSITORY_ADAPTERS[auto_embed_yaml_schema.data.training.type](max_workers=auto_embed_yaml_schema.data.training.num_workers)
+
+        command = SearchHyperparametersCommand(
+            project_name=auto_embed_yaml_schema.project_name,
+            training_data=auto_embed_yaml_schema.data.training,
+            modeling=auto_embed_yaml_schema.modeling,
+            search=auto_embed_yaml_schema.search,
+            runtime=auto_embed_yaml_schema.runtime,
+        )
+        usecase = SearchHyperparametersUseCase()
+        usecase.execute(command)
+
     elif mode == AutoEmbedMode.PREDICT:
         if auto_embed_yaml_schema.data.prediction is None:
             raise ValueError(f"Prediction data is required for mode: {mode}")
 
+        di[DataRepositoryInterface] = DATA_REPOSITORY_ADAPTERS[auto_embed_yaml_schema.data.prediction.type](max_workers=auto_embed_yaml_schema.data.prediction.num_workers)
+
+        if auto_embed_yaml_schema.runtime.inference_engine == "numpy":
+            di[EmbeddingInferenceModelInterface] = NumpyEncoder
+
         command = PredictForModelReleaseCommand(
             project_name=auto_embed_yaml_schema.project_name,
             model_version=auto_embed_yaml_schema.modeling.model_version,
@@ -62,9 +186,29 @@ def autoembed(mode: AutoEmbedMode, yaml_path: str):
             vector_store=auto_embed_yaml_schema.vector_store,
             prediction_data=auto_embed_yaml_schema.data.prediction,
             modeling=auto_embed_yaml_schema.modeling,
+            runtime=auto_embed_yaml_schema.runtime,
         )
         usecase = PredictForModelReleaseUsecase()
         usecase.execute(command)
+
+    elif mode == AutoEmbedMode.EVALUATE_QUANTIZATION:
+        if auto_embed_yaml_schema.data.prediction is None:
+            raise ValueError(f"Prediction data is required for mode: {mode}")
+
+        di[DataRepositoryInterface] = DATA_REPOSITORY_ADAPTERS[auto_embed_yaml_schema.data.prediction.type](max_workers=auto_embed_yaml_schema.data.prediction.num_workers)
+
+        if auto_embed_yaml_schema.runtime.inference_engine == "numpy":
+            di[EmbeddingInferenceModelInterface] = NumpyEncoder
+
+        command = EvaluateQuantizationCommand(
+            project_name=auto_embed_yaml_schema.project_name,
+            model_version=auto_embed_yaml_schema.modeling.model_version,
+            vector_store=auto_embed_yaml_schema.vector_store,
+            prediction_data=auto_embed_yaml_schema.data.prediction,
+            runtime=auto_embed_yaml_schema.runtime,
+        )
+        usecase = EvaluateQuantizationUseCase()
+        usecase.execute(command)
         
     elif mode == AutoEmbedMode.SERVE:
         logger.warning("Serve mode not implemented yet")
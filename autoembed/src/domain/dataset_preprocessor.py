@@ -1,9 +1,16 @@
+import json
+import hashlib
+import dataclasses
+
 import numpy as np
 import pandas as pd
-from typing import Dict, List
+from typing import Dict, Iterable, List, Tuple
 
 from autoembed.src.domain.entites.columns import (
+    CategoricalColumnOptions,
+    CategoricalColumnStatistics,
     CategoricalColumns,
+    NumericalColumnStatistics,
     NumericalColumns,
 )
 from autoembed.src.domain.entites.dataset_analysis import DatasetAnalysis
@@ -21,33 +28,106 @@ class DatasetPreprocessor:
         numerical_columns: NumericalColumns | None = None,
         categorical_columns: CategoricalColumns | None = None,
         categorical_features_loss_weights: Dict[str, float] | None = None,
+        categorical_columns_options: Dict[str, CategoricalColumnOptions] | None = None,
     ):
         self.numerical_columns_names = numerical_columns_names
         self.categorical_columns_names = categorical_columns_names
         self.numerical_columns = numerical_columns
         self.categorical_columns = categorical_columns
         self.categorical_features_loss_weights = categorical_features_loss_weights
+        self.categorical_columns_options = categorical_columns_options or {}
+
+    def fit(self, data: pd.DataFrame | Iterable[pd.DataFrame]) -> None:
+        chunks = [data] if isinstance(data, pd.DataFrame) else data
+
+        numerical_statistics = {column: NumericalColumnStatistics(column) for column in self.numerical_columns_names}
+        categorical_statistics = {
+            column: CategoricalColumnStatistics(column, self.categorical_columns_options.get(column, CategoricalColumnOptions())) for column in self.categorical_columns_names
+        }
+
+        for chunk in chunks:
+            for column, statistics in numerical_statistics.items():
+                statistics.update(chunk[column])
+            for column, statistics in categorical_statistics.items():
+                statistics.update(chunk[column])
+
+        self.numerical_columns = NumericalColumns.from_numerical_columns([statistics.to_column() for statistics in numerical_statistics.values()])
+        self.categorical_columns = CategoricalColumns.from_categorical_columns(
+            [statistics.to_column() for statistics in categorical_statistics.values()]
+        )
+        self.categorical_features_loss_weights = self.compute_categorical_loss_weights()
+
+    def warm_start_from(self, previous: "DatasetPreprocessor", data: pd.DataFrame | Iterable[pd.DataFrame]) -> None:
+        if previous.numerical_columns_names != self.numerical_columns_names or previous.categorical_columns_names != self.categorical_columns_names:
+            raise ValueError("Warm start requires the same numerical and categorical columns as the previous model release")
 
-    def fit(self, dataframe: pd.DataFrame) -> None:
-        self.numerical_columns = NumericalColumns.from_dataframe(dataframe, columns=self.numerical_columns_names)
-        self.categorical_columns = CategoricalColumns.from_dataframe(dataframe, columns=self.categorical_columns_names)
+        self.fit(data)
+
+        self.numerical_columns = previous.numerical_columns
+        self.categorical_columns = CategoricalColumns.from_categorical_columns(
+            [previous.categorical_columns.columns[column_name].extend_vocabulary(column) for column_name, column in self.categorical_columns.columns.items()]
+        )
         self.categorical_features_loss_weights = self.compute_categorical_loss_weights()
 
     def get_analysis(self) -> DatasetAnalysis:
-        return DatasetAnalysis(self.numerical_columns, self.categorical_columns, self.categorical_features_loss_weights)
+        return DatasetAnalysis(
+            self.numerical_columns,
+            self.categorical_columns,
+            self.categorical_features_loss_weights,
+            {name: options.sampled_softmax_negatives for name, options in self.categorical_columns_options.items() if options.sampled_softmax_negatives is not None},
+        )
 
-    def preprocess(self, dataframe: pd.DataFrame) -> Dict[str, pd.Series]:
-        transformed_data = dataframe[self.numerical_columns_names + self.categorical_columns_names].copy()
+    def preprocess(self, dataframe: pd.DataFrame) -> Dict[str, np.ndarray]:
+        numerical_features, categorical_features = self._encode(dataframe)
+        return self._to_inputs(numerical_features, categorical_features)
 
-        for column in self.numerical_columns.columns:
-            transformed_data[column] = self.numerical_columns.columns[column].transform(transformed_data[column])
+    def preprocess_inputs_and_targets(self, dataframe: pd.DataFrame) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        numerical_features, categorical_features = self._encode(dataframe)
+        return self._to_inputs(numerical_features, categorical_features), self._to_targets(numerical_features, categorical_features)
 
-        for column in self.categorical_columns.columns:
-            transformed_data[column] = self.categorical_columns.columns[column].transform(transformed_data[column])
+    def _encode(self, dataframe: pd.DataFrame) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        numerical_features = np.empty((len(dataframe), len(self.numerical_columns.columns)), dtype=np.float32)
+        for index, (column_name, column) in enumerate(self.numerical_columns.columns.items()):
+            numerical_features[:, index] = column.transform(dataframe[column_name]).to_numpy()
 
+        categorical_features = {
+            column_name: np.ascontiguousarray(column.transform(dataframe[column_name]).to_numpy(), dtype=np.int32)
+            for column_name, column in self.categorical_columns.columns.items()
+        }
+
+        return numerical_features, categorical_features
+
+    def inputs_to_targets(self, inputs: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        return self._to_targets(inputs[NUMERICAL_INPUTS_FEATURES_KEY], {column_name: inputs[column_name] for column_name in self.categorical_columns.columns})
+
+    def fingerprint(self) -> str:
+        state = {
+            "numerical_columns_names": self.numerical_columns_names,
+            "categorical_columns_names": self.categorical_columns_names,
+            "categorical_columns_options": {name: dataclasses.asdict(options) for name, options in self.categorical_columns_options.items()},
+            "numerical_columns": dataclasses.asdict(self.numerical_columns) if self.numerical_columns is not None else None,
+            "categorical_columns": {
+                name: {
+                    **{field.name: getattr(column, field.name) for field in dataclasses.fields(column) if field.name != "vocabulary"},
+                    "vocabulary": column.get_sorted_array_vocabulary().fingerprint(),
+                }
+                for name, column in self.categorical_columns.columns.items()
+            }
+            if self.categorical_columns is not None
+            else None,
+        }
+        return hashlib.sha256(json.dumps(state, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _to_inputs(self, numerical_features: np.ndarray, categorical_features: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        return {
+            NUMERICAL_INPUTS_FEATURES_KEY: numerical_features,
+            **categorical_features,
+        }
+
+    def _to_targets(self, numerical_features: np.ndarray, categorical_features: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
         return {
-            NUMERICAL_INPUTS_FEATURES_KEY: transformed_data[self.numerical_columns_names].values,
-            **{feature_name: transformed_data[feature_name].values for feature_name in self.categorical_columns_names},
+            NUMERICAL_OUTPUTS_KEY: numerical_features,
+            **{feature_name + "_outputs": feature for feature_name, feature in categorical_features.items()},
         }
 
     def compute_categorical_loss_weights(self, max_weight_cap: float = 5.0) -> Dict[str, float]:
@@ -55,7 +135,7 @@ class DatasetPreprocessor:
             return {}
         
         vocab_sizes = {
-            name: len(col.vocabulary) 
+            name: col.cardinality
             for name, col in self.categorical_columns.columns.items()
         }
         
@@ -72,19 +152,9 @@ class DatasetPreprocessor:
         
         return weights
 
-    def preprocess_target(self, dataframe: pd.DataFrame) -> Dict[str, pd.Series]:
-        transformed_data = dataframe[self.numerical_columns_names + self.categorical_columns_names].copy()
-
-        for column in self.numerical_columns.columns:
-            transformed_data[column] = self.numerical_columns.columns[column].transform(transformed_data[column])
-
-        for column in self.categorical_columns.columns:
-            transformed_data[column] = self.categorical_columns.columns[column].transform(transformed_data[column])
-
-        return {
-            NUMERICAL_OUTPUTS_KEY: transformed_data[self.numerical_columns_names].values,
-            **{feature_name + "_outputs": transformed_data[feature_name].values for feature_name in self.categorical_columns_names},
-        }
+    def preprocess_target(self, dataframe: pd.DataFrame) -> Dict[str, np.ndarray]:
+        numerical_features, categorical_features = self._encode(dataframe)
+        return self._to_targets(numerical_features, categorical_features)
 
     @classmethod
     def from_columns(
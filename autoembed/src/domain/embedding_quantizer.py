@@ -0,0 +1,258 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Type
+
+import numpy as np
+
+
+DEFAULT_TRAIN_SAMPLE_SIZE = 100_000
+DISTANCE_BLOCK_SIZE = 4096
+
+
+def squared_distances(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    return (x**2).sum(axis=1, keepdims=True) - 2.0 * x @ centroids.T + (centroids**2).sum(axis=1)
+
+
+def assign_to_centroids(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    return np.concatenate([squared_distances(x[start : start + DISTANCE_BLOCK_SIZE], centroids).argmin(axis=1) for start in range(0, len(x), DISTANCE_BLOCK_SIZE)]) if len(x) else np.empty(0, dtype=np.int64)
+
+
+def kmeans(x: np.ndarray, n_clusters: int, n_iterations: int = 20, seed: int = 42) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(len(x), size=n_clusters, replace=len(x) < n_clusters)].copy()
+
+    for _ in range(n_iterations):
+        assignments = assign_to_centroids(x, centroids)
+        counts = np.bincount(assignments, minlength=n_clusters)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, x)
+
+        empty_clusters = counts == 0
+        centroids[~empty_clusters] = sums[~empty_clusters] / counts[~empty_clusters, None]
+        centroids[empty_clusters] = x[rng.choice(len(x), size=empty_clusters.sum())]
+
+    return centroids
+
+
+def recall_at_k(reference: np.ndarray, approximate: np.ndarray, query_indices: np.ndarray, k: int = 10) -> float:
+    queries = np.asarray(reference[query_indices], dtype=np.float32)
+    hits = 0
+    for start in range(0, len(queries), DISTANCE_BLOCK_SIZE):
+        block_indices = query_indices[start : start + DISTANCE_BLOCK_SIZE]
+        exact_distances = squared_distances(queries[start : start + DISTANCE_BLOCK_SIZE], reference)
+        approximate_distances = squared_distances(queries[start : start + DISTANCE_BLOCK_SIZE], approximate)
+        exact_distances[np.arange(len(block_indices)), block_indices] = np.inf
+        approximate_distances[np.arange(len(block_indices)), block_indices] = np.inf
+
+        exact_neighbors = np.argpartition(exact_distances, k, axis=1)[:, :k]
+        approximate_neighbors = np.argpartition(approximate_distances, k, axis=1)[:, :k]
+        hits += sum(len(np.intersect1d(exact, approximate)) for exact, approximate in zip(exact_neighbors, approximate_neighbors))
+
+    return hits / (len(queries) * k)
+
+
+class EmbeddingQuantizer(ABC):
+    type: str
+    code_dtype: Type[np.generic]
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        pass
+
+    @property
+    def is_fitted(self) -> bool:
+        return True
+
+    @abstractmethod
+    def fit(self, x: np.ndarray) -> "EmbeddingQuantizer":
+        pass
+
+    @abstractmethod
+    def encode(self, x: np.ndarray) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def bytes_per_vector(self, dimensions: int) -> int:
+        pass
+
+    @abstractmethod
+    def to_dict(self) -> Dict[str, Any]:
+        pass
+
+    @classmethod
+    @abstractmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EmbeddingQuantizer":
+        pass
+
+    def round_trip(self, x: np.ndarray) -> np.ndarray:
+        return self.decode(self.encode(x))
+
+    def code_width(self, dimensions: int) -> int:
+        return self.bytes_per_vector(dimensions) // np.dtype(self.code_dtype).itemsize
+
+
+class Float32Quantizer(EmbeddingQuantizer):
+    type = "none"
+    code_dtype = np.float32
+
+    @property
+    def name(self) -> str:
+        return "float32"
+
+    def fit(self, x: np.ndarray) -> "Float32Quantizer":
+        return self
+
+    def encode(self, x: np.ndarray) -> np.ndarray:
+        return np.asarray(x, dtype=np.float32)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return np.asarray(codes, dtype=np.float32)
+
+    def bytes_per_vector(self, dimensions: int) -> int:
+        return 4 * dimensions
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": self.type}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Float32Quantizer":
+        return cls()
+
+
+class Float16Quantizer(EmbeddingQuantizer):
+    type = "float16"
+    code_dtype = np.float16
+
+    @property
+    def name(self) -> str:
+        return "float16"
+
+    def fit(self, x: np.ndarray) -> "Float16Quantizer":
+        return self
+
+    def encode(self, x: np.ndarray) -> np.ndarray:
+        return np.asarray(x, dtype=np.float16)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return np.asarray(codes, dtype=np.float32)
+
+    def bytes_per_vector(self, dimensions: int) -> int:
+        return 2 * dimensions
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": self.type}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Float16Quantizer":
+        return cls()
+
+
+class Int8Quantizer(EmbeddingQuantizer):
+    type = "int8"
+    code_dtype = np.uint8
+
+    def __init__(self, minimums: np.ndarray | None = None, scales: np.ndarray | None = None):
+        self.minimums = minimums
+        self.scales = scales
+
+    @property
+    def name(self) -> str:
+        return "int8"
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.scales is not None
+
+    def fit(self, x: np.ndarray) -> "Int8Quantizer":
+        x = np.asarray(x, dtype=np.float32)
+        self.minimums = x.min(axis=0)
+        self.scales = np.maximum(x.max(axis=0) - self.minimums, np.finfo(np.float32).eps) / 255.0
+        return self
+
+    def encode(self, x: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint((np.asarray(x, dtype=np.float32) - self.minimums) / self.scales), 0, 255).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return (codes.astype(np.float32) * self.scales + self.minimums).astype(np.float32)
+
+    def bytes_per_vector(self, dimensions: int) -> int:
+        return dimensions
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": self.type, "minimums": self.minimums.tolist(), "scales": self.scales.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Int8Quantizer":
+        return cls(np.asarray(data["minimums"], dtype=np.float32), np.asarray(data["scales"], dtype=np.float32))
+
+
+class ProductQuantizer(EmbeddingQuantizer):
+    type = "pq"
+    code_dtype = np.uint8
+
+    def __init__(self, n_subvectors: int = 8, n_bits: int = 8, n_iterations: int = 20, seed: int = 42, codebooks: np.ndarray | None = None):
+        if not 1 <= n_bits <= 8:
+            raise ValueError(f"Product quantization supports 1 to 8 bits per sub-vector, got {n_bits}")
+
+        self.n_subvectors = n_subvectors
+        self.n_bits = n_bits
+        self.n_iterations = n_iterations
+        self.seed = seed
+        self.codebooks = codebooks
+
+    @property
+    def name(self) -> str:
+        return f"pq{self.n_subvectors}x{self.n_bits}"
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.codebooks is not None
+
+    def _split(self, x: np.ndarray) -> np.ndarray:
+        if x.shape[1] % self.n_subvectors != 0:
+            raise ValueError(f"Embedding dimensions {x.shape[1]} are not divisible by the {self.n_subvectors} product quantization sub-vectors")
+        return np.asarray(x, dtype=np.float32).reshape(len(x), self.n_subvectors, -1)
+
+    def fit(self, x: np.ndarray) -> "ProductQuantizer":
+        subvectors = self._split(x)
+        self.codebooks = np.stack([kmeans(subvectors[:, index], 2**self.n_bits, self.n_iterations, self.seed + index) for index in range(self.n_subvectors)])
+        return self
+
+    def encode(self, x: np.ndarray) -> np.ndarray:
+        subvectors = self._split(x)
+        return np.stack([assign_to_centroids(subvectors[:, index], self.codebooks[index]) for index in range(self.n_subvectors)], axis=1).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self.codebooks[np.arange(self.n_subvectors), codes].reshape(len(codes), -1)
+
+    def bytes_per_vector(self, dimensions: int) -> int:
+        return self.n_subvectors
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": self.type, "n_subvectors": self.n_subvectors, "n_bits": self.n_bits, "codebooks": self.codebooks.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ProductQuantizer":
+        return cls(n_subvectors=data["n_subvectors"], n_bits=data["n_bits"], codebooks=np.asarray(data["codebooks"], dtype=np.float32))
+
+
+QUANTIZERS: Dict[str, Type[EmbeddingQuantizer]] = {
+    quantizer.type: quantizer for quantizer in (Float32Quantizer, Float16Quantizer, Int8Quantizer, ProductQuantizer)
+}
+
+
+def quantizer_from_dict(data: Dict[str, Any]) -> EmbeddingQuantizer:
+    return QUANTIZERS[data["type"]].from_dict(data)
+
+
+def get_quantizer(type: str, n_subvectors: int = 8, n_bits: int = 8) -> EmbeddingQuantizer:
+    if type not in QUANTIZERS:
+        raise ValueError(f"Unknown quantization type {type}, expected one of {list(QUANTIZERS)}")
+    if type == ProductQuantizer.type:
+        return ProductQuantizer(n_subvectors=n_subvectors, n_bits=n_bits)
+    return QUANTIZERS[type]()
@@ -1,7 +1,10 @@
+import hashlib
 import dataclasses
-from typing import Dict, List
+from functools import cached_property
+from typing import Dict, Iterator, List, Mapping, Tuple
 from abc import ABC, abstractmethod
 
+import numpy as np
 import pandas as pd
 
 
@@ -11,18 +14,97 @@ class Column(ABC):
         pass
 
 
+class SortedArrayVocabulary(Mapping[str, int]):
+    # Keys are kept as one UTF-8 blob with int64 offsets in sorted order, the fixed-width array used for lookups is only built on first use
+    def __init__(self, keys_blob: np.ndarray, keys_offsets: np.ndarray, sorted_codes: np.ndarray):
+        self.keys_blob = keys_blob
+        self.keys_offsets = keys_offsets
+        self.sorted_codes = sorted_codes
+
+    @classmethod
+    def from_dict(cls, vocabulary: Mapping[str, int]) -> "SortedArrayVocabulary":
+        keys = np.array(list(vocabulary.keys()), dtype=str)
+        codes = np.fromiter(vocabulary.values(), dtype=np.int64, count=len(vocabulary))
+        order = np.argsort(keys, kind="stable")
+        return cls.from_sorted_keys(keys[order], codes[order])
+
+    @classmethod
+    def from_sorted_keys(cls, sorted_keys: np.ndarray, sorted_codes: np.ndarray) -> "SortedArrayVocabulary":
+        encoded_keys = [key.encode("utf-8") for key in np.asarray(sorted_keys).tolist()]
+        keys_offsets = np.zeros(len(encoded_keys) + 1, dtype=np.int64)
+        keys_offsets[1:] = np.cumsum([len(key) for key in encoded_keys])
+        return cls(np.frombuffer(b"".join(encoded_keys), dtype=np.uint8), keys_offsets, np.asarray(sorted_codes, dtype=np.int64))
+
+    @cached_property
+    def sorted_keys(self) -> np.ndarray:
+        keys_blob = np.asarray(self.keys_blob).tobytes()
+        return np.array([keys_blob[start:end].decode("utf-8") for start, end in zip(self.keys_offsets[:-1].tolist(), self.keys_offsets[1:].tolist())], dtype=str)
+
+    def lookup(self, values: np.ndarray) -> np.ndarray:
+        if len(self.sorted_keys) == 0:
+            return np.full(len(values), -1, dtype=np.int64)
+
+        positions = np.minimum(np.searchsorted(self.sorted_keys, values), len(self.sorted_keys) - 1)
+        found = self.sorted_keys[positions] == values
+        return np.where(found, self.sorted_codes[positions], -1)
+
+    def fingerprint(self) -> str:
+        return hashlib.sha256(
+            np.ascontiguousarray(self.keys_blob).tobytes() + np.ascontiguousarray(self.keys_offsets, dtype=np.int64).tobytes() + np.ascontiguousarray(self.sorted_codes, dtype=np.int64).tobytes()
+        ).hexdigest()
+
+    def to_dict(self) -> Dict[str, int]:
+        return dict(zip(self.sorted_keys.tolist(), self.sorted_codes.tolist()))
+
+    def _find(self, key: str) -> int:
+        if "sorted_keys" in self.__dict__:
+            return int(self.lookup(np.array([key], dtype=str))[0])
+
+        # UTF-8 bytes sort like code points, a single key is found by a binary search over the blob without decoding the vocabulary
+        encoded_key = key.encode("utf-8")
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self._encoded_key_at(middle) < encoded_key:
+                low = middle + 1
+            else:
+                high = middle
+
+        return int(self.sorted_codes[low]) if low < len(self) and self._encoded_key_at(low) == encoded_key else -1
+
+    def _encoded_key_at(self, position: int) -> bytes:
+        return np.asarray(self.keys_blob[self.keys_offsets[position] : self.keys_offsets[position + 1]]).tobytes()
+
+    def __getitem__(self, key: str) -> int:
+        code = self._find(key) if isinstance(key, str) else -1
+        if code < 0:
+            raise KeyError(key)
+        return code
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._find(key) >= 0
+
+    def __len__(self) -> int:
+        return len(self.keys_offsets) - 1
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.sorted_keys[np.argsort(self.sorted_codes, kind="stable")].tolist())
+
+
 @dataclasses.dataclass
 class CategoricalColumn(Column):
     name: str
-    vocabulary: Dict[str, int]
+    vocabulary: Mapping[str, int]
     value_used_to_fill_na: str = "UNK"
     embedding_dim: int = 128
+    hashing_buckets: int | None = None
 
     def __post_init__(self):
-        self.vocabulary = {
-            **self.vocabulary,
-            self.value_used_to_fill_na: len(self.vocabulary),
-        }
+        if self.value_used_to_fill_na not in self.vocabulary:
+            self.vocabulary = {
+                **self.vocabulary,
+                self.value_used_to_fill_na: len(self.vocabulary),
+            }
 
     @classmethod
     def from_dict(cls, name: str, vocabulary: Dict[str, int], embedding_dim: int) -> "CategoricalColumn":
@@ -34,26 +116,149 @@ class CategoricalColumn(Column):
 
     @classmethod
     def from_series(cls, series: pd.Series) -> "CategoricalColumn":
-        series.fillna(cls.value_used_to_fill_na, inplace=True)
-        series = series.astype(str).apply(lambda x: x.lower().strip())
-        vocabulary = {value: index for index, value in enumerate(series.unique())}
+        _, normalized_values = cls._factorize(series, cls.value_used_to_fill_na)
+        vocabulary = {value: index for index, value in enumerate(normalized_values.unique())}
         return cls(
             name=series.name,
             vocabulary=vocabulary,
             embedding_dim=cls.infer_embedding_dim(vocabulary),
         )
 
+    @classmethod
+    def with_hashing(cls, name: str, hashing_buckets: int) -> "CategoricalColumn":
+        return cls(
+            name=name,
+            vocabulary={},
+            embedding_dim=cls.infer_embedding_dim_from_cardinality(hashing_buckets),
+            hashing_buckets=hashing_buckets,
+        )
+
     @staticmethod
     def infer_embedding_dim(vocabulary: Dict[str, int]) -> int:
-        if len(vocabulary) < 30:
+        return CategoricalColumn.infer_embedding_dim_from_cardinality(len(vocabulary))
+
+    @staticmethod
+    def infer_embedding_dim_from_cardinality(cardinality: int) -> int:
+        if cardinality < 30:
             return 32
         else:
             return 128
 
+    @property
+    def cardinality(self) -> int:
+        if self.hashing_buckets is not None:
+            return self.hashing_buckets
+        return len(self.vocabulary)
+
+    @staticmethod
+    def _factorize(series: pd.Series, value_used_to_fill_na: str, normalize_integral_floats: bool = True) -> Tuple[np.ndarray, pd.Index]:
+        codes, uniques = pd.factorize(series.fillna(value_used_to_fill_na))
+        values = np.asarray(uniques).astype(str)
+
+        # Readers type an integer column as float in the chunks and shards holding missing values, integral floats are written as integers so every chunk gets the same keys
+        if normalize_integral_floats and series.dtype.kind == "f":
+            numbers = pd.to_numeric(pd.Series(np.asarray(uniques), dtype=object), errors="coerce").to_numpy(dtype=np.float64)
+            integral = (np.abs(numbers) < 2**53) & (numbers == np.round(numbers))
+            values = values.astype(object)
+            values[integral] = numbers[integral].astype(np.int64).astype(str)
+
+        return codes, pd.Index(values).str.lower().str.strip()
+
+    @cached_property
+    def _vocabulary_lookup(self) -> Tuple[pd.Index, np.ndarray]:
+        return pd.Index(list(self.vocabulary.keys())), np.fromiter(self.vocabulary.values(), dtype=np.int64, count=len(self.vocabulary))
+
+    @property
+    def unknown_value_code(self) -> int:
+        return self.vocabulary[self.value_used_to_fill_na]
+
+    def get_sorted_array_vocabulary(self) -> SortedArrayVocabulary:
+        if isinstance(self.vocabulary, SortedArrayVocabulary):
+            return self.vocabulary
+        return SortedArrayVocabulary.from_dict(self.vocabulary)
+
+    def extend_vocabulary(self, other: "CategoricalColumn") -> "CategoricalColumn":
+        if self.hashing_buckets is not None:
+            return self
+
+        vocabulary = self.vocabulary.to_dict() if isinstance(self.vocabulary, SortedArrayVocabulary) else dict(self.vocabulary)
+        next_code = max(vocabulary.values()) + 1
+        for value in other.vocabulary:
+            if value not in vocabulary:
+                vocabulary[value] = next_code
+                next_code += 1
+
+        return CategoricalColumn(
+            name=self.name,
+            vocabulary=vocabulary,
+            value_used_to_fill_na=self.value_used_to_fill_na,
+            embedding_dim=self.embedding_dim,
+        )
+
+    def _lookup_codes(self, normalized_values: pd.Index) -> np.ndarray:
+        if isinstance(self.vocabulary, SortedArrayVocabulary):
+            return self.vocabulary.lookup(normalized_values.to_numpy(dtype=str))
+
+        vocabulary_index, vocabulary_codes = self._vocabulary_lookup
+        positions = vocabulary_index.get_indexer(normalized_values)
+        return np.where(positions >= 0, vocabulary_codes[positions], -1)
+
     def transform(self, series: pd.Series) -> pd.Series:
-        series.fillna(self.value_used_to_fill_na, inplace=True)
-        series = series.astype(str).apply(lambda x: x.lower().strip())
-        return series.map(self.vocabulary)
+        codes, normalized_values = self._factorize(series, self.value_used_to_fill_na)
+
+        if self.hashing_buckets is not None:
+            values_codes = (pd.util.hash_array(normalized_values.to_numpy(dtype=object)) % np.uint64(self.hashing_buckets)).astype(np.int64)
+            return pd.Series(values_codes[codes], index=series.index, name=series.name)
+
+        values_codes = self._lookup_codes(normalized_values)
+        if series.dtype.kind == "f" and (values_codes < 0).any():
+            # Vocabularies fitted before integral floats were normalized hold keys such as "4.0"
+            _, legacy_values = self._factorize(series, self.value_used_to_fill_na, normalize_integral_floats=False)
+            values_codes = np.where(values_codes >= 0, values_codes, self._lookup_codes(legacy_values))
+        values_codes = np.where(values_codes >= 0, values_codes, self.unknown_value_code)
+
+        return pd.Series(values_codes[codes], index=series.index, name=series.name)
+
+
+@dataclasses.dataclass
+class CategoricalColumnOptions:
+    min_count: int = 1
+    top_k: int | None = None
+    hashing_buckets: int | None = None
+    sampled_softmax_negatives: int | None = None
+
+
+@dataclasses.dataclass
+class CategoricalColumnStatistics:
+    name: str
+    options: CategoricalColumnOptions = dataclasses.field(default_factory=CategoricalColumnOptions)
+    counts: Dict[str, int] = dataclasses.field(default_factory=dict)
+
+    def update(self, series: pd.Series) -> None:
+        if self.options.hashing_buckets is not None:
+            return
+
+        codes, normalized_values = CategoricalColumn._factorize(series, CategoricalColumn.value_used_to_fill_na)
+        values_counts = np.bincount(codes, minlength=len(normalized_values))
+
+        for value, count in zip(normalized_values, values_counts.tolist()):
+            self.counts[value] = self.counts.get(value, 0) + count
+
+    def to_column(self) -> CategoricalColumn:
+        if self.options.hashing_buckets is not None:
+            return CategoricalColumn.with_hashing(self.name, self.options.hashing_buckets)
+
+        values = [value for value, count in self.counts.items() if count >= self.options.min_count]
+
+        if self.options.top_k is not None and len(values) > self.options.top_k:
+            values = sorted(values, key=lambda value: self.counts[value], reverse=True)[: self.options.top_k]
+
+        vocabulary = {value: index for index, value in enumerate(values)}
+        return CategoricalColumn(
+            name=self.name,
+            vocabulary=vocabulary,
+            embedding_dim=CategoricalColumn.infer_embedding_dim(vocabulary),
+        )
 
 
 @dataclasses.dataclass
@@ -88,8 +293,39 @@ class NumericalColumn(Column):
         return NumericalColumn(name=series.name, value_used_to_fill_na=mean, mean=mean, std=std)
 
     def transform(self, series: pd.Series) -> pd.Series:
-        series.fillna(self.value_used_to_fill_na, inplace=True)
-        return (series - self.mean) / self.std
+        return (series.fillna(self.value_used_to_fill_na) - self.mean) / self.std
+
+
+@dataclasses.dataclass
+class NumericalColumnStatistics:
+    name: str
+    count: int = 0
+    total_count: int = 0
+    mean: float = 0.0
+    sum_of_squared_deviations: float = 0.0
+
+    def update(self, series: pd.Series) -> None:
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        values = values[~np.isnan(values)]
+        self.total_count += len(series)
+
+        if len(values) == 0:
+            return
+
+        chunk_count = len(values)
+        chunk_mean = float(values.mean())
+        chunk_sum_of_squared_deviations = float(np.square(values - chunk_mean).sum())
+
+        count = self.count + chunk_count
+        delta = chunk_mean - self.mean
+        self.mean += delta * chunk_count / count
+        self.sum_of_squared_deviations += chunk_sum_of_squared_deviations + delta**2 * self.count * chunk_count / count
+        self.count = count
+
+    def to_column(self) -> NumericalColumn:
+        mean = self.mean if self.count > 0 else float("nan")
+        std = float(np.sqrt(self.sum_of_squared_deviations / (self.total_count - 1))) if self.total_count > 1 else float("nan")
+        return NumericalColumn(name=self.name, value_used_to_fill_na=mean, mean=mean, std=std)
 
 
 @dataclasses.dataclass
@@ -12,6 +12,7 @@ class DatasetAnalysis:
     numerical_columns: NumericalColumns
     categorical_columns: CategoricalColumns
     categorical_features_loss_weights: None | Dict[str, float] = None
+    categorical_features_sampled_softmax_negatives: None | Dict[str, int] = None
 
     def get_analysis(self) -> Dict[str, float]:
         return {
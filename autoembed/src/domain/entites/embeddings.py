@@ -1,6 +1,5 @@
-import random
 from dataclasses import dataclass, field
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Sequence
 
 import numpy as np
 
@@ -21,16 +20,66 @@ class BusinessEmbeddings:
         }
 
 
-@dataclass
 class BatchOfEmbeddings:
-    embeddings: List[BusinessEmbeddings] = field(default_factory=list)
+    def __init__(self, ids: Sequence[str] | None = None, vectors: np.ndarray | None = None, metadata: Dict[str, np.ndarray] | None = None):
+        self.ids = np.asarray(ids if ids is not None else [], dtype=object)
+        self.vectors = np.asarray(vectors, dtype=np.float32) if vectors is not None else np.empty((len(self.ids), 0), dtype=np.float32)
+        self.metadata = {column: np.asarray(values, dtype=object) for column, values in (metadata or {}).items()}
+
+        if len(self.vectors) != len(self.ids) or any(len(values) != len(self.ids) for values in self.metadata.values()):
+            raise ValueError(f"Batch of {len(self.ids)} ids has {len(self.vectors)} vectors and metadata columns of {[len(values) for values in self.metadata.values()]} rows")
+
+    @classmethod
+    def from_business_embeddings(cls, embeddings: List[BusinessEmbeddings]) -> "BatchOfEmbeddings":
+        columns = list(dict.fromkeys(column for embedding in embeddings for column in embedding.metadata))
+        return cls(
+            ids=[embedding.id for embedding in embeddings],
+            vectors=np.asarray([embedding.embeddings for embedding in embeddings], dtype=np.float32) if embeddings else None,
+            metadata={column: [embedding.metadata.get(column) for embedding in embeddings] for column in columns},
+        )
+
+    @classmethod
+    def concatenate(cls, batches: List["BatchOfEmbeddings"]) -> "BatchOfEmbeddings":
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return cls()
+
+        columns = list(dict.fromkeys(column for batch in batches for column in batch.metadata))
+        return cls(
+            ids=np.concatenate([batch.ids for batch in batches]),
+            vectors=np.concatenate([batch.vectors for batch in batches]),
+            metadata={column: np.concatenate([batch.metadata.get(column, np.full(len(batch), None, dtype=object)) for batch in batches]) for column in columns},
+        )
+
+    @property
+    def embeddings(self) -> List[BusinessEmbeddings]:
+        return list(self)
+
+    def get_metadata(self, position: int) -> Dict[str, Any]:
+        return {column: values[position] for column, values in self.metadata.items()}
 
-    def add_embeddings(self, embeddings: BusinessEmbeddings) -> None:
-        self.embeddings.append(embeddings)
+    def get_metadata_records(self) -> List[Dict[str, Any]]:
+        columns = list(self.metadata)
+        return [dict(zip(columns, values)) for values in zip(*(self.metadata[column].tolist() for column in columns))] if columns else [{} for _ in range(len(self))]
 
     def __len__(self) -> int:
-        return len(self.embeddings)
-    
-    def sample_batch(self, n: int) -> "BatchOfEmbeddings":
-        return BatchOfEmbeddings(random.sample(self.embeddings, n))
-    
\ No newline at end of file
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[BusinessEmbeddings]:
+        for position in range(len(self)):
+            yield self[position]
+
+    def __getitem__(self, key: int | slice | np.ndarray) -> "BusinessEmbeddings | BatchOfEmbeddings":
+        if isinstance(key, (int, np.integer)):
+            return BusinessEmbeddings(id=self.ids[key], embeddings=self.vectors[key], metadata=self.get_metadata(key))
+
+        return BatchOfEmbeddings(ids=self.ids[key], vectors=self.vectors[key], metadata={column: values[key] for column, values in self.metadata.items()})
+
+    def sample_batch(self, n: int, seed: int | None = None) -> "BatchOfEmbeddings":
+        return self[np.sort(np.random.default_rng(seed).choice(len(self), size=min(n, len(self)), replace=False))]
+
+
+@dataclass
+class EmbeddingsLookup:
+    embeddings: BatchOfEmbeddings = field(default_factory=BatchOfEmbeddings)
+    missing_ids: List[str] = field(default_factory=list)
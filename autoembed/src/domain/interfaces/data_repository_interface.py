@@ -1,13 +1,26 @@
 from abc import ABC, abstractmethod
+from typing import Iterator, List
 
 import pandas as pd
 
 
 class DataRepositoryInterface(ABC):
     @abstractmethod
-    def get_training_data(self, path: str) -> pd.DataFrame:
+    def get_training_data(self, path: str, columns: List[str] | None = None) -> pd.DataFrame:
         pass
 
     @abstractmethod
-    def get_prediction_data(self, path: str) -> pd.DataFrame:
+    def get_training_data_chunks(self, path: str, chunk_size: int, columns: List[str] | None = None) -> Iterator[pd.DataFrame]:
+        pass
+
+    @abstractmethod
+    def get_prediction_data(self, path: str, columns: List[str] | None = None) -> pd.DataFrame:
+        pass
+
+    @abstractmethod
+    def get_prediction_data_chunks(self, path: str, chunk_size: int, columns: List[str] | None = None) -> Iterator[pd.DataFrame]:
+        pass
+
+    @abstractmethod
+    def get_data_fingerprint(self, path: str) -> str:
         pass
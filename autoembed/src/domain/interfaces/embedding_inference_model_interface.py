@@ -0,0 +1,18 @@
+from typing import Dict
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+class EmbeddingInferenceModelInterface(ABC):
+    @abstractmethod
+    def embed(self, x: Dict[str, np.ndarray], batch_size: int | None = None) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def set_jit_compile(self, jit_compile: bool | str) -> None:
+        pass
+
+    @abstractmethod
+    def load(self, path: str) -> "EmbeddingInferenceModelInterface":
+        pass
@@ -1,13 +1,18 @@
-from typing import Dict, List
-from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List
+from abc import abstractmethod
 
 import numpy as np
 import pandas as pd
 
+from autoembed.src.domain.dataset_preprocessor import DatasetPreprocessor
 from autoembed.src.domain.entites.dataset_analysis import DatasetAnalysis
+from autoembed.src.domain.interfaces.embedding_inference_model_interface import EmbeddingInferenceModelInterface
 
 
-class EmbeddingModelInterface(ABC):
+RECONSTRUCTION_LOSS_KEY = "reconstruction_loss"
+
+
+class EmbeddingModelInterface(EmbeddingInferenceModelInterface):
     @abstractmethod
     def fit(
         self,
@@ -15,7 +20,19 @@ class EmbeddingModelInterface(ABC):
         y: Dict[str, np.ndarray],
         epochs: int,
         batch_size: int,
-    ) -> None:
+    ) -> Dict[str, List[float]]:
+        pass
+
+    @abstractmethod
+    def fit_from_chunks(
+        self,
+        chunks: Callable[[], Iterable[pd.DataFrame]],
+        dataset_preprocessor: DatasetPreprocessor,
+        epochs: int,
+        batch_size: int,
+        validation_split: float,
+        shuffle_buffer_size: int,
+    ) -> Dict[str, List[float]]:
         pass
 
     @abstractmethod
@@ -24,15 +41,18 @@ class EmbeddingModelInterface(ABC):
         dataset_analysis: DatasetAnalysis,
         bottleneck_layer_dim: int,
         hidden_layer_dim: List[int],
+        jit_compile: bool | str = "auto",
+        nested_prefix_sizes: List[int] | None = None,
     ) -> "EmbeddingModelInterface":
         pass
 
+    @property
     @abstractmethod
-    def embed(self, x: pd.DataFrame) -> np.ndarray:
+    def is_chief(self) -> bool:
         pass
 
     @abstractmethod
-    def load(self, path: str) -> "EmbeddingModelInterface":
+    def warm_start_from(self, previous: "EmbeddingModelInterface") -> None:
         pass
 
     @abstractmethod
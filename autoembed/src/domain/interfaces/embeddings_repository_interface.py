@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Dict, List, Tuple
 
-from autoembed.src.domain.entites.embeddings import BusinessEmbeddings, BatchOfEmbeddings
+import numpy as np
+
+from autoembed.src.domain.entites.embeddings import BusinessEmbeddings, BatchOfEmbeddings, EmbeddingsLookup
 
 
 class EmbeddingsRepositoryInterface(ABC):
@@ -13,6 +15,14 @@ class EmbeddingsRepositoryInterface(ABC):
     def get_most_similar_embeddings_by_id(self, id: str, n: int = 10) -> List[str]:
         pass
 
+    @abstractmethod
+    def get_most_similar_embeddings_by_ids(self, ids: List[str], n: int = 10) -> Dict[str, List[Tuple[str, float]]]:
+        pass
+
+    @abstractmethod
+    def query_similar_embeddings(self, query_embeddings: np.ndarray, n: int = 10) -> List[str]:
+        pass
+
     @abstractmethod
     def update_embeddings(self, embeddings: BusinessEmbeddings) -> None:
         pass
@@ -22,7 +32,11 @@ class EmbeddingsRepositoryInterface(ABC):
         pass
 
     @abstractmethod
-    def get_embeddings_batch(self, ids: List[str]) -> List[BusinessEmbeddings]:
+    def delete_embeddings(self, ids: List[str]) -> None:
+        pass
+
+    @abstractmethod
+    def get_embeddings_batch(self, ids: List[str], max_workers: int | None = None) -> EmbeddingsLookup:
         pass
 
     @abstractmethod
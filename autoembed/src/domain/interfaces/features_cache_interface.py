@@ -0,0 +1,20 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from autoembed.src.domain.dataset_preprocessor import DatasetPreprocessor
+
+
+class FeaturesCacheInterface(ABC):
+    @abstractmethod
+    def load(self, key: str) -> Tuple[DatasetPreprocessor, Dict[str, np.ndarray]] | None:
+        pass
+
+    @abstractmethod
+    def save(self, key: str, dataset_preprocessor: DatasetPreprocessor, features: Dict[str, np.ndarray]) -> None:
+        pass
+
+    @abstractmethod
+    def save_chunks(self, key: str, dataset_preprocessor: DatasetPreprocessor, features_chunks: Iterable[Dict[str, np.ndarray]], rows: int) -> None:
+        pass
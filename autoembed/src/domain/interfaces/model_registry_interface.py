@@ -1,6 +1,10 @@
 from abc import ABC, abstractmethod
+from typing import Any, Dict, Type
 
 from autoembed.src.domain.dataset_preprocessor import DatasetPreprocessor
+from autoembed.src.domain.interfaces.embedding_inference_model_interface import (
+    EmbeddingInferenceModelInterface,
+)
 from autoembed.src.domain.interfaces.embedding_model_interface import (
     EmbeddingModelInterface,
 )
@@ -8,7 +12,26 @@ from autoembed.src.domain.interfaces.embedding_model_interface import (
 
 class ModelRegistryInterface(ABC):
     @abstractmethod
-    def save_model_and_preprocessor(self, model: EmbeddingModelInterface, preprocessor: DatasetPreprocessor, model_registry_name: str) -> None:
+    def save_model_and_preprocessor(
+        self,
+        model: EmbeddingModelInterface,
+        preprocessor: DatasetPreprocessor,
+        model_registry_name: str,
+        data_fingerprint: str | None = None,
+        metrics: Dict[str, float] | None = None,
+    ) -> str:
+        pass
+
+    @abstractmethod
+    def get_release(self, model_registry_name: str, model_id: str) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def save_artifact(self, model_registry_name: str, model_id: str, artifact_name: str, content: str) -> None:
+        pass
+
+    @abstractmethod
+    def load_artifact(self, model_registry_name: str, model_id: str, artifact_name: str) -> str | None:
         pass
 
     @abstractmethod
@@ -16,5 +39,5 @@ class ModelRegistryInterface(ABC):
         pass
 
     @abstractmethod
-    def load_model(self, model: EmbeddingModelInterface, model_registry_name: str, model_id: str | None = None) -> EmbeddingModelInterface:
+    def load_model(self, model: Type[EmbeddingInferenceModelInterface], model_registry_name: str, model_id: str | None = None) -> EmbeddingInferenceModelInterface:
         pass
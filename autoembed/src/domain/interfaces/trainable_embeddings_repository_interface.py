@@ -0,0 +1,21 @@
+from abc import abstractmethod
+
+import numpy as np
+
+from autoembed.src.domain.interfaces.embeddings_repository_interface import EmbeddingsRepositoryInterface
+
+
+class TrainableEmbeddingsRepositoryInterface(EmbeddingsRepositoryInterface):
+    @property
+    @abstractmethod
+    def requires_training(self) -> bool:
+        pass
+
+    @property
+    @abstractmethod
+    def train_sample_size(self) -> int:
+        pass
+
+    @abstractmethod
+    def train(self, embeddings: np.ndarray) -> None:
+        pass
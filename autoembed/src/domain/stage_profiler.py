@@ -0,0 +1,153 @@
+import os
+import time
+import resource
+import datetime
+import threading
+import json
+import dataclasses
+from logging import Logger
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, TypeVar
+
+from autoembed.src.domain.interfaces.model_registry_interface import (
+    ModelRegistryInterface,
+)
+
+
+T = TypeVar("T")
+
+PERFORMANCE_REPORT_FILE_NAME = "performance_report_{run_name}.json"
+PERFORMANCE_TRACE_FILE_NAME = "performance_trace_{run_name}.json"
+PAGE_SIZE_BYTES = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def get_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE_BYTES
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@dataclasses.dataclass
+class StageRecord:
+    name: str
+    started_at_seconds: float
+    wall_time_seconds: float = 0.0
+    rows: int | None = None
+    peak_rss_bytes: int = 0
+    thread_id: int = 0
+
+
+class StageProfiler:
+    def __init__(self, run_name: str, sampling_interval_seconds: float = 0.05):
+        self.run_name = run_name
+        self.sampling_interval_seconds = sampling_interval_seconds
+        self.created_at = datetime.datetime.now()
+        self.origin = time.perf_counter()
+        self.records: List[StageRecord] = []
+        self._open_records: List[StageRecord] = []
+        self._lock = threading.Lock()
+        self._sampler: threading.Thread | None = None
+
+    @contextmanager
+    def stage(self, name: str, rows: int | None = None) -> Iterator[StageRecord]:
+        record = StageRecord(name=name, started_at_seconds=time.perf_counter() - self.origin, rows=rows, peak_rss_bytes=get_rss_bytes(), thread_id=threading.get_ident())
+        self._open(record)
+        try:
+            yield record
+        finally:
+            record.wall_time_seconds = time.perf_counter() - self.origin - record.started_at_seconds
+            record.peak_rss_bytes = max(record.peak_rss_bytes, get_rss_bytes())
+            self._close(record)
+
+    def iterate(self, name: str, iterable: Iterable[T], count_rows: Callable[[T], int] = len) -> Iterator[T]:
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name) as record:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                record.rows = count_rows(item)
+            yield item
+
+        with self._lock:
+            self.records.remove(record)
+
+    def _open(self, record: StageRecord) -> None:
+        with self._lock:
+            self._open_records.append(record)
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample_rss, daemon=True)
+                self._sampler.start()
+
+    def _close(self, record: StageRecord) -> None:
+        with self._lock:
+            self._open_records.remove(record)
+            self.records.append(record)
+
+    def _sample_rss(self) -> None:
+        while True:
+            time.sleep(self.sampling_interval_seconds)
+            rss_bytes = get_rss_bytes()
+            with self._lock:
+                if not self._open_records:
+                    self._sampler = None
+                    return
+                for record in self._open_records:
+                    record.peak_rss_bytes = max(record.peak_rss_bytes, rss_bytes)
+
+    def summarize(self) -> List[Dict[str, Any]]:
+        stages: Dict[str, Dict[str, Any]] = {}
+        for record in self.records:
+            stage = stages.setdefault(record.name, {"name": record.name, "calls": 0, "wall_time_seconds": 0.0, "rows": None, "peak_rss_bytes": 0})
+            stage["calls"] += 1
+            stage["wall_time_seconds"] += record.wall_time_seconds
+            stage["peak_rss_bytes"] = max(stage["peak_rss_bytes"], record.peak_rss_bytes)
+            if record.rows is not None:
+                stage["rows"] = (stage["rows"] or 0) + record.rows
+
+        for stage in stages.values():
+            stage["rows_per_second"] = stage["rows"] / stage["wall_time_seconds"] if stage["rows"] and stage["wall_time_seconds"] > 0 else None
+
+        return list(stages.values())
+
+    def to_report(self) -> Dict[str, Any]:
+        return {
+            "run": self.run_name,
+            "created_at": self.created_at.isoformat(),
+            "wall_time_seconds": time.perf_counter() - self.origin,
+            "peak_rss_bytes": max((record.peak_rss_bytes for record in self.records), default=get_rss_bytes()),
+            "stages": self.summarize(),
+        }
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        return {
+            "traceEvents": [
+                {
+                    "name": record.name,
+                    "ph": "X",
+                    "ts": record.started_at_seconds * 1e6,
+                    "dur": record.wall_time_seconds * 1e6,
+                    "pid": os.getpid(),
+                    "tid": record.thread_id,
+                    "args": {"rows": record.rows, "peak_rss_mb": record.peak_rss_bytes / 1024**2},
+                }
+                for record in self.records
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+
+def log_performance_report(profiler: StageProfiler, logger: Logger) -> None:
+    for stage in profiler.summarize():
+        rows_per_second = f", {stage['rows_per_second']:.0f} rows/s" if stage["rows_per_second"] else ""
+        logger.info(f"⏱️ {stage['name']}: {stage['wall_time_seconds']:.3f}s over {stage['calls']} calls{rows_per_second}, peak RSS {stage['peak_rss_bytes'] / 1024**2:.0f}MB")
+
+
+def save_performance_report(profiler: StageProfiler, model_registry: ModelRegistryInterface, model_registry_name: str, model_id: str, chrome_trace: bool = False) -> None:
+    model_registry.save_artifact(model_registry_name, model_id, PERFORMANCE_REPORT_FILE_NAME.format(run_name=profiler.run_name), json.dumps(profiler.to_report(), indent=2))
+
+    if chrome_trace:
+        model_registry.save_artifact(model_registry_name, model_id, PERFORMANCE_TRACE_FILE_NAME.format(run_name=profiler.run_name), json.dumps(profiler.to_chrome_trace()))
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import uuid
+import pickle
+import shutil
+from logging import Logger
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from kink import di, inject
+
+from autoembed.src.domain.dataset_preprocessor import DatasetPreprocessor
+from autoembed.src.domain.interfaces.features_cache_interface import (
+    FeaturesCacheInterface,
+)
+
+
+FEATURES_INDEX_FILE_NAME = "features.json"
+PREPROCESSOR_FILE_NAME = "preprocessor.pkl"
+
+
+@inject()
+class FeaturesCacheLocalMmapAdapter(FeaturesCacheInterface):
+    def __init__(self, logger: Logger, path: str = ".autoembed_cache", max_size_bytes: int | None = None, max_age_seconds: float | None = None):
+        self.path = path
+        self.max_size_bytes = max_size_bytes
+        self.max_age_seconds = max_age_seconds
+        self.logger = logger
+
+        if not os.path.exists(path):
+            self.logger.info(f"Creating directory {path}")
+            os.makedirs(path)
+
+    def load(self, key: str) -> Tuple[DatasetPreprocessor, Dict[str, np.ndarray]] | None:
+        entry_path = os.path.join(self.path, key)
+
+        if not os.path.exists(os.path.join(entry_path, FEATURES_INDEX_FILE_NAME)):
+            self.logger.info(f"🔍 No cached features for {key}")
+            return None
+
+        self.logger.info(f"✅ Loading cached features from {entry_path}")
+        os.utime(entry_path)
+
+        with open(os.path.join(entry_path, FEATURES_INDEX_FILE_NAME), "r") as f:
+            features_files = json.load(f)
+
+        with open(os.path.join(entry_path, PREPROCESSOR_FILE_NAME), "rb") as f:
+            dataset_preprocessor = pickle.load(f)
+
+        features = {feature_name: np.load(os.path.join(entry_path, file_name), mmap_mode="r") for feature_name, file_name in features_files.items()}
+
+        return dataset_preprocessor, features
+
+    def save(self, key: str, dataset_preprocessor: DatasetPreprocessor, features: Dict[str, np.ndarray]) -> None:
+        self.save_chunks(key, dataset_preprocessor, [features], len(next(iter(features.values()))))
+
+    def save_chunks(self, key: str, dataset_preprocessor: DatasetPreprocessor, features_chunks: Iterable[Dict[str, np.ndarray]], rows: int) -> None:
+        entry_path = os.path.join(self.path, key)
+        temporary_path = f"{entry_path}.tmp-{uuid.uuid4()}"
+        os.makedirs(temporary_path)
+
+        self.logger.info(f"Caching features of {rows} rows to {entry_path}")
+
+        try:
+            # Each feature file is allocated for all the rows up front and filled chunk by chunk, so only one chunk of features is held in memory
+            features_files = {}
+            features_memmaps = {}
+            written_rows = 0
+            for features in features_chunks:
+                chunk_rows = len(next(iter(features.values())))
+                if written_rows + chunk_rows > rows:
+                    raise ValueError(f"Got more than the {rows} expected rows of features to cache")
+
+                for index, (feature_name, feature) in enumerate(features.items()):
+                    if feature_name not in features_memmaps:
+                        features_files[feature_name] = f"{index}.npy"
+                        features_memmaps[feature_name] = np.lib.format.open_memmap(
+                            os.path.join(temporary_path, features_files[feature_name]), mode="w+", dtype=feature.dtype, shape=(rows, *feature.shape[1:])
+                        )
+                    features_memmaps[feature_name][written_rows : written_rows + chunk_rows] = feature
+                written_rows += chunk_rows
+
+            if written_rows != rows:
+                raise ValueError(f"Got {written_rows} rows of features to cache, expected {rows}")
+
+            for feature_memmap in features_memmaps.values():
+                feature_memmap.flush()
+            del features_memmaps
+
+            with open(os.path.join(temporary_path, PREPROCESSOR_FILE_NAME), "wb") as f:
+                pickle.dump(dataset_preprocessor, f)
+
+            with open(os.path.join(temporary_path, FEATURES_INDEX_FILE_NAME), "w") as f:
+                json.dump(features_files, f)
+        except BaseException:
+            shutil.rmtree(temporary_path, ignore_errors=True)
+            raise
+
+        if os.path.exists(entry_path):
+            shutil.rmtree(entry_path)
+        os.rename(temporary_path, entry_path)
+
+        self._evict(keep=key)
+
+    def __getstate__(self) -> Dict:
+        # Search trials load the features in spawned processes, the logger writes to a stream that cannot be pickled and is injected again there
+        return {**self.__dict__, "logger": None}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self.logger = di[Logger]
+
+    def _evict(self, keep: str) -> None:
+        entries = self._list_entries()
+        now = time.time()
+
+        if self.max_age_seconds is not None:
+            for entry, last_used, _ in entries:
+                if entry != keep and now - last_used > self.max_age_seconds:
+                    self._remove(entry, reason="older than the maximum age")
+            entries = [entry for entry in entries if entry[0] == keep or now - entry[1] <= self.max_age_seconds]
+
+        if self.max_size_bytes is not None:
+            total_size = sum(size for _, _, size in entries)
+            for entry, _, size in sorted(entries, key=lambda entry: entry[1]):
+                if total_size <= self.max_size_bytes:
+                    break
+                if entry != keep:
+                    self._remove(entry, reason="cache is over its maximum size")
+                    total_size -= size
+
+    def _list_entries(self) -> List[Tuple[str, float, int]]:
+        entries = []
+        for entry in os.listdir(self.path):
+            entry_path = os.path.join(self.path, entry)
+            if not os.path.isdir(entry_path) or ".tmp-" in entry:
+                continue
+            size = sum(os.path.getsize(os.path.join(entry_path, file_name)) for file_name in os.listdir(entry_path))
+            entries.append((entry, os.path.getmtime(entry_path), size))
+        return entries
+
+    def _remove(self, entry: str, reason: str) -> None:
+        self.logger.info(f"Evicting cached features {entry}: {reason}")
+        shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
@@ -1,4 +1,6 @@
+import functools
 from logging import Logger
+from typing import Iterator, List
 
 from kink import inject
 import pandas as pd
@@ -6,17 +8,58 @@ import pandas as pd
 from autoembed.src.domain.interfaces.data_repository_interface import (
     DataRepositoryInterface,
 )
+from autoembed.src.infrastructure.data_repository.local_files import (
+    fingerprint_local_files,
+    iterate_local_files,
+    read_local_files,
+    resolve_local_files,
+    split_in_chunks,
+)
+
+
+def read_csv_file(path: str, columns: List[str] | None = None) -> pd.DataFrame:
+    return pd.read_csv(path, usecols=columns)
 
 
 @inject()
 class DataRepositoryLocalCSVAdapter(DataRepositoryInterface):
-    def __init__(self, logger: Logger):
+    def __init__(self, logger: Logger, max_workers: int | None = None):
         self.logger = logger
+        self.max_workers = max_workers
 
-    def get_training_data(self, path: str) -> pd.DataFrame:
+    def get_training_data(self, path: str, columns: List[str] | None = None) -> pd.DataFrame:
         self.logger.info(f"Getting training data from {path}")
-        return pd.read_csv(path)
+        return self._read(path, columns)
 
-    def get_prediction_data(self, path: str) -> pd.DataFrame:
+    def get_training_data_chunks(self, path: str, chunk_size: int, columns: List[str] | None = None) -> Iterator[pd.DataFrame]:
+        self.logger.info(f"Streaming training data from {path} by chunks of {chunk_size} rows")
+        return self._read_chunks(path, chunk_size, columns)
+
+    def get_prediction_data(self, path: str, columns: List[str] | None = None) -> pd.DataFrame:
         self.logger.info(f"Getting prediction data from {path}")
-        return pd.read_csv(path)
+        return self._read(path, columns)
+
+    def get_prediction_data_chunks(self, path: str, chunk_size: int, columns: List[str] | None = None) -> Iterator[pd.DataFrame]:
+        self.logger.info(f"Streaming prediction data from {path} by chunks of {chunk_size} rows")
+        return self._read_chunks(path, chunk_size, columns)
+
+    def get_data_fingerprint(self, path: str) -> str:
+        return fingerprint_local_files(resolve_local_files(path, "csv"))
+
+    def _read(self, path: str, columns: List[str] | None) -> pd.DataFrame:
+        paths = resolve_local_files(path, "csv")
+        if len(paths) > 1:
+            self.logger.info(f"Reading {len(paths)} csv files in parallel")
+        return read_local_files(functools.partial(read_csv_file, columns=columns), paths, self.max_workers)
+
+    def _read_chunks(self, path: str, chunk_size: int, columns: List[str] | None) -> Iterator[pd.DataFrame]:
+        paths = resolve_local_files(path, "csv")
+
+        if len(paths) == 1:
+            with pd.read_csv(paths[0], usecols=columns, chunksize=chunk_size) as reader:
+                yield from reader
+            return
+
+        self.logger.info(f"Streaming {len(paths)} csv files read in parallel")
+        for dataframe in iterate_local_files(functools.partial(read_csv_file, columns=columns), paths, self.max_workers):
+            yield from split_in_chunks(dataframe, chunk_size)
@@ -0,0 +1,67 @@
+import functools
+from logging import Logger
+from typing import Iterator, List
+
+from kink import inject
+import pandas as pd
+import pyarrow.parquet as pq
+
+from autoembed.src.domain.interfaces.data_repository_interface import (
+    DataRepositoryInterface,
+)
+from autoembed.src.infrastructure.data_repository.local_files import (
+    fingerprint_local_files,
+    iterate_local_files,
+    read_local_files,
+    resolve_local_files,
+    split_in_chunks,
+)
+
+
+def read_parquet_file(path: str, columns: List[str] | None = None) -> pd.DataFrame:
+    return pd.read_parquet(path, columns=columns)
+
+
+@inject()
+class DataRepositoryLocalParquetAdapter(DataRepositoryInterface):
+    def __init__(self, logger: Logger, max_workers: int | None = None):
+        self.logger = logger
+        self.max_workers = max_workers
+
+    def get_training_data(self, path: str, columns: List[str] | None = None) -> pd.DataFrame:
+        self.logger.info(f"Getting training data from {path}")
+        return self._read(path, columns)
+
+    def get_training_data_chunks(self, path: str, chunk_size: int, columns: List[str] | None = None) -> Iterator[pd.DataFrame]:
+        self.logger.info(f"Streaming training data from {path} by chunks of {chunk_size} rows")
+        return self._read_chunks(path, chunk_size, columns)
+
+    def get_prediction_data(self, path: str, columns: List[str] | None = None) -> pd.DataFrame:
+        self.logger.info(f"Getting prediction data from {path}")
+        return self._read(path, columns)
+
+    def get_prediction_data_chunks(self, path: str, chunk_size: int, columns: List[str] | None = None) -> Iterator[pd.DataFrame]:
+        self.logger.info(f"Streaming prediction data from {path} by chunks of {chunk_size} rows")
+        return self._read_chunks(path, chunk_size, columns)
+
+    def get_data_fingerprint(self, path: str) -> str:
+        return fingerprint_local_files(resolve_local_files(path, "parquet"))
+
+    def _read(self, path: str, columns: List[str] | None) -> pd.DataFrame:
+        paths = resolve_local_files(path, "parquet")
+        if len(paths) > 1:
+            self.logger.info(f"Reading {len(paths)} parquet files in parallel")
+        return read_local_files(functools.partial(read_parquet_file, columns=columns), paths, self.max_workers)
+
+    def _read_chunks(self, path: str, chunk_size: int, columns: List[str] | None) -> Iterator[pd.DataFrame]:
+        paths = resolve_local_files(path, "parquet")
+
+        if len(paths) == 1:
+            parquet_file = pq.ParquetFile(paths[0])
+            for record_batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+                yield record_batch.to_pandas()
+            return
+
+        self.logger.info(f"Streaming {len(paths)} parquet files read in parallel")
+        for dataframe in iterate_local_files(functools.partial(read_parquet_file, columns=columns), paths, self.max_workers):
+            yield from split_in_chunks(dataframe, chunk_size)
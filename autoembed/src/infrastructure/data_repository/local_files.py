@@ -0,0 +1,62 @@
+import os
+import glob
+import hashlib
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List
+
+import pandas as pd
+
+
+def resolve_local_files(path: str, extension: str) -> List[str]:
+    if os.path.isdir(path):
+        paths = glob.glob(os.path.join(path, "**", f"*.{extension}"), recursive=True)
+    elif glob.has_magic(path):
+        paths = glob.glob(path, recursive=True)
+    else:
+        paths = [path]
+
+    if not paths:
+        raise FileNotFoundError(f"No {extension} files found for {path}")
+
+    return sorted(paths)
+
+
+def fingerprint_local_files(paths: List[str]) -> str:
+    fingerprint = hashlib.sha256()
+    for path in paths:
+        stat = os.stat(path)
+        fingerprint.update(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return fingerprint.hexdigest()
+
+
+def read_local_files(reader: Callable[[str], pd.DataFrame], paths: List[str], max_workers: int | None = None) -> pd.DataFrame:
+    if len(paths) == 1:
+        return reader(paths[0])
+
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return pd.concat(executor.map(reader, paths), ignore_index=True)
+
+
+def iterate_local_files(reader: Callable[[str], pd.DataFrame], paths: List[str], max_workers: int | None = None) -> Iterator[pd.DataFrame]:
+    # Each worker decodes a whole shard, so the peak memory is max_workers + 1 shards: one read in flight per worker and the one being consumed
+    max_workers = max_workers or os.cpu_count()
+    remaining_paths = iter(paths)
+
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        pending_reads = deque(executor.submit(reader, path) for _, path in zip(range(max_workers), remaining_paths))
+
+        while pending_reads:
+            dataframe = pending_reads.popleft().result()
+
+            next_path = next(remaining_paths, None)
+            if next_path is not None:
+                pending_reads.append(executor.submit(reader, next_path))
+
+            yield dataframe
+
+
+def split_in_chunks(dataframe: pd.DataFrame, chunk_size: int) -> Iterator[pd.DataFrame]:
+    for start in range(0, len(dataframe), chunk_size):
+        yield dataframe.iloc[start : start + chunk_size]
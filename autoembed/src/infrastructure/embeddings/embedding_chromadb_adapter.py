@@ -1,11 +1,13 @@
 from logging import Logger
+from concurrent.futures import ThreadPoolExecutor
 
 import chromadb
-from typing import List
+import numpy as np
+from typing import Dict, List, Tuple
 from kink import inject
 import tqdm
 
-from autoembed.src.domain.entites.embeddings import BusinessEmbeddings, BatchOfEmbeddings
+from autoembed.src.domain.entites.embeddings import BusinessEmbeddings, BatchOfEmbeddings, EmbeddingsLookup
 from autoembed.src.domain.interfaces.embeddings_repository_interface import (
     EmbeddingsRepositoryInterface
 )
@@ -13,31 +15,116 @@ from autoembed.src.domain.interfaces.embeddings_repository_interface import (
 
 @inject()
 class EmbeddingsChromaDbAdapter(EmbeddingsRepositoryInterface):
-    def __init__(self, vector_collection_name: str, logger: Logger):
+    def __init__(self, vector_collection_name: str, logger: Logger, coarse_prefix_size: int | None = None, rerank_factor: int = 10):
         self.logger = logger
         self.client = chromadb.PersistentClient(path="chroma_db")
+        self.collection = self._get_or_create_collection(vector_collection_name)
+
+        self.coarse_prefix_size = coarse_prefix_size
+        self.rerank_factor = rerank_factor
+        self.prefix_collection = self._get_or_create_collection(f"{vector_collection_name}_prefix_{coarse_prefix_size}") if coarse_prefix_size else None
+
+        self.max_batch_size = 5460
+
+        if self.prefix_collection is not None and self.prefix_collection.count() != self.collection.count():
+            self._backfill_prefix_collection()
+
+    def _get_or_create_collection(self, vector_collection_name: str) -> chromadb.Collection:
         try:
-            self.collection = self.client.get_collection(vector_collection_name)
+            return self.client.get_collection(vector_collection_name)
         except Exception as e:
             self.logger.error(f"⚠️ Error getting collection: {e}")
             self.logger.info(f"🔍 Creating collection {vector_collection_name}")
-            self.collection = self.client.create_collection(vector_collection_name)
+            collection = self.client.create_collection(vector_collection_name)
             self.logger.info(f"✅ Collection {vector_collection_name} created")
+            return collection
 
-        self.max_batch_size = 5460
+    def _backfill_prefix_collection(self) -> None:
+        # The prefix collection is rebuilt from the full vectors when it was added to an existing collection or missed writes
+        prefix_collection_name = self.prefix_collection.name
+        self.logger.info(f"🔍 Backfilling {prefix_collection_name} with the {self.coarse_prefix_size} first dimensions of {self.collection.count()} embeddings")
+        self.client.delete_collection(prefix_collection_name)
+        self.prefix_collection = self.client.create_collection(prefix_collection_name)
+
+        for i in tqdm.tqdm(range(0, self.collection.count(), self.max_batch_size), desc="Backfilling prefix embeddings ⌛"):
+            batch = self.collection.get(include=["embeddings"], limit=self.max_batch_size, offset=i)
+            if batch["ids"]:
+                self.prefix_collection.upsert(ids=batch["ids"], embeddings=np.asarray(batch["embeddings"], dtype=np.float32)[:, : self.coarse_prefix_size])
+
+        self.logger.info(f"✅ Collection {prefix_collection_name} backfilled")
 
     def get_embeddings(self, id_column_name: str) -> BusinessEmbeddings:
         self.logger.info(f"Getting embeddings for {id_column_name}")
 
-        return BusinessEmbeddings(
-            id=id_column_name,
-            embeddings=self.collection.get(ids=[id_column_name], include=["embeddings"])["embeddings"][0],
-        )
+        lookup = self.get_embeddings_batch([id_column_name])
+        if lookup.missing_ids:
+            raise KeyError(f"No embeddings found for id {id_column_name}")
+        return lookup.embeddings[0]
 
-    def get_most_similar_embeddings_by_id(self, id_column_name: str, n: int = 6) -> List[BusinessEmbeddings]:
+    def get_most_similar_embeddings_by_id(self, id_column_name: str, n: int = 6) -> List[str]:
         self.logger.info(f"Getting most similar embeddings for {id_column_name}")
-        most_similar_ids = self.collection.query(query_embeddings=[id_column_name], n_results=n)["ids"]
-        return [id_column_name for id_column_name in most_similar_ids if id_column_name != id_column_name]
+        return [id for id, _ in self.get_most_similar_embeddings_by_ids([id_column_name], n)[id_column_name]]
+
+    def get_most_similar_embeddings_by_ids(self, ids: List[str], n: int = 10) -> Dict[str, List[Tuple[str, float]]]:
+        self.logger.info(f"Getting the {n} most similar embeddings of {len(ids)} ids")
+        query_ids = list(dict.fromkeys(ids))
+
+        embeddings_by_id = {}
+        for i in range(0, len(query_ids), self.max_batch_size):
+            batch = self.collection.get(ids=query_ids[i : i + self.max_batch_size], include=["embeddings"])
+            embeddings_by_id.update(zip(batch["ids"], batch["embeddings"]))
+
+        missing_ids = [id for id in query_ids if id not in embeddings_by_id]
+        if missing_ids:
+            self.logger.warning(f"⚠️ {len(missing_ids)} ids have no embeddings, for instance {missing_ids[:5]}")
+
+        found_ids = [id for id in query_ids if id in embeddings_by_id]
+        neighbors = {id: [] for id in missing_ids}
+        if not found_ids:
+            return neighbors
+
+        neighbors_ids, neighbors_distances = self._query_batch(np.asarray([embeddings_by_id[id] for id in found_ids], dtype=np.float32), n + 1)
+        for id, query_neighbors_ids, query_neighbors_distances in zip(found_ids, neighbors_ids, neighbors_distances):
+            neighbors[id] = [(neighbor_id, float(distance)) for neighbor_id, distance in zip(query_neighbors_ids, query_neighbors_distances) if neighbor_id != id][:n]
+
+        return neighbors
+
+    def query_similar_embeddings(self, query_embeddings: np.ndarray, n: int = 10) -> List[str]:
+        return self._query_batch(np.asarray(query_embeddings, dtype=np.float32)[None, :], n)[0][0]
+
+    def _query_batch(self, query_embeddings: np.ndarray, n: int) -> Tuple[List[List[str]], List[List[float]]]:
+        neighbors_ids = []
+        neighbors_distances = []
+
+        for i in range(0, len(query_embeddings), self.max_batch_size):
+            batch_query_embeddings = query_embeddings[i : i + self.max_batch_size]
+
+            if self.prefix_collection is None:
+                results = self.collection.query(query_embeddings=batch_query_embeddings, n_results=n, include=["distances"])
+                neighbors_ids.extend(results["ids"])
+                neighbors_distances.extend(results["distances"])
+                continue
+
+            candidates_ids = self.prefix_collection.query(query_embeddings=batch_query_embeddings[:, : self.coarse_prefix_size], n_results=n * self.rerank_factor, include=[])["ids"]
+            unique_candidates_ids = list(dict.fromkeys(id for query_candidates_ids in candidates_ids for id in query_candidates_ids))
+
+            candidates_embeddings = {}
+            for j in range(0, len(unique_candidates_ids), self.max_batch_size):
+                candidates = self.collection.get(ids=unique_candidates_ids[j : j + self.max_batch_size], include=["embeddings"])
+                candidates_embeddings.update(zip(candidates["ids"], candidates["embeddings"]))
+
+            missing_candidates_ids = [id for id in unique_candidates_ids if id not in candidates_embeddings]
+            if missing_candidates_ids:
+                self.logger.warning(f"⚠️ {len(missing_candidates_ids)} prefix candidates have no full embeddings, for instance {missing_candidates_ids[:5]}")
+
+            for query_embedding, query_candidates_ids in zip(batch_query_embeddings, candidates_ids):
+                query_candidates_ids = [id for id in query_candidates_ids if id in candidates_embeddings]
+                distances = ((np.asarray([candidates_embeddings[id] for id in query_candidates_ids], dtype=np.float32).reshape(len(query_candidates_ids), -1) - query_embedding) ** 2).sum(axis=1)
+                positions = np.argsort(distances)[:n]
+                neighbors_ids.append([query_candidates_ids[position] for position in positions])
+                neighbors_distances.append(distances[positions].tolist())
+
+        return neighbors_ids, neighbors_distances
 
     def update_embeddings(self, embeddings: BusinessEmbeddings) -> None:
         self.logger.info(f"Updating embeddings for {embeddings.id}")
@@ -47,40 +134,66 @@ class EmbeddingsChromaDbAdapter(EmbeddingsRepositoryInterface):
             embeddings=[embeddings.embeddings],
         )
 
+        if self.prefix_collection is not None:
+            self.prefix_collection.upsert(ids=[embeddings.id], embeddings=[embeddings.embeddings[: self.coarse_prefix_size]])
+
     def update_batch(self, embeddings_batch: BatchOfEmbeddings) -> None:
         self.logger.info(f"Updating batch of {len(embeddings_batch)} embeddings")
 
-
         for i in tqdm.tqdm(range(0, len(embeddings_batch), self.max_batch_size), desc="Updating embeddings ⌛"):
-            embeddings_to_upsert = embeddings_batch.embeddings[i : i + self.max_batch_size]
-
-            ids_to_upsert = [embedding.id for embedding in embeddings_to_upsert]
-            embedding_to_upsert = [embedding.embeddings for embedding in embeddings_to_upsert]
-            metadata_to_upsert = [embedding.get_metadata() for embedding in embeddings_to_upsert]
+            embeddings_to_upsert = embeddings_batch[i : i + self.max_batch_size]
+            ids_to_upsert = embeddings_to_upsert.ids.tolist()
 
             self.collection.upsert(
                 ids=ids_to_upsert,
-                embeddings=embedding_to_upsert,
-                metadatas=metadata_to_upsert,
+                embeddings=embeddings_to_upsert.vectors,
+                metadatas=embeddings_to_upsert.get_metadata_records() if embeddings_to_upsert.metadata else None,
             )
 
-    def get_embeddings_batch(self, ids: List[str]) -> List[BusinessEmbeddings]:
+            if self.prefix_collection is not None:
+                self.prefix_collection.upsert(
+                    ids=ids_to_upsert,
+                    embeddings=embeddings_to_upsert.vectors[:, : self.coarse_prefix_size],
+                )
+
+    def delete_embeddings(self, ids: List[str]) -> None:
+        self.logger.info(f"Deleting {len(ids)} embeddings")
+
+        for i in range(0, len(ids), self.max_batch_size):
+            self.collection.delete(ids=ids[i : i + self.max_batch_size])
+            if self.prefix_collection is not None:
+                self.prefix_collection.delete(ids=ids[i : i + self.max_batch_size])
+
+    def get_embeddings_batch(self, ids: List[str], max_workers: int | None = None) -> EmbeddingsLookup:
         self.logger.info(f"Getting batch of {len(ids)} embeddings")
-        return [
-            BusinessEmbeddings(
-                id=id,
-                embeddings=self.collection.get(ids=[id])["embeddings"][0],
-            )
-            for id in ids
-        ]
+        unique_ids = list(dict.fromkeys(ids))
+        ids_chunks = [unique_ids[i : i + self.max_batch_size] for i in range(0, len(unique_ids), self.max_batch_size)]
+
+        def get_chunk(ids_chunk: List[str]) -> BatchOfEmbeddings:
+            return self._to_batch_of_embeddings(self.collection.get(ids=ids_chunk, include=["embeddings", "metadatas"]))
+
+        if max_workers is not None and max_workers > 1 and len(ids_chunks) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                found_embeddings = BatchOfEmbeddings.concatenate(list(executor.map(get_chunk, ids_chunks)))
+        else:
+            found_embeddings = BatchOfEmbeddings.concatenate([get_chunk(ids_chunk) for ids_chunk in ids_chunks])
+
+        positions = {id: position for position, id in enumerate(found_embeddings.ids.tolist())}
+        lookup = EmbeddingsLookup(
+            embeddings=found_embeddings[np.asarray([positions[id] for id in ids if id in positions], dtype=np.int64)],
+            missing_ids=[id for id in unique_ids if id not in positions],
+        )
+        if lookup.missing_ids:
+            self.logger.warning(f"⚠️ {len(lookup.missing_ids)} ids have no embeddings, for instance {lookup.missing_ids[:5]}")
+
+        return lookup
 
     def get_all_embeddings(self) -> BatchOfEmbeddings:
         existing_embeddings = self.collection.count()
- 
+
         batch_retrieval_size = 5000
-        
-        embeddings_batch = BatchOfEmbeddings()
 
+        batches = []
         for i in tqdm.tqdm(range(0, existing_embeddings, batch_retrieval_size), desc="Getting all embeddings ⌛"):
             try:
                 batch = self.collection.get(
@@ -88,25 +201,19 @@ class EmbeddingsChromaDbAdapter(EmbeddingsRepositoryInterface):
                     limit=batch_retrieval_size,
                     offset=i
                 )
+                batches.append(self._to_batch_of_embeddings(batch))
             except Exception as e:
-                self.logger.error(f"Error getting batch of embeddings: {e}")
+                self.logger.error(f"Error getting batch of embeddings at offset {i}: {e}")
                 continue
 
-            try:
-                for position, id in enumerate(batch["ids"]):
-                    embedding = BusinessEmbeddings(
-                        id=id,
-                        embeddings=batch["embeddings"][position],
-                        metadata=batch["metadatas"][position],
-                    )
-
-                    embeddings_batch.add_embeddings(embedding)
-            
-            except Exception as e:
-                self.logger.error(f"Error getting embeddings: {e}")
-                self.logger.error(f"Batch: {batch['ids'][position]}")
-                self.logger.error(f"Batch: {batch['embeddings'][position]}")
-                self.logger.error(f"Batch: {batch['metadatas'][position]}")
-                continue
+        return BatchOfEmbeddings.concatenate(batches)
 
-        return embeddings_batch
+    @staticmethod
+    def _to_batch_of_embeddings(batch: dict) -> BatchOfEmbeddings:
+        metadatas = [metadata or {} for metadata in batch["metadatas"]]
+        columns = list(dict.fromkeys(column for metadata in metadatas for column in metadata))
+        return BatchOfEmbeddings(
+            ids=batch["ids"],
+            vectors=np.asarray(batch["embeddings"], dtype=np.float32).reshape(len(batch["ids"]), -1),
+            metadata={column: [metadata.get(column) for metadata in metadatas] for column in columns},
+        )
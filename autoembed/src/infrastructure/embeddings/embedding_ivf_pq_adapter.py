@@ -0,0 +1,168 @@
+import os
+import json
+from logging import Logger
+from typing import List, Tuple
+
+import numpy as np
+from kink import inject
+
+from autoembed.src.domain.embedding_quantizer import DEFAULT_TRAIN_SAMPLE_SIZE, ProductQuantizer, assign_to_centroids, kmeans, squared_distances
+from autoembed.src.infrastructure.embeddings.embedding_local_store import EmbeddingsLocalStore
+
+
+IVF_PQ_DB_PATH = "ivf_pq_db"
+INDEX_FILE_NAME = "index.json"
+CENTROIDS_FILE_NAME = "coarse_centroids.npy"
+CODEBOOKS_FILE_NAME = "codebooks.npy"
+CODES_FILE_NAME = "codes.u8"
+LISTS_FILE_NAME = "lists.i32"
+DECODE_BLOCK_SIZE = 65_536
+
+
+@inject()
+class EmbeddingsIvfPqAdapter(EmbeddingsLocalStore):
+    def __init__(
+        self,
+        vector_collection_name: str,
+        logger: Logger,
+        path: str = IVF_PQ_DB_PATH,
+        nlist: int = 1024,
+        nprobe: int = 16,
+        n_subvectors: int = 8,
+        n_bits: int = 8,
+        train_sample_size: int = DEFAULT_TRAIN_SAMPLE_SIZE,
+    ):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.n_subvectors = n_subvectors
+        self.n_bits = n_bits
+        super().__init__(vector_collection_name, logger, path, DECODE_BLOCK_SIZE, train_sample_size)
+
+    @property
+    def requires_training(self) -> bool:
+        return self.coarse_centroids is None
+
+    def _load_metadata(self) -> None:
+        self.coarse_centroids = None
+        self.product_quantizer = None
+        if not os.path.exists(f"{self.path}/{INDEX_FILE_NAME}"):
+            return
+
+        with open(f"{self.path}/{INDEX_FILE_NAME}", "r") as f:
+            index = json.load(f)
+        if (index["nlist"], index["n_subvectors"], index["n_bits"]) != (self.nlist, self.n_subvectors, self.n_bits):
+            self.logger.warning(
+                f"⚠️ Collection {self.path} was trained with nlist={index['nlist']}, n_subvectors={index['n_subvectors']} and n_bits={index['n_bits']}, "
+                f"ignoring the configured nlist={self.nlist}, n_subvectors={self.n_subvectors} and n_bits={self.n_bits}"
+            )
+        self.nlist, self.n_subvectors, self.n_bits = index["nlist"], index["n_subvectors"], index["n_bits"]
+        self.dimensions = index["dimensions"]
+        self.coarse_centroids = np.load(f"{self.path}/{CENTROIDS_FILE_NAME}")
+        self.product_quantizer = ProductQuantizer(n_subvectors=self.n_subvectors, n_bits=self.n_bits, codebooks=np.load(f"{self.path}/{CODEBOOKS_FILE_NAME}"))
+
+    def _save_metadata(self) -> None:
+        np.save(f"{self.path}/{CENTROIDS_FILE_NAME}", self.coarse_centroids)
+        np.save(f"{self.path}/{CODEBOOKS_FILE_NAME}", self.product_quantizer.codebooks)
+        with open(f"{self.path}/{INDEX_FILE_NAME}", "w") as f:
+            json.dump({"dimensions": self.dimensions, "nlist": self.nlist, "n_subvectors": self.n_subvectors, "n_bits": self.n_bits}, f)
+
+    def _payload_files(self) -> List[Tuple[str, int]]:
+        return [(CODES_FILE_NAME, self.n_subvectors), (LISTS_FILE_NAME, np.dtype(np.int32).itemsize)]
+
+    def _payload_arrays(self) -> List[np.ndarray]:
+        return [self.codes, self.lists]
+
+    def _open_payload(self) -> None:
+        if self.ids:
+            self.codes = np.memmap(f"{self.path}/{CODES_FILE_NAME}", dtype=np.uint8, mode="r", shape=(len(self.ids), self.n_subvectors))
+            self.lists = np.fromfile(f"{self.path}/{LISTS_FILE_NAME}", dtype=np.int32)
+        else:
+            self.codes = np.empty((0, self.n_subvectors), dtype=np.uint8)
+            self.lists = np.empty(0, dtype=np.int32)
+
+        # Inverted lists are rebuilt lazily on the next search, so a stream of upserts only pays for one sort
+        self.inverted_lists = None
+
+    def _on_tombstones_changed(self) -> None:
+        self.inverted_lists = None
+
+    def _get_inverted_lists(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self.inverted_lists is None:
+            live_positions = np.flatnonzero(~self.tombstones)
+            positions = live_positions[np.argsort(self.lists[live_positions], kind="stable")]
+            offsets = np.searchsorted(self.lists[positions], np.arange(self.nlist + 1))
+            self.inverted_lists = (positions, offsets, np.ascontiguousarray(self.codes[positions]))
+        return self.inverted_lists
+
+    def _fit(self, sample: np.ndarray) -> None:
+        if len(sample) < self.nlist:
+            raise ValueError(f"Collection {self.path} needs at least nlist={self.nlist} embeddings to train its inverted lists, got {len(sample)}, lower nlist or train on more embeddings")
+
+        self.logger.info(f"🔍 Training {self.nlist} inverted lists and a pq{self.n_subvectors}x{self.n_bits} residual quantizer on {len(sample)} embeddings")
+        self.coarse_centroids = kmeans(sample, self.nlist)
+        residuals = sample - self.coarse_centroids[assign_to_centroids(sample, self.coarse_centroids)]
+        self.product_quantizer = ProductQuantizer(n_subvectors=self.n_subvectors, n_bits=self.n_bits).fit(residuals)
+
+    def _encode(self, vectors: np.ndarray) -> List[np.ndarray]:
+        lists = assign_to_centroids(vectors, self.coarse_centroids).astype(np.int32)
+        return [self.product_quantizer.encode(vectors - self.coarse_centroids[lists]), lists]
+
+    def _search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        neighbors_positions = np.full((len(queries), k), -1, dtype=np.int64)
+        neighbors_distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        if not self.positions or k == 0:
+            return neighbors_positions, neighbors_distances
+
+        positions, offsets, codes = self._get_inverted_lists()
+        queries = np.asarray(queries, dtype=np.float32)
+        nprobe = min(self.nprobe, self.nlist)
+        probes = np.argpartition(squared_distances(queries, self.coarse_centroids), nprobe - 1, axis=1)[:, :nprobe]
+
+        # Queries are grouped by probed list, so each list's codes are scanned once with one distance table per query
+        candidates_positions = [[] for _ in range(len(queries))]
+        candidates_distances = [[] for _ in range(len(queries))]
+        order = np.argsort(probes.ravel(), kind="stable")
+        probing_queries, probed_lists = order // nprobe, probes.ravel()[order]
+        lists_starts = np.flatnonzero(np.r_[True, probed_lists[1:] != probed_lists[:-1]])
+
+        codebooks = self.product_quantizer.codebooks
+        codebooks_squared_norms = (codebooks**2).sum(axis=-1)
+        for start, end in zip(lists_starts, np.r_[lists_starts[1:], len(probed_lists)]):
+            list_index = probed_lists[start]
+            list_start, list_end = offsets[list_index], offsets[list_index + 1]
+            if list_start == list_end:
+                continue
+
+            list_queries = probing_queries[start:end]
+            residuals = (queries[list_queries] - self.coarse_centroids[list_index]).reshape(len(list_queries), self.n_subvectors, -1)
+            distance_tables = (residuals**2).sum(axis=-1, keepdims=True) - 2.0 * np.einsum("qmd,mkd->qmk", residuals, codebooks) + codebooks_squared_norms
+            list_codes = codes[list_start:list_end]
+            list_distances = distance_tables[:, 0, list_codes[:, 0]]
+            for subvector in range(1, self.n_subvectors):
+                list_distances += distance_tables[:, subvector, list_codes[:, subvector]]
+
+            list_k = min(k, list_end - list_start)
+            top_k = np.argpartition(list_distances, list_k - 1, axis=1)[:, :list_k]
+            top_k_distances = np.take_along_axis(list_distances, top_k, axis=1)
+            for query, query_top_k, query_top_k_distances in zip(list_queries, top_k + list_start, top_k_distances):
+                candidates_positions[query].append(positions[query_top_k])
+                candidates_distances[query].append(query_top_k_distances)
+
+        for query in range(len(queries)):
+            if not candidates_positions[query]:
+                continue
+            query_positions = np.concatenate(candidates_positions[query])
+            query_distances = np.concatenate(candidates_distances[query])
+            order = np.argsort(query_distances)[:k]
+            neighbors_positions[query, : len(order)] = query_positions[order]
+            neighbors_distances[query, : len(order)] = query_distances[order]
+
+        return neighbors_positions, neighbors_distances
+
+    def _decode(self, positions: np.ndarray) -> np.ndarray:
+        return np.concatenate(
+            [
+                self.coarse_centroids[self.lists[positions[start : start + DECODE_BLOCK_SIZE]]] + self.product_quantizer.decode(np.asarray(self.codes[positions[start : start + DECODE_BLOCK_SIZE]]))
+                for start in range(0, len(positions), DECODE_BLOCK_SIZE)
+            ]
+        ).astype(np.float32)
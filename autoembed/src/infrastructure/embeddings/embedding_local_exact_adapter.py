@@ -0,0 +1,150 @@
+import os
+import json
+from logging import Logger
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+import numpy as np
+from kink import inject
+
+from autoembed.src.domain.embedding_quantizer import DEFAULT_TRAIN_SAMPLE_SIZE, EmbeddingQuantizer, Float32Quantizer, quantizer_from_dict
+from autoembed.src.infrastructure.embeddings.embedding_local_store import EmbeddingsLocalStore
+
+
+EXACT_DB_PATH = "exact_db"
+COLLECTION_FILE_NAME = "collection.json"
+CODES_FILE_NAME = "codes.bin"
+LEGACY_VECTORS_FILE_NAME = "vectors.f32"
+DISTANCES = ("l2", "cosine")
+QUERY_BLOCK_SIZE = 256
+
+
+@inject()
+class EmbeddingsLocalExactSearchAdapter(EmbeddingsLocalStore):
+    def __init__(
+        self,
+        vector_collection_name: str,
+        logger: Logger,
+        path: str = EXACT_DB_PATH,
+        distance: str = "l2",
+        block_size: int = 16_384,
+        max_workers: int | None = None,
+        quantizer: EmbeddingQuantizer | None = None,
+        train_sample_size: int = DEFAULT_TRAIN_SAMPLE_SIZE,
+    ):
+        if distance not in DISTANCES:
+            raise ValueError(f"Unknown distance {distance}, expected one of {DISTANCES}")
+
+        self.distance = distance
+        self.max_workers = max_workers or os.cpu_count()
+        self.quantizer = quantizer or Float32Quantizer()
+        super().__init__(vector_collection_name, logger, path, block_size, train_sample_size)
+
+    @property
+    def requires_training(self) -> bool:
+        return not self.quantizer.is_fitted
+
+    def _load_metadata(self) -> None:
+        self.squared_norms = np.empty(0, dtype=np.float32)
+        if not os.path.exists(f"{self.path}/{COLLECTION_FILE_NAME}"):
+            return
+
+        with open(f"{self.path}/{COLLECTION_FILE_NAME}", "r") as f:
+            collection = json.load(f)
+        self.dimensions = collection["dimensions"]
+
+        # Collections written before quantized storage hold raw float32 vectors, which are float32 codes
+        if os.path.exists(f"{self.path}/{LEGACY_VECTORS_FILE_NAME}") and not os.path.exists(f"{self.path}/{CODES_FILE_NAME}"):
+            os.replace(f"{self.path}/{LEGACY_VECTORS_FILE_NAME}", f"{self.path}/{CODES_FILE_NAME}")
+        quantizer = quantizer_from_dict(collection.get("quantizer", Float32Quantizer().to_dict()))
+        if quantizer.name != self.quantizer.name:
+            self.logger.warning(f"⚠️ Collection {self.path} stores {quantizer.name} codes, ignoring the configured {self.quantizer.name} quantization")
+        self.quantizer = quantizer
+
+    def _save_metadata(self) -> None:
+        with open(f"{self.path}/{COLLECTION_FILE_NAME}", "w") as f:
+            json.dump({"dimensions": self.dimensions, "quantizer": self.quantizer.to_dict()}, f)
+
+    def _payload_files(self) -> List[Tuple[str, int]]:
+        return [(CODES_FILE_NAME, self.quantizer.bytes_per_vector(self.dimensions or 0))]
+
+    def _payload_arrays(self) -> List[np.ndarray]:
+        return [self.codes]
+
+    def _open_payload(self) -> None:
+        code_width = self.quantizer.code_width(self.dimensions or 0)
+        if self.ids:
+            self.codes = np.memmap(f"{self.path}/{CODES_FILE_NAME}", dtype=self.quantizer.code_dtype, mode="r", shape=(len(self.ids), code_width))
+        else:
+            self.codes = np.empty((0, code_width), dtype=self.quantizer.code_dtype)
+
+        # Row norms are computed once and extended on append so queries only pay for decoding and the matrix product
+        self.squared_norms = np.concatenate(
+            [self.squared_norms]
+            + [(self._decode_block(start, start + self.block_size) ** 2).sum(axis=1) for start in range(len(self.squared_norms), len(self.ids), self.block_size)]
+        )
+
+    def _decode_block(self, start: int, end: int) -> np.ndarray:
+        return self.quantizer.decode(np.asarray(self.codes[start:end]))
+
+    def _fit(self, sample: np.ndarray) -> None:
+        self.logger.info(f"🔍 Fitting the {self.quantizer.name} quantizer on {len(sample)} embeddings, {self.quantizer.bytes_per_vector(sample.shape[1])} bytes per vector")
+        self.quantizer.fit(sample)
+
+    def _encode(self, vectors: np.ndarray) -> List[np.ndarray]:
+        return [np.asarray(self.quantizer.encode(vectors), dtype=self.quantizer.code_dtype)]
+
+    def _decode(self, positions: np.ndarray) -> np.ndarray:
+        return self.quantizer.decode(np.asarray(self.codes[positions]))
+
+    def _search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(self.positions))
+        if k == 0:
+            return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+
+        queries = np.asarray(queries, dtype=np.float32)
+        if self.distance == "cosine":
+            queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), np.finfo(np.float32).tiny)
+
+        def search_block(start: int) -> Tuple[np.ndarray, np.ndarray]:
+            block = self._decode_block(start, start + self.block_size)
+            block_squared_norms = self.squared_norms[start : start + len(block)]
+            block_tombstones = self.tombstones[start : start + len(block)]
+            if self.distance == "cosine":
+                block_norms = np.maximum(np.sqrt(block_squared_norms), np.finfo(np.float32).tiny)
+
+            positions = []
+            distances = []
+            for query_start in range(0, len(queries), QUERY_BLOCK_SIZE):
+                query_block = queries[query_start : query_start + QUERY_BLOCK_SIZE]
+                if self.distance == "cosine":
+                    block_distances = 1.0 - (query_block @ block.T) / block_norms
+                else:
+                    block_distances = (query_block**2).sum(axis=1, keepdims=True) - 2.0 * query_block @ block.T + block_squared_norms
+                if block_tombstones.any():
+                    block_distances[:, block_tombstones] = np.inf
+
+                block_k = min(k, len(block))
+                block_positions = np.argpartition(block_distances, block_k - 1, axis=1)[:, :block_k]
+                positions.append(block_positions + start)
+                distances.append(np.take_along_axis(block_distances, block_positions, axis=1))
+
+            return np.concatenate(positions), np.concatenate(distances)
+
+        blocks_starts = range(0, len(self.ids), self.block_size)
+        if self.max_workers > 1 and len(blocks_starts) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results = list(executor.map(search_block, blocks_starts))
+        else:
+            results = [search_block(start) for start in blocks_starts]
+
+        positions = np.concatenate([block_positions for block_positions, _ in results], axis=1)
+        distances = np.concatenate([block_distances for _, block_distances in results], axis=1)
+
+        if positions.shape[1] > k:
+            top_k = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            positions = np.take_along_axis(positions, top_k, axis=1)
+            distances = np.take_along_axis(distances, top_k, axis=1)
+
+        order = np.argsort(distances, axis=1)
+        return np.take_along_axis(positions, order, axis=1), np.take_along_axis(distances, order, axis=1)
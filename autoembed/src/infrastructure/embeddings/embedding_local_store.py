@@ -0,0 +1,264 @@
+import os
+import json
+from abc import abstractmethod
+from logging import Logger
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from autoembed.src.domain.embedding_quantizer import DEFAULT_TRAIN_SAMPLE_SIZE
+from autoembed.src.domain.entites.embeddings import BusinessEmbeddings, BatchOfEmbeddings, EmbeddingsLookup
+from autoembed.src.domain.interfaces.trainable_embeddings_repository_interface import (
+    TrainableEmbeddingsRepositoryInterface
+)
+
+
+ROWS_FILE_NAME = "rows.jsonl"
+TOMBSTONES_FILE_NAME = "tombstones.npy"
+COMPACTION_TOMBSTONES_FRACTION = 0.3
+
+
+class EmbeddingsLocalStore(TrainableEmbeddingsRepositoryInterface):
+    # Rows are appended to rows.jsonl and to the fixed-width payload files of the store, replaced and deleted rows are tombstoned until a compaction rewrites them
+    def __init__(self, vector_collection_name: str, logger: Logger, path: str, block_size: int, train_sample_size: int = DEFAULT_TRAIN_SAMPLE_SIZE):
+        self.logger = logger
+        self.path = f"{path}/{vector_collection_name}"
+        self.block_size = block_size
+        self._train_sample_size = train_sample_size
+
+        os.makedirs(self.path, exist_ok=True)
+        self._load()
+
+    @property
+    def train_sample_size(self) -> int:
+        return self._train_sample_size
+
+    @abstractmethod
+    def _load_metadata(self) -> None:
+        pass
+
+    @abstractmethod
+    def _save_metadata(self) -> None:
+        pass
+
+    @abstractmethod
+    def _payload_files(self) -> List[Tuple[str, int]]:
+        pass
+
+    @abstractmethod
+    def _payload_arrays(self) -> List[np.ndarray]:
+        pass
+
+    @abstractmethod
+    def _open_payload(self) -> None:
+        pass
+
+    @abstractmethod
+    def _fit(self, sample: np.ndarray) -> None:
+        pass
+
+    @abstractmethod
+    def _encode(self, vectors: np.ndarray) -> List[np.ndarray]:
+        pass
+
+    @abstractmethod
+    def _decode(self, positions: np.ndarray) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def _search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        pass
+
+    def _on_tombstones_changed(self) -> None:
+        pass
+
+    def _load(self) -> None:
+        self.dimensions = None
+        self._load_metadata()
+
+        self.ids: List[str] = []
+        self.metadatas: List[Dict] = []
+        if os.path.exists(f"{self.path}/{ROWS_FILE_NAME}"):
+            with open(f"{self.path}/{ROWS_FILE_NAME}", "r") as f:
+                for line in f:
+                    row = json.loads(line)
+                    self.ids.append(row["id"])
+                    self.metadatas.append(row["metadata"])
+
+        payload_rows = [
+            os.path.getsize(f"{self.path}/{file_name}") // row_size if row_size and os.path.exists(f"{self.path}/{file_name}") else 0
+            for file_name, row_size in self._payload_files()
+        ]
+        if any(rows != len(self.ids) for rows in payload_rows):
+            self.logger.warning(f"⚠️ Collection {self.path} has {' and '.join(map(str, payload_rows))} payload rows for {len(self.ids)} rows, ignoring the rows of an interrupted write")
+            self._truncate(min(payload_rows + [len(self.ids)]))
+
+        self.tombstones = np.zeros(len(self.ids), dtype=bool)
+        if os.path.exists(f"{self.path}/{TOMBSTONES_FILE_NAME}"):
+            tombstones = np.load(f"{self.path}/{TOMBSTONES_FILE_NAME}")[: len(self.ids)]
+            self.tombstones[: len(tombstones)] = tombstones
+
+        self.positions = {id: position for position, id in enumerate(self.ids) if not self.tombstones[position]}
+        self._open_payload()
+
+    def _truncate(self, rows: int) -> None:
+        self.ids = self.ids[:rows]
+        self.metadatas = self.metadatas[:rows]
+
+        for file_name, row_size in self._payload_files():
+            if os.path.exists(f"{self.path}/{file_name}"):
+                with open(f"{self.path}/{file_name}", "r+b") as f:
+                    f.truncate(rows * row_size)
+        with open(f"{self.path}/{ROWS_FILE_NAME}", "w") as f:
+            f.writelines(json.dumps({"id": id, "metadata": metadata}) + "\n" for id, metadata in zip(self.ids, self.metadatas))
+
+    def train(self, embeddings: np.ndarray) -> None:
+        if self.ids:
+            raise ValueError(f"Collection {self.path} already stores {len(self.ids)} rows encoded with its trained codes")
+
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        sample = embeddings[np.random.default_rng(42).choice(len(embeddings), size=self.train_sample_size, replace=False)] if len(embeddings) > self.train_sample_size else embeddings
+
+        self._fit(sample)
+        self.dimensions = sample.shape[1]
+        self._save_metadata()
+        self._open_payload()
+
+    def get_embeddings(self, id_column_name: str) -> BusinessEmbeddings:
+        self.logger.info(f"Getting embeddings for {id_column_name}")
+
+        lookup = self.get_embeddings_batch([id_column_name])
+        if lookup.missing_ids:
+            raise KeyError(f"No embeddings found for id {id_column_name}")
+        return lookup.embeddings[0]
+
+    def get_most_similar_embeddings_by_id(self, id_column_name: str, n: int = 6) -> List[str]:
+        self.logger.info(f"Getting most similar embeddings for {id_column_name}")
+        return [id for id, _ in self.get_most_similar_embeddings_by_ids([id_column_name], n)[id_column_name]]
+
+    def get_most_similar_embeddings_by_ids(self, ids: List[str], n: int = 10) -> Dict[str, List[Tuple[str, float]]]:
+        self.logger.info(f"Getting the {n} most similar embeddings of {len(ids)} ids")
+        query_ids = list(dict.fromkeys(ids))
+
+        missing_ids = [id for id in query_ids if id not in self.positions]
+        if missing_ids:
+            self.logger.warning(f"⚠️ {len(missing_ids)} ids have no embeddings, for instance {missing_ids[:5]}")
+
+        found_ids = [id for id in query_ids if id in self.positions]
+        neighbors = {id: [] for id in missing_ids}
+        if not found_ids:
+            return neighbors
+
+        query_positions = np.asarray([self.positions[id] for id in found_ids], dtype=np.int64)
+        neighbors_positions, neighbors_distances = self._search(self._decode(query_positions), n + 1)
+        for id, query_position, query_neighbors_positions, query_neighbors_distances in zip(found_ids, query_positions, neighbors_positions, neighbors_distances):
+            neighbors[id] = [(self.ids[position], float(distance)) for position, distance in zip(query_neighbors_positions, query_neighbors_distances) if position >= 0 and position != query_position][:n]
+
+        return neighbors
+
+    def query_similar_embeddings(self, query_embeddings: np.ndarray, n: int = 10) -> List[str]:
+        neighbors_positions, _ = self._search(np.asarray(query_embeddings, dtype=np.float32)[None, :], n)
+        return [self.ids[position] for position in neighbors_positions[0] if position >= 0]
+
+    def update_embeddings(self, embeddings: BusinessEmbeddings) -> None:
+        self.logger.info(f"Updating embeddings for {embeddings.id}")
+        self.update_batch(BatchOfEmbeddings.from_business_embeddings([embeddings]))
+
+    def update_batch(self, embeddings_batch: BatchOfEmbeddings) -> None:
+        self.logger.info(f"Updating batch of {len(embeddings_batch)} embeddings")
+        if not len(embeddings_batch):
+            return
+
+        if self.requires_training:
+            raise ValueError(f"Collection {self.path} is not trained, train it on a sample of the embeddings before the first update")
+        if self.dimensions is None:
+            self.dimensions = embeddings_batch.vectors.shape[1]
+            self._save_metadata()
+        elif embeddings_batch.vectors.shape[1] != self.dimensions:
+            raise ValueError(f"Collection {self.path} stores {self.dimensions} dimensions, got embeddings of {embeddings_batch.vectors.shape[1]} dimensions")
+
+        first_position = len(self.ids)
+        ids = [str(id) for id in embeddings_batch.ids.tolist()]
+        metadatas = embeddings_batch.get_metadata_records()
+
+        for (file_name, _), payload in zip(self._payload_files(), self._encode(embeddings_batch.vectors)):
+            with open(f"{self.path}/{file_name}", "ab") as f:
+                f.write(np.ascontiguousarray(payload).tobytes())
+        with open(f"{self.path}/{ROWS_FILE_NAME}", "a") as f:
+            f.writelines(json.dumps({"id": id, "metadata": metadata}) + "\n" for id, metadata in zip(ids, metadatas))
+
+        self.ids.extend(ids)
+        self.metadatas.extend(metadatas)
+        self.tombstones = np.concatenate([self.tombstones, np.zeros(len(ids), dtype=bool)])
+
+        replaced_positions = []
+        for position, id in enumerate(ids, start=first_position):
+            if id in self.positions:
+                replaced_positions.append(self.positions[id])
+            self.positions[id] = position
+
+        if replaced_positions:
+            self.tombstones[replaced_positions] = True
+        self._save_tombstones()
+        self._open_payload()
+
+        if self.tombstones.mean() > COMPACTION_TOMBSTONES_FRACTION:
+            self.compact()
+
+    def delete_embeddings(self, ids: List[str]) -> None:
+        deleted_positions = [self.positions.pop(id) for id in dict.fromkeys(ids) if id in self.positions]
+        self.logger.info(f"Deleting {len(deleted_positions)} embeddings")
+        if not deleted_positions:
+            return
+
+        self.tombstones[deleted_positions] = True
+        self._save_tombstones()
+        self._on_tombstones_changed()
+
+        if self.tombstones.mean() > COMPACTION_TOMBSTONES_FRACTION:
+            self.compact()
+
+    def compact(self) -> None:
+        live_positions = np.flatnonzero(~self.tombstones)
+        self.logger.info(f"Compacting {self.path} from {len(self.ids)} to {len(live_positions)} rows")
+
+        for (file_name, _), payload in zip(self._payload_files(), self._payload_arrays()):
+            with open(f"{self.path}/{file_name}.tmp", "wb") as f:
+                for start in range(0, len(live_positions), self.block_size):
+                    f.write(np.ascontiguousarray(payload[live_positions[start : start + self.block_size]]).tobytes())
+        with open(f"{self.path}/{ROWS_FILE_NAME}.tmp", "w") as f:
+            f.writelines(json.dumps({"id": self.ids[position], "metadata": self.metadatas[position]}) + "\n" for position in live_positions)
+
+        for file_name in [file_name for file_name, _ in self._payload_files()] + [ROWS_FILE_NAME]:
+            os.replace(f"{self.path}/{file_name}.tmp", f"{self.path}/{file_name}")
+        if os.path.exists(f"{self.path}/{TOMBSTONES_FILE_NAME}"):
+            os.remove(f"{self.path}/{TOMBSTONES_FILE_NAME}")
+
+        self._load()
+
+    def _save_tombstones(self) -> None:
+        np.save(f"{self.path}/{TOMBSTONES_FILE_NAME}", self.tombstones)
+
+    def get_embeddings_batch(self, ids: List[str], max_workers: int | None = None) -> EmbeddingsLookup:
+        self.logger.info(f"Getting batch of {len(ids)} embeddings")
+
+        lookup = EmbeddingsLookup(
+            embeddings=self._get_batch_at(np.asarray([self.positions[id] for id in ids if id in self.positions], dtype=np.int64)),
+            missing_ids=[id for id in dict.fromkeys(ids) if id not in self.positions],
+        )
+        if lookup.missing_ids:
+            self.logger.warning(f"⚠️ {len(lookup.missing_ids)} ids have no embeddings, for instance {lookup.missing_ids[:5]}")
+
+        return lookup
+
+    def get_all_embeddings(self) -> BatchOfEmbeddings:
+        return self._get_batch_at(np.flatnonzero(~self.tombstones))
+
+    def _get_batch_at(self, positions: np.ndarray) -> BatchOfEmbeddings:
+        metadatas = [self.metadatas[position] for position in positions]
+        columns = list(dict.fromkeys(column for metadata in metadatas for column in metadata))
+        return BatchOfEmbeddings(
+            ids=[self.ids[position] for position in positions],
+            vectors=self._decode(positions) if len(positions) else np.empty((0, self.dimensions or 0), dtype=np.float32),
+            metadata={column: [metadata.get(column) for metadata in metadatas] for column in columns},
+        )
@@ -0,0 +1,56 @@
+import multiprocessing
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from typing import ContextManager, Dict, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from autoembed.src.domain.dataset_preprocessor import DatasetPreprocessor
+
+
+DEFAULT_ENCODING_WORKERS = 4
+
+_worker_dataset_preprocessor: DatasetPreprocessor | None = None
+
+
+def _set_worker_dataset_preprocessor(dataset_preprocessor: DatasetPreprocessor) -> None:
+    global _worker_dataset_preprocessor
+    _worker_dataset_preprocessor = dataset_preprocessor
+
+
+def _encode_chunk(chunk: pd.DataFrame) -> Dict[str, np.ndarray]:
+    return _worker_dataset_preprocessor.preprocess(chunk)
+
+
+def create_encoding_executor(dataset_preprocessor: DatasetPreprocessor, max_workers: int) -> ContextManager[ProcessPoolExecutor | None]:
+    if max_workers <= 1:
+        return nullcontext()
+
+    # The pandas encoding holds the GIL, so chunks are encoded in spawned processes that receive the preprocessor once and do not import TensorFlow
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_set_worker_dataset_preprocessor,
+        initargs=(dataset_preprocessor,),
+    )
+
+
+def encode_chunks(executor: ProcessPoolExecutor | None, dataset_preprocessor: DatasetPreprocessor, chunks: Iterable[pd.DataFrame], max_chunks_in_flight: int) -> Iterator[Dict[str, np.ndarray]]:
+    if executor is None:
+        for chunk in chunks:
+            yield dataset_preprocessor.preprocess(chunk)
+        return
+
+    remaining_chunks = iter(chunks)
+    pending_encodings = deque(executor.submit(_encode_chunk, chunk) for _, chunk in zip(range(max_chunks_in_flight), remaining_chunks))
+
+    while pending_encodings:
+        features = pending_encodings.popleft().result()
+
+        next_chunk = next(remaining_chunks, None)
+        if next_chunk is not None:
+            pending_encodings.append(executor.submit(_encode_chunk, next_chunk))
+
+        yield features
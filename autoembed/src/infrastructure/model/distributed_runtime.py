@@ -0,0 +1,93 @@
+import os
+import sys
+import json
+import time
+import socket
+import subprocess
+import dataclasses
+from typing import List
+
+
+TF_CONFIG_ENVIRONMENT_VARIABLE = "TF_CONFIG"
+WORKER_POLL_INTERVAL_SECONDS = 1.0
+
+_distribution_strategy = None
+
+
+@dataclasses.dataclass
+class WorkerContext:
+    num_workers: int = 1
+    worker_index: int = 0
+
+    @property
+    def is_distributed(self) -> bool:
+        return self.num_workers > 1
+
+    @property
+    def is_chief(self) -> bool:
+        return self.worker_index == 0
+
+
+def get_worker_context() -> WorkerContext:
+    tf_config = os.environ.get(TF_CONFIG_ENVIRONMENT_VARIABLE)
+    if not tf_config:
+        return WorkerContext()
+
+    tf_config = json.loads(tf_config)
+    return WorkerContext(num_workers=len(tf_config["cluster"]["worker"]), worker_index=tf_config["task"]["index"])
+
+
+def build_tf_config(worker_hosts: List[str], worker_index: int) -> str:
+    if not 0 <= worker_index < len(worker_hosts):
+        raise ValueError(f"Worker index {worker_index} is out of the {len(worker_hosts)} worker hosts")
+    return json.dumps({"cluster": {"worker": worker_hosts}, "task": {"type": "worker", "index": worker_index}})
+
+
+def get_free_local_ports(count: int) -> List[int]:
+    sockets = [socket.socket(socket.AF_INET, socket.SOCK_STREAM) for _ in range(count)]
+    try:
+        for s in sockets:
+            s.bind(("localhost", 0))
+        return [s.getsockname()[1] for s in sockets]
+    finally:
+        for s in sockets:
+            s.close()
+
+
+def launch_local_workers(num_workers: int, argv: List[str] | None = None) -> None:
+    worker_hosts = [f"localhost:{port}" for port in get_free_local_ports(num_workers)]
+    processes = [
+        subprocess.Popen([sys.executable, *(argv or sys.argv)], env={**os.environ, TF_CONFIG_ENVIRONMENT_VARIABLE: build_tf_config(worker_hosts, worker_index)})
+        for worker_index in range(num_workers)
+    ]
+
+    try:
+        while any(process.poll() is None for process in processes):
+            failed_workers = [worker_index for worker_index, process in enumerate(processes) if process.returncode not in (None, 0)]
+            if failed_workers:
+                raise RuntimeError(f"Distributed training workers {failed_workers} failed, stopping the other workers")
+            time.sleep(WORKER_POLL_INTERVAL_SECONDS)
+
+        failed_workers = [worker_index for worker_index, process in enumerate(processes) if process.returncode != 0]
+        if failed_workers:
+            raise RuntimeError(f"Distributed training workers {failed_workers} failed")
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+                process.wait()
+
+
+def configure_distribution_strategy():
+    global _distribution_strategy
+
+    if _distribution_strategy is None and get_worker_context().is_distributed:
+        import tensorflow as tf
+
+        _distribution_strategy = tf.distribute.MultiWorkerMirroredStrategy()
+
+    return _distribution_strategy
+
+
+def get_distribution_strategy():
+    return _distribution_strategy
@@ -1,9 +1,13 @@
-from typing import Dict, List, Tuple
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Tuple
 
 import numpy as np
 import pandas as pd
+import tensorflow as tf
 from tensorflow.keras.models import Model, load_model
-from tensorflow.keras.callbacks import EarlyStopping
+from tensorflow.keras.callbacks import Callback, CallbackList, EarlyStopping, History
 from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.layers import (
     Input,
@@ -19,11 +23,23 @@ from tensorflow.keras.layers import (
 from autoembed.src.domain.dataset_preprocessor import (
     NUMERICAL_INPUTS_FEATURES_KEY,
     NUMERICAL_OUTPUTS_KEY,
+    DatasetPreprocessor,
 )
 from autoembed.src.domain.interfaces.embedding_model_interface import (
     EmbeddingModelInterface,
 )
 from autoembed.src.domain.entites.dataset_analysis import DatasetAnalysis
+from autoembed.src.infrastructure.model.chunk_encoding import DEFAULT_ENCODING_WORKERS, create_encoding_executor, encode_chunks
+from autoembed.src.infrastructure.model.distributed_runtime import WorkerContext, get_distribution_strategy, get_worker_context
+from autoembed.src.infrastructure.model.embedding_model_numpy_adapter import NumpyEncoder
+from autoembed.src.infrastructure.model.keras_components import (
+    NESTED_PREFIX_OUTPUTS_PREFIX,
+    SAMPLED_SOFTMAX_LABELS_SUFFIX,
+    PrefixMask,
+    ReconstructionLossCallback,
+    SampledSoftmaxReconstruction,
+    TrainingThroughputCallback,
+)
 
 
 class KerasAutoencoder(EmbeddingModelInterface):
@@ -33,11 +49,13 @@ class KerasAutoencoder(EmbeddingModelInterface):
         hidden_layer_dim: List[int] | None = None,
         autoencoder: Model | None = None,
         encoder: Model | None = None,
+        jit_compile: bool | str = "auto",
     ):
         self.bottleneck_layer_dim = bottleneck_layer_dim
         self.hidden_layer_dim = hidden_layer_dim
         self.autoencoder: Model | None = autoencoder
         self.encoder: Model | None = encoder
+        self.jit_compile = jit_compile
 
     @classmethod
     def from_model(cls, autoencoder: Model, encoder: Model) -> "KerasAutoencoder":
@@ -49,9 +67,11 @@ class KerasAutoencoder(EmbeddingModelInterface):
         dataset_analysis: DatasetAnalysis,
         bottleneck_layer_dim: int,
         hidden_layer_dim: List[int],
+        jit_compile: bool | str = "auto",
+        nested_prefix_sizes: List[int] | None = None,
     ) -> "KerasAutoencoder":
-        autoencoder, encoder = cls._build_model(dataset_analysis, bottleneck_layer_dim, hidden_layer_dim)
-        return cls(autoencoder=autoencoder, encoder=encoder)
+        autoencoder, encoder = cls._build_model(dataset_analysis, bottleneck_layer_dim, hidden_layer_dim, jit_compile, nested_prefix_sizes)
+        return cls(autoencoder=autoencoder, encoder=encoder, jit_compile=jit_compile)
 
     def fit(
         self,
@@ -59,11 +79,314 @@ class KerasAutoencoder(EmbeddingModelInterface):
         y: Dict[str, np.ndarray],
         epochs: int,
         batch_size: int,
-    ) -> None:
-        self.autoencoder.fit(x, y, epochs=epochs, batch_size=batch_size, validation_split=0.2, shuffle=True, callbacks=[EarlyStopping(monitor='val_loss', patience=2, restore_best_weights=True)])
+    ) -> Dict[str, List[float]]:
+        x, y = self._add_sampled_softmax_labels(x, y, self._get_sampled_softmax_features())
+        y = self._add_nested_prefix_targets(y, self._get_nested_prefix_sizes())
+
+        worker_context = get_worker_context()
+        if worker_context.is_distributed:
+            training_dataset, validation_dataset = self._build_sharded_datasets(x, y, batch_size, worker_context)
+            return self._fit_distributed(training_dataset, validation_dataset, epochs, batch_size)
+
+        history = self.autoencoder.fit(
+            x,
+            y,
+            epochs=epochs,
+            batch_size=batch_size,
+            validation_split=0.2,
+            shuffle=True,
+            callbacks=self._get_callbacks(batch_size),
+        )
+        return history.history
+
+    def fit_from_chunks(
+        self,
+        chunks: Callable[[], Iterable[pd.DataFrame]],
+        dataset_preprocessor: DatasetPreprocessor,
+        epochs: int,
+        batch_size: int,
+        validation_split: float = 0.2,
+        shuffle_buffer_size: int = 100_000,
+        encoding_workers: int = DEFAULT_ENCODING_WORKERS,
+    ) -> Dict[str, List[float]]:
+        holdout_every = max(round(1 / validation_split), 2)
+        sampled_softmax_features = self._get_sampled_softmax_features()
+        nested_prefix_sizes = self._get_nested_prefix_sizes()
+
+        worker_context = get_worker_context()
+        training_steps, validation_steps = self._count_sharded_steps(chunks, batch_size, holdout_every, worker_context) if worker_context.is_distributed else (None, None)
+
+        with create_encoding_executor(dataset_preprocessor, encoding_workers) as encoding_executor:
+            training_dataset = self._build_dataset(
+                chunks,
+                dataset_preprocessor,
+                encoding_executor,
+                encoding_workers,
+                batch_size,
+                holdout_every,
+                holdout=False,
+                sampled_softmax_features=sampled_softmax_features,
+                nested_prefix_sizes=nested_prefix_sizes,
+                shuffle_buffer_size=shuffle_buffer_size,
+                worker_context=worker_context,
+            )
+            validation_dataset = self._build_dataset(
+                chunks,
+                dataset_preprocessor,
+                encoding_executor,
+                encoding_workers,
+                batch_size,
+                holdout_every,
+                holdout=True,
+                sampled_softmax_features=sampled_softmax_features,
+                nested_prefix_sizes=nested_prefix_sizes,
+                worker_context=worker_context,
+                validation_steps=validation_steps,
+            )
+
+            if worker_context.is_distributed:
+                return self._fit_distributed(training_dataset, validation_dataset, epochs, batch_size, training_steps)
+
+            history = self.autoencoder.fit(
+                training_dataset,
+                validation_data=validation_dataset,
+                epochs=epochs,
+                callbacks=self._get_callbacks(batch_size),
+            )
+            return history.history
+
+    def _fit_distributed(
+        self,
+        training_dataset: tf.data.Dataset,
+        validation_dataset: tf.data.Dataset,
+        epochs: int,
+        batch_size: int,
+        training_steps: int | None = None,
+    ) -> Dict[str, List[float]]:
+        # Model.fit reduces the nested batches and the scalar logs with a batch axis, which MultiWorkerMirroredStrategy rejects, so the replica steps run here and only their scalar logs are reduced
+        strategy = get_distribution_strategy()
+        # The datasets are already sharded and batched per worker, experimental_distribute_dataset would split their batches again
+        training_batches = strategy.distribute_datasets_from_function(lambda _: training_dataset)
+        validation_batches = strategy.distribute_datasets_from_function(lambda _: validation_dataset)
+
+        @tf.function
+        def train_step(batch):
+            logs = strategy.run(self.autoencoder.train_step, args=(batch,))
+            return {name: strategy.reduce("MEAN", value, axis=None) for name, value in logs.items()}
+
+        @tf.function
+        def test_step(batch):
+            logs = strategy.run(self.autoencoder.test_step, args=(batch,))
+            return {name: strategy.reduce("MEAN", value, axis=None) for name, value in logs.items()}
+
+        # CallbackList hands a copy of the logs to every callback, the history is recorded by the last one to keep the logs added by the others
+        history = History()
+        callbacks = CallbackList([*self._get_callbacks(batch_size), history], model=self.autoencoder, epochs=epochs, steps=training_steps)
+
+        with strategy.scope():
+            self._build_training_state(training_dataset)
+            self.autoencoder.stop_training = False
+            callbacks.on_train_begin()
+
+            for epoch in range(epochs):
+                callbacks.on_epoch_begin(epoch)
+
+                self.autoencoder.reset_metrics()
+                for step, batch in enumerate(islice(training_batches, training_steps)):
+                    logs = train_step(batch)
+                    callbacks.on_train_batch_end(step, logs)
+                logs = {name: float(value) for name, value in logs.items()}
+
+                self.autoencoder.reset_metrics()
+                # The validation datasets hold the same number of batches on every worker, a full pass also completes the cache of the holdout rows
+                for batch in validation_batches:
+                    validation_logs = test_step(batch)
+                logs.update({f"val_{name}": float(value) for name, value in validation_logs.items()})
+
+                callbacks.on_epoch_end(epoch, logs)
+                if self.autoencoder.stop_training:
+                    break
+
+            callbacks.on_train_end()
+
+        return history.history
+
+    def _get_callbacks(self, batch_size: int) -> List[Callback]:
+        return [EarlyStopping(monitor='val_loss', patience=2, restore_best_weights=True), TrainingThroughputCallback(batch_size), ReconstructionLossCallback(self._get_reconstruction_loss_weights())]
+
+    def _get_reconstruction_loss_weights(self) -> Dict[str, float]:
+        # The nested prefix heads are left out, so models with different bottleneck sizes are compared on the same full-width reconstruction
+        nested_prefixes = tuple(NESTED_PREFIX_OUTPUTS_PREFIX.format(prefix_size=prefix_size) for prefix_size in self._get_nested_prefix_sizes())
+        loss_weights = {output_name: weight for output_name, weight in self.autoencoder.get_compile_config()["loss_weights"].items() if not output_name.startswith(nested_prefixes)}
+        return {**loss_weights, **{layer.name: layer.loss_weight for layer in self.autoencoder.layers if isinstance(layer, SampledSoftmaxReconstruction)}}
+
+    def _build_training_state(self, training_dataset: tf.data.Dataset) -> None:
+        # The losses trackers and the optimizer slots are variables, they are created once in the cross-replica context instead of inside the replica steps
+        x, y = next(iter(training_dataset))
+        self.autoencoder.compute_loss(x=x, y=y, y_pred=self.autoencoder(x, training=False))
+        if not self.autoencoder.optimizer.built:
+            self.autoencoder.optimizer.build(self.autoencoder.trainable_variables)
+
+    @property
+    def is_chief(self) -> bool:
+        return get_worker_context().is_chief
+
+    @classmethod
+    def _build_sharded_datasets(
+        cls,
+        x: Dict[str, np.ndarray],
+        y: Dict[str, np.ndarray],
+        batch_size: int,
+        worker_context: WorkerContext,
+        validation_split: float = 0.2,
+    ) -> Tuple[tf.data.Dataset, tf.data.Dataset]:
+        rows = len(next(iter(x.values())))
+        split_at = int(rows * (1 - validation_split))
+
+        datasets = []
+        for start, stop, holdout in ((0, split_at, False), (split_at, rows, True)):
+            worker_rows = np.arange(start + worker_context.worker_index, stop, worker_context.num_workers)[: (stop - start) // worker_context.num_workers]
+            dataset = tf.data.Dataset.from_tensor_slices(({key: value[worker_rows] for key, value in x.items()}, {key: value[worker_rows] for key, value in y.items()}))
+            if not holdout:
+                dataset = dataset.shuffle(len(worker_rows))
+            datasets.append(cls._disable_auto_shard(dataset.batch(max(batch_size // worker_context.num_workers, 1), drop_remainder=not holdout).prefetch(tf.data.AUTOTUNE)))
+
+        return datasets[0], datasets[1]
+
+    @staticmethod
+    def _count_sharded_steps(chunks: Callable[[], Iterable[pd.DataFrame]], batch_size: int, holdout_every: int, worker_context: WorkerContext) -> Tuple[int, int]:
+        chunks_count = 0
+        validation_rows = 0
+        training_rows = 0
+        for chunk in chunks():
+            chunks_count += 1
+            chunk_validation_rows = -(-len(chunk) // holdout_every)
+            validation_rows += chunk_validation_rows
+            training_rows += len(chunk) - chunk_validation_rows
+
+        if chunks_count < worker_context.num_workers:
+            raise ValueError(f"Distributed training by chunks needs at least one chunk per worker, got {chunks_count} chunks for {worker_context.num_workers} workers, reduce the chunk size")
+
+        worker_batch_size = max(batch_size // worker_context.num_workers, 1)
+        return max(training_rows // worker_context.num_workers // worker_batch_size, 1), max(validation_rows // worker_context.num_workers // worker_batch_size, 1)
+
+    @staticmethod
+    def _disable_auto_shard(dataset: tf.data.Dataset) -> tf.data.Dataset:
+        options = tf.data.Options()
+        options.experimental_distribute.auto_shard_policy = tf.data.experimental.AutoShardPolicy.OFF
+        return dataset.with_options(options)
+
+    def warm_start_from(self, previous: "KerasAutoencoder") -> None:
+        if len(self.autoencoder.layers) != len(previous.autoencoder.layers):
+            raise ValueError("Warm start requires the same architecture as the previous model release")
+
+        for layer, previous_layer in zip(self.autoencoder.layers, previous.autoencoder.layers):
+            if type(layer) is not type(previous_layer):
+                raise ValueError(f"Warm start can not copy layer {previous_layer.name} of type {type(previous_layer).__name__} into {layer.name} of type {type(layer).__name__}")
+
+            layer.set_weights([self._grow_weights(weights, previous_weights) for weights, previous_weights in zip(layer.get_weights(), previous_layer.get_weights())])
+
+    @staticmethod
+    def _grow_weights(weights: np.ndarray, previous_weights: np.ndarray) -> np.ndarray:
+        if weights.shape == previous_weights.shape:
+            return previous_weights
+
+        grown_axes = [axis for axis, (size, previous_size) in enumerate(zip(weights.shape, previous_weights.shape)) if size != previous_size]
+        if weights.ndim != previous_weights.ndim or len(grown_axes) != 1 or weights.shape[grown_axes[0]] < previous_weights.shape[grown_axes[0]]:
+            raise ValueError(f"Warm start can not grow weights of shape {previous_weights.shape} into {weights.shape}")
+
+        weights = weights.copy()
+        weights[tuple(slice(0, size) for size in previous_weights.shape)] = previous_weights
+        return weights
+
+    def _get_sampled_softmax_features(self) -> List[str]:
+        return [layer.name.removesuffix("_outputs") for layer in self.autoencoder.layers if isinstance(layer, SampledSoftmaxReconstruction)]
+
+    @staticmethod
+    def _add_sampled_softmax_labels(x: Dict, y: Dict, sampled_softmax_features: List[str]) -> Tuple[Dict, Dict]:
+        x = {**x, **{f"{feature_name}{SAMPLED_SOFTMAX_LABELS_SUFFIX}": x[feature_name] for feature_name in sampled_softmax_features}}
+        y = {key: value for key, value in y.items() if key.removesuffix("_outputs") not in sampled_softmax_features}
+        return x, y
+
+    def _get_nested_prefix_sizes(self) -> List[int]:
+        return [layer.prefix_size for layer in self.autoencoder.layers if isinstance(layer, PrefixMask)]
+
+    @staticmethod
+    def _add_nested_prefix_targets(y: Dict, nested_prefix_sizes: List[int]) -> Dict:
+        return {**y, **{f"{NESTED_PREFIX_OUTPUTS_PREFIX.format(prefix_size=prefix_size)}{key}": value for prefix_size in nested_prefix_sizes for key, value in y.items()}}
 
-    def embed(self, x: pd.DataFrame) -> np.ndarray:
-        return self.encoder.predict(x)
+    @classmethod
+    def _build_dataset(
+        cls,
+        chunks: Callable[[], Iterable[pd.DataFrame]],
+        dataset_preprocessor: DatasetPreprocessor,
+        encoding_executor: ProcessPoolExecutor | None,
+        max_chunks_in_flight: int,
+        batch_size: int,
+        holdout_every: int,
+        holdout: bool,
+        sampled_softmax_features: List[str],
+        nested_prefix_sizes: List[int] | None = None,
+        shuffle_buffer_size: int | None = None,
+        worker_context: WorkerContext | None = None,
+        validation_steps: int | None = None,
+    ) -> tf.data.Dataset:
+        numerical_columns = list(dataset_preprocessor.numerical_columns.columns)
+        categorical_columns = list(dataset_preprocessor.categorical_columns.columns)
+        distributed = worker_context is not None and worker_context.is_distributed
+
+        def generate_raw_chunks():
+            for chunk_index, chunk in enumerate(chunks()):
+                if distributed and chunk_index % worker_context.num_workers != worker_context.worker_index:
+                    continue
+                # Rows are split before the encoding, so each pass only encodes the rows it keeps
+                holdout_rows = np.arange(len(chunk)) % holdout_every == 0
+                yield chunk[holdout_rows if holdout else ~holdout_rows]
+
+        def generate_features():
+            yield from encode_chunks(encoding_executor, dataset_preprocessor, generate_raw_chunks(), max_chunks_in_flight)
+
+        def to_inputs_and_targets(features: Dict[str, tf.Tensor]) -> Tuple[Dict[str, tf.Tensor], Dict[str, tf.Tensor]]:
+            targets = {NUMERICAL_OUTPUTS_KEY: features[NUMERICAL_INPUTS_FEATURES_KEY], **{f"{column_name}_outputs": features[column_name] for column_name in categorical_columns}}
+            inputs, targets = cls._add_sampled_softmax_labels(features, targets, sampled_softmax_features)
+            return inputs, cls._add_nested_prefix_targets(targets, nested_prefix_sizes or [])
+
+        dataset = tf.data.Dataset.from_generator(
+            generate_features,
+            output_signature={
+                NUMERICAL_INPUTS_FEATURES_KEY: tf.TensorSpec(shape=(None, len(numerical_columns)), dtype=tf.float32),
+                **{column_name: tf.TensorSpec(shape=(None,), dtype=tf.int32) for column_name in categorical_columns},
+            },
+        )
+
+        if holdout and distributed:
+            # Every worker evaluates the same number of batches, they are cached after the first pass over the holdout rows
+            worker_batch_size = max(batch_size // worker_context.num_workers, 1)
+            dataset = dataset.unbatch().repeat().take(validation_steps * worker_batch_size).batch(worker_batch_size, drop_remainder=True).cache()
+            return cls._disable_auto_shard(dataset.map(to_inputs_and_targets, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE))
+
+        if holdout:
+            # The holdout rows are encoded once and kept for the validation of every epoch
+            dataset = dataset.cache()
+
+        dataset = dataset.unbatch()
+        if shuffle_buffer_size:
+            dataset = dataset.shuffle(shuffle_buffer_size)
+
+        if distributed:
+            dataset = dataset.repeat().batch(max(batch_size // worker_context.num_workers, 1), drop_remainder=True)
+            return cls._disable_auto_shard(dataset.map(to_inputs_and_targets, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE))
+
+        return dataset.batch(batch_size).map(to_inputs_and_targets, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
+
+    def embed(self, x: Dict[str, np.ndarray], batch_size: int | None = None) -> np.ndarray:
+        return self.encoder.predict(x, batch_size=batch_size, verbose=0)
+
+    def set_jit_compile(self, jit_compile: bool | str) -> None:
+        self.jit_compile = jit_compile
+        if jit_compile != "auto":
+            self.encoder.jit_compile = jit_compile
+            self.encoder.predict_function = None
 
     @classmethod
     def _build_model(
@@ -71,11 +394,40 @@ class KerasAutoencoder(EmbeddingModelInterface):
         dataset_analysis: DatasetAnalysis,
         bottleneck_layer_dim: int,
         hidden_layer_dim: List[int],
+        jit_compile: bool | str = "auto",
+        nested_prefix_sizes: List[int] | None = None,
+    ) -> Tuple[Model, Model]:
+        nested_prefix_sizes = sorted(set(nested_prefix_sizes or []))
+        if any(not 0 < prefix_size < bottleneck_layer_dim for prefix_size in nested_prefix_sizes):
+            raise ValueError(f"Nested prefix sizes {nested_prefix_sizes} must be between 1 and the bottleneck size {bottleneck_layer_dim} excluded")
+
+        distribution_strategy = get_distribution_strategy()
+        with distribution_strategy.scope() if distribution_strategy is not None else nullcontext():
+            return cls._build_and_compile_model(dataset_analysis, bottleneck_layer_dim, hidden_layer_dim, jit_compile, nested_prefix_sizes)
+
+    @classmethod
+    def _build_and_compile_model(
+        cls,
+        dataset_analysis: DatasetAnalysis,
+        bottleneck_layer_dim: int,
+        hidden_layer_dim: List[int],
+        jit_compile: bool | str,
+        nested_prefix_sizes: List[int],
     ) -> Tuple[Model, Model]:
         inputs, bottleneck_layer = cls._build_encoder_part(dataset_analysis, bottleneck_layer_dim, hidden_layer_dim)
-        outputs = cls._build_decoder_part(bottleneck_layer, dataset_analysis, bottleneck_layer_dim, hidden_layer_dim)
 
-        autoencoder = Model(inputs=inputs, outputs=outputs)
+        sampled_softmax_negatives = {
+            feature_name: negatives
+            for feature_name, negatives in (dataset_analysis.categorical_features_sampled_softmax_negatives or {}).items()
+            if negatives < dataset_analysis.categorical_columns.columns[feature_name].cardinality + 1
+        }
+        labels_inputs = {
+            f"{feature_name}{SAMPLED_SOFTMAX_LABELS_SUFFIX}": Input(shape=(1,), name=f"{feature_name}{SAMPLED_SOFTMAX_LABELS_SUFFIX}", dtype="int32")
+            for feature_name in sampled_softmax_negatives
+        }
+        outputs = cls._build_decoder_part(bottleneck_layer, labels_inputs, sampled_softmax_negatives, dataset_analysis, bottleneck_layer_dim, hidden_layer_dim, nested_prefix_sizes)
+
+        autoencoder = Model(inputs={**inputs, **labels_inputs}, outputs=outputs)
         encoder = Model(inputs=inputs, outputs=bottleneck_layer)
 
         losses = {}
@@ -85,16 +437,27 @@ class KerasAutoencoder(EmbeddingModelInterface):
         loss_weights[NUMERICAL_OUTPUTS_KEY] = 1.0
 
         for feature_name in dataset_analysis.categorical_columns.columns:
-            if dataset_analysis.categorical_features_loss_weights is not None:
-                loss_weights[f"{feature_name}_outputs"] = dataset_analysis.categorical_features_loss_weights[feature_name]
-            else:
-                loss_weights[f"{feature_name}_outputs"] = 1.0
+            if feature_name in sampled_softmax_negatives:
+                continue
+            loss_weights[f"{feature_name}_outputs"] = cls._get_categorical_loss_weight(dataset_analysis, feature_name)
             losses[f"{feature_name}_outputs"] = "sparse_categorical_crossentropy"
 
-        autoencoder.compile(optimizer=Adam(learning_rate=0.001), loss=losses, loss_weights=loss_weights)
+        losses = cls._add_nested_prefix_targets(losses, nested_prefix_sizes)
+        loss_weights = cls._add_nested_prefix_targets(loss_weights, nested_prefix_sizes)
+
+        if sampled_softmax_negatives and jit_compile is not False:
+            jit_compile = False
+
+        autoencoder.compile(optimizer=Adam(learning_rate=0.001), loss=losses, loss_weights=loss_weights, jit_compile=jit_compile)
 
         return autoencoder, encoder
 
+    @staticmethod
+    def _get_categorical_loss_weight(dataset_analysis: DatasetAnalysis, feature_name: str) -> float:
+        if dataset_analysis.categorical_features_loss_weights is not None:
+            return dataset_analysis.categorical_features_loss_weights[feature_name]
+        return 1.0
+
     @classmethod
     def _build_encoder_part(
         cls,
@@ -119,7 +482,7 @@ class KerasAutoencoder(EmbeddingModelInterface):
             inputs[feature_name] = categorical_input_layer
 
             embedding_layer = Embedding(
-                input_dim=len(feature.vocabulary) + 1,
+                input_dim=feature.cardinality + 1,
                 output_dim=feature.embedding_dim,
                 name=f"{feature_name}_embedding",
                 
@@ -145,44 +508,109 @@ class KerasAutoencoder(EmbeddingModelInterface):
     def _build_decoder_part(
         cls,
         bottleneck_layer: Layer,
+        labels_inputs: Dict[str, Layer],
+        sampled_softmax_negatives: Dict[str, int],
         dataset_analysis: DatasetAnalysis,
         bottleneck_layer_dim: int,
         hidden_layer_dim: List[int],
+        nested_prefix_sizes: List[int] | None = None,
     ) -> None:
-        first_decoding_layer = Dense(units=bottleneck_layer_dim, activation="leaky_relu", name="first_decoding_layer")(bottleneck_layer)
+        decoding_layers = [Dense(units=bottleneck_layer_dim, activation="leaky_relu", name="first_decoding_layer")]
 
         for index, hidden_layer_dim in enumerate(reversed(hidden_layer_dim)):
-            first_decoding_layer = Dense(
-                units=hidden_layer_dim,
-                activation="relu",
-                name=f"decoding_layer_{index}",
-            )(first_decoding_layer)
-            first_decoding_layer = Dropout(0.2)(first_decoding_layer)
-
-        outputs = {}
-
-        numerical_outputs = Dense(
+            decoding_layers.append(
+                Dense(
+                    units=hidden_layer_dim,
+                    activation="relu",
+                    name=f"decoding_layer_{index}",
+                )
+            )
+            decoding_layers.append(Dropout(0.2))
+
+        numerical_output_layer = Dense(
             units=len(dataset_analysis.numerical_columns.columns),
             name="numerical_outputs",
-        )(first_decoding_layer)
-        outputs[NUMERICAL_OUTPUTS_KEY] = numerical_outputs
+        )
 
+        categorical_output_layers = {}
         for (
             feature_name,
             feature,
         ) in dataset_analysis.categorical_columns.columns.items():
-            categorical_output_layer = Dense(
-                units=len(feature.vocabulary) + 1,
-                name=f"{feature_name}_outputs",
-                activation="softmax",
-            )(first_decoding_layer)
-            outputs[f"{feature_name}_outputs"] = categorical_output_layer
+            if feature_name in sampled_softmax_negatives:
+                categorical_output_layers[feature_name] = SampledSoftmaxReconstruction(
+                    num_classes=feature.cardinality + 1,
+                    num_sampled=sampled_softmax_negatives[feature_name],
+                    loss_weight=cls._get_categorical_loss_weight(dataset_analysis, feature_name),
+                    name=f"{feature_name}_outputs",
+                )
+            else:
+                categorical_output_layers[feature_name] = Dense(
+                    units=feature.cardinality + 1,
+                    name=f"{feature_name}_outputs",
+                    activation="softmax",
+                )
+
+        outputs = {}
+
+        decoder_inputs = [("", bottleneck_layer)] + [
+            (NESTED_PREFIX_OUTPUTS_PREFIX.format(prefix_size=prefix_size), PrefixMask(prefix_size, name=f"bottleneck_prefix_{prefix_size}")(bottleneck_layer))
+            for prefix_size in nested_prefix_sizes or []
+        ]
+        for outputs_prefix, decoder_input in decoder_inputs:
+            decoded_layer = decoder_input
+            for decoding_layer in decoding_layers:
+                decoded_layer = decoding_layer(decoded_layer)
+
+            outputs[f"{outputs_prefix}{NUMERICAL_OUTPUTS_KEY}"] = numerical_output_layer(decoded_layer)
+
+            for feature_name, categorical_output_layer in categorical_output_layers.items():
+                if feature_name in sampled_softmax_negatives:
+                    outputs[f"{outputs_prefix}{feature_name}_outputs"] = categorical_output_layer([decoded_layer, labels_inputs[f"{feature_name}{SAMPLED_SOFTMAX_LABELS_SUFFIX}"]], track_reconstruction_loss=not outputs_prefix)
+                else:
+                    outputs[f"{outputs_prefix}{feature_name}_outputs"] = categorical_output_layer(decoded_layer)
 
         return outputs
 
     def save(self, path: str) -> None:
+        # Exporting first fails on an unsupported layer before any file of the release is written
+        numpy_encoder = self.to_numpy_encoder()
+
         self.autoencoder.save(f"{path}/autoencoder.keras")
         self.encoder.save(f"{path}/encoder.keras")
+        numpy_encoder.save(path)
+
+    def to_numpy_encoder(self) -> NumpyEncoder:
+        concatenate_layer = next(layer for layer in self.encoder.layers if isinstance(layer, Concatenate))
+
+        numerical_dimensions = 0
+        embeddings = {}
+        for concatenated_input in concatenate_layer.input:
+            operation = concatenated_input._keras_history.operation
+            if operation.name == NUMERICAL_INPUTS_FEATURES_KEY:
+                numerical_dimensions = concatenated_input.shape[-1]
+                continue
+
+            embedding_layer = operation.input._keras_history.operation
+            feature_name = embedding_layer.input._keras_history.operation.name
+            embeddings[feature_name] = embedding_layer.embeddings.numpy()
+
+        layers = []
+        weights = {}
+        for layer in self.encoder.layers[self.encoder.layers.index(concatenate_layer) + 1 :]:
+            index = len(layers)
+            if isinstance(layer, LayerNormalization):
+                layers.append({"type": "layer_normalization", "epsilon": layer.epsilon})
+                weights[f"layers/{index}/gamma"] = layer.gamma.numpy()
+                weights[f"layers/{index}/beta"] = layer.beta.numpy()
+            elif isinstance(layer, Dense):
+                layers.append({"type": "dense", "activation": layer.get_config()["activation"]})
+                weights[f"layers/{index}/kernel"] = layer.kernel.numpy()
+                weights[f"layers/{index}/bias"] = layer.bias.numpy()
+            elif not isinstance(layer, Dropout):
+                raise ValueError(f"Layer {layer.name} of type {type(layer).__name__} can not be exported to the NumPy encoder")
+
+        return NumpyEncoder(numerical_dimensions=numerical_dimensions, embeddings=embeddings, layers=layers, weights=weights)
 
     @classmethod
     def load(cls, path: str) -> "KerasAutoencoder":
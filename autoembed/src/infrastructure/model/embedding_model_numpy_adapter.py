@@ -0,0 +1,99 @@
+import json
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from autoembed.src.domain.dataset_preprocessor import NUMERICAL_INPUTS_FEATURES_KEY
+from autoembed.src.domain.interfaces.embedding_inference_model_interface import (
+    EmbeddingInferenceModelInterface,
+)
+
+
+NUMPY_ENCODER_CONFIG_FILE_NAME = "encoder_numpy.json"
+NUMPY_ENCODER_WEIGHTS_FILE_NAME = "encoder_numpy.npz"
+DEFAULT_INFERENCE_BATCH_SIZE = 4096
+
+ACTIVATIONS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "leaky_relu": lambda x: np.where(x > 0.0, x, 0.2 * x),
+    "tanh": np.tanh,
+    "sigmoid": lambda x: 1.0 / (1.0 + np.exp(-x)),
+}
+
+
+class NumpyEncoder(EmbeddingInferenceModelInterface):
+    def __init__(
+        self,
+        numerical_dimensions: int,
+        embeddings: Dict[str, np.ndarray],
+        layers: List[Dict[str, Any]],
+        weights: Dict[str, np.ndarray],
+    ):
+        self.numerical_dimensions = numerical_dimensions
+        self.embeddings = embeddings
+        self.layers = layers
+        self.weights = weights
+
+    def set_jit_compile(self, jit_compile: bool | str) -> None:
+        pass
+
+    def embed(self, x: Dict[str, np.ndarray], batch_size: int | None = None) -> np.ndarray:
+        batch_size = batch_size or DEFAULT_INFERENCE_BATCH_SIZE
+        n_rows = len(x[NUMERICAL_INPUTS_FEATURES_KEY])
+
+        embeddings = [self._forward({key: values[start : start + batch_size] for key, values in x.items()}) for start in range(0, n_rows, batch_size)]
+        return np.concatenate(embeddings) if embeddings else np.empty((0, self.output_dimensions), dtype=np.float32)
+
+    @property
+    def output_dimensions(self) -> int:
+        return self.weights[f"layers/{len(self.layers) - 1}/kernel"].shape[1]
+
+    def _forward(self, x: Dict[str, np.ndarray]) -> np.ndarray:
+        features = np.concatenate(
+            [np.asarray(x[NUMERICAL_INPUTS_FEATURES_KEY], dtype=np.float32).reshape(-1, self.numerical_dimensions)]
+            + [embedding[np.asarray(x[feature_name]).reshape(-1)] for feature_name, embedding in self.embeddings.items()],
+            axis=1,
+        )
+
+        for index, layer in enumerate(self.layers):
+            if layer["type"] == "layer_normalization":
+                mean = features.mean(axis=1, keepdims=True)
+                variance = features.var(axis=1, keepdims=True)
+                features = (features - mean) / np.sqrt(variance + layer["epsilon"]) * self.weights[f"layers/{index}/gamma"] + self.weights[f"layers/{index}/beta"]
+            else:
+                features = ACTIVATIONS[layer["activation"]](features @ self.weights[f"layers/{index}/kernel"] + self.weights[f"layers/{index}/bias"])
+
+        return features.astype(np.float32, copy=False)
+
+    def save(self, path: str) -> None:
+        with open(f"{path}/{NUMPY_ENCODER_CONFIG_FILE_NAME}", "w") as f:
+            json.dump(
+                {
+                    "numerical_dimensions": self.numerical_dimensions,
+                    "categorical_features": list(self.embeddings),
+                    "layers": self.layers,
+                },
+                f,
+            )
+
+        np.savez(
+            f"{path}/{NUMPY_ENCODER_WEIGHTS_FILE_NAME}",
+            **{f"embeddings/{feature_name}": embedding for feature_name, embedding in self.embeddings.items()},
+            **self.weights,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "NumpyEncoder":
+        with open(f"{path}/{NUMPY_ENCODER_CONFIG_FILE_NAME}", "r") as f:
+            config = json.load(f)
+
+        with np.load(f"{path}/{NUMPY_ENCODER_WEIGHTS_FILE_NAME}") as arrays:
+            weights = {key: arrays[key] for key in arrays.files}
+
+        return cls(
+            numerical_dimensions=config["numerical_dimensions"],
+            embeddings={feature_name: weights.pop(f"embeddings/{feature_name}") for feature_name in config["categorical_features"]},
+            layers=config["layers"],
+            weights=weights,
+        )
@@ -0,0 +1,126 @@
+import time
+from typing import Dict
+
+import keras
+import tensorflow as tf
+from tensorflow.keras.callbacks import Callback
+from tensorflow.keras.layers import Layer
+
+from autoembed.src.domain.interfaces.embedding_model_interface import RECONSTRUCTION_LOSS_KEY
+
+
+SAMPLED_SOFTMAX_LABELS_SUFFIX = "_labels"
+NESTED_PREFIX_OUTPUTS_PREFIX = "prefix_{prefix_size}_"
+
+
+@keras.saving.register_keras_serializable(package="autoembed")
+class PrefixMask(Layer):
+    def __init__(self, prefix_size: int, **kwargs):
+        super().__init__(**kwargs)
+        self.prefix_size = prefix_size
+
+    def call(self, inputs):
+        mask = tf.cast(tf.range(tf.shape(inputs)[-1]) < self.prefix_size, inputs.dtype)
+        return inputs * mask
+
+    def get_config(self):
+        return {**super().get_config(), "prefix_size": self.prefix_size}
+
+
+@keras.saving.register_keras_serializable(package="autoembed")
+class SampledSoftmaxReconstruction(Layer):
+    """Reconstruction head of a high-cardinality categorical column trained with a sampled softmax.
+
+    The training loss adds the sampled softmax estimate over num_sampled negatives while the validation loss adds
+    the full softmax cross entropy, so loss and val_loss are not on the same scale. The full softmax cross entropy
+    of the column is tracked as {name}_loss during training and validation, on the scale of the per-output losses
+    of the compiled heads.
+    """
+
+    def __init__(self, num_classes: int, num_sampled: int, loss_weight: float = 1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.num_classes = num_classes
+        self.num_sampled = num_sampled
+        self.loss_weight = loss_weight
+        self.reconstruction_loss_tracker = keras.metrics.Mean(name=f"{self.name}_loss")
+
+    def build(self, input_shape):
+        hidden_shape, _ = input_shape
+        self.kernel = self.add_weight(name="kernel", shape=(self.num_classes, hidden_shape[-1]), initializer="glorot_uniform")
+        self.bias = self.add_weight(name="bias", shape=(self.num_classes,), initializer="zeros")
+
+    def call(self, inputs, training=None, track_reconstruction_loss=True):
+        hidden, labels = inputs
+        labels = tf.reshape(tf.cast(labels, tf.int64), (-1, 1))
+
+        # During training the full softmax only feeds the tracked loss, the gradients still come from the sampled estimate
+        logits = tf.matmul(hidden, self.kernel, transpose_b=True) + self.bias
+        full_softmax_losses = tf.nn.sparse_softmax_cross_entropy_with_logits(labels=tf.reshape(labels, (-1,)), logits=logits)
+        # The head is shared with the nested prefix decoders, only the full-width call is tracked
+        if track_reconstruction_loss:
+            self.reconstruction_loss_tracker.update_state(full_softmax_losses)
+
+        if training:
+            sampled_values = tf.random.uniform_candidate_sampler(
+                true_classes=labels,
+                num_true=1,
+                num_sampled=self.num_sampled,
+                unique=True,
+                range_max=self.num_classes,
+            )
+            losses = tf.nn.sampled_softmax_loss(
+                weights=self.kernel,
+                biases=self.bias,
+                labels=labels,
+                inputs=hidden,
+                num_sampled=self.num_sampled,
+                num_classes=self.num_classes,
+                sampled_values=sampled_values,
+            )
+        else:
+            losses = full_softmax_losses
+
+        self.add_loss(self.loss_weight * tf.reduce_mean(losses))
+        return losses
+
+    def compute_output_shape(self, input_shape):
+        hidden_shape, _ = input_shape
+        return (hidden_shape[0],)
+
+    def get_config(self):
+        return {
+            **super().get_config(),
+            "num_classes": self.num_classes,
+            "num_sampled": self.num_sampled,
+            "loss_weight": self.loss_weight,
+        }
+
+
+class TrainingThroughputCallback(Callback):
+    def __init__(self, batch_size: int):
+        super().__init__()
+        self.batch_size = batch_size
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch_start = time.perf_counter()
+        self.batches = 0
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.batches += 1
+
+    def on_epoch_end(self, epoch, logs=None):
+        if logs is not None:
+            logs["rows_per_second"] = self.batches * self.batch_size / (time.perf_counter() - self.epoch_start)
+
+
+class ReconstructionLossCallback(Callback):
+    def __init__(self, loss_weights: Dict[str, float]):
+        super().__init__()
+        self.loss_weights = loss_weights
+
+    def on_epoch_end(self, epoch, logs=None):
+        if logs is None:
+            return
+        for logs_prefix in ("", "val_"):
+            if all(f"{logs_prefix}{output_name}_loss" in logs for output_name in self.loss_weights):
+                logs[f"{logs_prefix}{RECONSTRUCTION_LOSS_KEY}"] = sum(weight * logs[f"{logs_prefix}{output_name}_loss"] for output_name, weight in self.loss_weights.items())
@@ -1,13 +1,22 @@
 import os
 import json
 import uuid
+import fcntl
+import threading
 import dataclasses
 import datetime
+from collections import OrderedDict
+from contextlib import contextmanager
 from logging import Logger
+from typing import Any, Dict, Iterator, Tuple, Type
 
+import numpy as np
 from kink import inject
 
 from autoembed.src.domain.dataset_preprocessor import DatasetPreprocessor
+from autoembed.src.domain.interfaces.embedding_inference_model_interface import (
+    EmbeddingInferenceModelInterface,
+)
 from autoembed.src.domain.interfaces.embedding_model_interface import (
     EmbeddingModelInterface,
 )
@@ -19,20 +28,38 @@ from autoembed.src.domain.entites.columns import (
     CategoricalColumns,
     NumericalColumn,
     NumericalColumns,
+    SortedArrayVocabulary,
 )
 
 
+PREPROCESSOR_DIRECTORY_NAME = "preprocessor"
+PREPROCESSOR_METADATA_FILE_NAME = "metadata.json"
+MANIFEST_FILE_NAME = "manifest.json"
+MANIFEST_LOCK_FILE_NAME = ".manifest.lock"
+
+
 @inject()
 class LocalModelRegistryAdapter(ModelRegistryInterface):
-    def __init__(self, logger: Logger, base_path: str = "models"):
+    def __init__(self, logger: Logger, base_path: str = "models", max_cached_releases: int = 2):
         self.path = base_path
         self.logger = logger
+        self.max_cached_releases = max_cached_releases
+        self._manifests: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+        self._loaded_releases: OrderedDict[Tuple[str, str], Dict[Any, Any]] = OrderedDict()
+        self._loaded_releases_lock = threading.Lock()
 
         if not os.path.exists(base_path):
             self.logger.info(f"Creating directory {base_path}")
             os.makedirs(base_path)
 
-    def save_model_and_preprocessor(self, model: EmbeddingModelInterface, preprocessor: DatasetPreprocessor, model_registry_name: str) -> None:
+    def save_model_and_preprocessor(
+        self,
+        model: EmbeddingModelInterface,
+        preprocessor: DatasetPreprocessor,
+        model_registry_name: str,
+        data_fingerprint: str | None = None,
+        metrics: Dict[str, float] | None = None,
+    ) -> str:
         model_id = self._generate_model_id()
         self.logger.info(f"Saving model {model_id}")
 
@@ -45,46 +72,220 @@ class LocalModelRegistryAdapter(ModelRegistryInterface):
         self._save_preprocessor(preprocessor, path)
         self._save_model(model, path)
 
+        with self._update_manifest(model_registry_name) as manifest:
+            manifest["releases"][model_id] = {
+                "created_at": datetime.datetime.now().isoformat(),
+                "data_fingerprint": data_fingerprint,
+                "metrics": metrics or {},
+                "artifact_sizes": self._get_artifact_sizes(path),
+            }
+            manifest["latest"] = model_id
+
+        return model_id
+
+    def save_artifact(self, model_registry_name: str, model_id: str, artifact_name: str, content: str) -> None:
+        model_id = self._resolve_model_id(model_registry_name, model_id)
+
+        self.logger.info(f"Saving {artifact_name} for model {model_id}")
+
+        with open(f"{self.path}/{model_registry_name}/{model_id}/{artifact_name}", "w") as f:
+            f.write(content)
+
+        with self._update_manifest(model_registry_name) as manifest:
+            if model_id in manifest["releases"]:
+                manifest["releases"][model_id]["artifact_sizes"][artifact_name] = len(content.encode())
+
+    def load_artifact(self, model_registry_name: str, model_id: str, artifact_name: str) -> str | None:
+        model_id = self._resolve_model_id(model_registry_name, model_id)
+
+        artifact_path = f"{self.path}/{model_registry_name}/{model_id}/{artifact_name}"
+        if not os.path.exists(artifact_path):
+            return None
+
+        with open(artifact_path, "r") as f:
+            return f.read()
+
     def _save_preprocessor(self, preprocessor: DatasetPreprocessor, path: str) -> None:
-        preprocessor_data = {
-            "numerical_columns": [{column_name: dataclasses.asdict(column)} for column_name, column in preprocessor.numerical_columns.columns.items()],
-            "categorical_columns": [{column_name: dataclasses.asdict(column)} for column_name, column in preprocessor.categorical_columns.columns.items()],
+        preprocessor_path = f"{path}/{PREPROCESSOR_DIRECTORY_NAME}"
+        os.makedirs(preprocessor_path, exist_ok=True)
+
+        categorical_columns = []
+        for index, (column_name, column) in enumerate(preprocessor.categorical_columns.columns.items()):
+            vocabulary = column.get_sorted_array_vocabulary()
+            np.save(f"{preprocessor_path}/categorical_{index}_keys_utf8.npy", vocabulary.keys_blob)
+            np.save(f"{preprocessor_path}/categorical_{index}_keys_offsets.npy", vocabulary.keys_offsets)
+            np.save(f"{preprocessor_path}/categorical_{index}_codes.npy", vocabulary.sorted_codes)
+            categorical_columns.append({field.name: getattr(column, field.name) for field in dataclasses.fields(column) if field.name != "vocabulary"})
+
+        preprocessor_metadata = {
+            "numerical_columns": [dataclasses.asdict(column) for column in preprocessor.numerical_columns.columns.values()],
+            "categorical_columns": categorical_columns,
             "categorical_features_loss_weights": preprocessor.categorical_features_loss_weights,
         }
 
-        with open(f"{path}/preprocessor.json", "w") as f:
-            json.dump(preprocessor_data, f)
+        with open(f"{preprocessor_path}/{PREPROCESSOR_METADATA_FILE_NAME}", "w") as f:
+            json.dump(preprocessor_metadata, f)
 
     def _save_model(self, model: EmbeddingModelInterface, path: str) -> None:
         self.logger.info(f"Saving model to {path}")
         model.save(path)
 
+    def get_release(self, model_registry_name: str, model_id: str) -> Dict[str, Any]:
+        model_id = self._resolve_model_id(model_registry_name, model_id)
+        return {"model_id": model_id, **self._read_manifest(model_registry_name)["releases"].get(model_id, {})}
+
     def load_preprocessor(self, model_registry_name: str, model_id: str) -> DatasetPreprocessor:
-        if model_id == "latest":
-            model_id = self._get_latest_model_id(model_registry_name=model_registry_name)
+        model_id = self._resolve_model_id(model_registry_name, model_id)
+        return self._get_or_load(model_registry_name, model_id, PREPROCESSOR_DIRECTORY_NAME, lambda: self._load_release_preprocessor(model_registry_name, model_id))
 
+    def _load_release_preprocessor(self, model_registry_name: str, model_id: str) -> DatasetPreprocessor:
         self.logger.info(f"Loading exported columns for model {model_id}")
 
-        with open(f"{self.path}/{model_registry_name}/{model_id}/preprocessor.json", "r") as f:
+        path = f"{self.path}/{model_registry_name}/{model_id}"
+        if os.path.isdir(f"{path}/{PREPROCESSOR_DIRECTORY_NAME}"):
+            return self._load_preprocessor(f"{path}/{PREPROCESSOR_DIRECTORY_NAME}")
+
+        self.logger.warning(f"⚠️ Model {model_id} was saved with the legacy JSON preprocessor, loading its vocabularies in memory")
+        return self._load_legacy_json_preprocessor(f"{path}/preprocessor.json")
+
+    def _load_preprocessor(self, preprocessor_path: str) -> DatasetPreprocessor:
+        with open(f"{preprocessor_path}/{PREPROCESSOR_METADATA_FILE_NAME}", "r") as f:
+            preprocessor_metadata = json.load(f)
+
+        numerical_columns = NumericalColumns.from_numerical_columns([NumericalColumn(**column) for column in preprocessor_metadata["numerical_columns"]])
+        categorical_columns = CategoricalColumns.from_categorical_columns(
+            [
+                CategoricalColumn(vocabulary=self._load_vocabulary(preprocessor_path, index), **column)
+                for index, column in enumerate(preprocessor_metadata["categorical_columns"])
+            ]
+        )
+
+        return DatasetPreprocessor.from_columns(numerical_columns, categorical_columns, preprocessor_metadata["categorical_features_loss_weights"])
+
+    @staticmethod
+    def _load_vocabulary(preprocessor_path: str, index: int) -> SortedArrayVocabulary:
+        sorted_codes = np.load(f"{preprocessor_path}/categorical_{index}_codes.npy", mmap_mode="r")
+        if not os.path.exists(f"{preprocessor_path}/categorical_{index}_keys_offsets.npy"):
+            # Releases saved before the UTF-8 blob store their keys as a fixed-width unicode array
+            return SortedArrayVocabulary.from_sorted_keys(np.load(f"{preprocessor_path}/categorical_{index}_keys.npy"), sorted_codes)
+
+        return SortedArrayVocabulary(
+            np.load(f"{preprocessor_path}/categorical_{index}_keys_utf8.npy", mmap_mode="r"),
+            np.load(f"{preprocessor_path}/categorical_{index}_keys_offsets.npy", mmap_mode="r"),
+            sorted_codes,
+        )
+
+    def _load_legacy_json_preprocessor(self, preprocessor_file: str) -> DatasetPreprocessor:
+        with open(preprocessor_file, "r") as f:
             preprocessor_data = json.load(f)
 
         numerical_columns = NumericalColumns.from_numerical_columns([NumericalColumn(**list(column.values())[0]) for column in preprocessor_data["numerical_columns"]])
         categorical_columns = CategoricalColumns.from_categorical_columns([CategoricalColumn(**list(column.values())[0]) for column in preprocessor_data["categorical_columns"]])
 
-        return DatasetPreprocessor.from_columns(numerical_columns, categorical_columns)
+        return DatasetPreprocessor.from_columns(numerical_columns, categorical_columns, preprocessor_data.get("categorical_features_loss_weights"))
 
     @inject()
-    def load_model(self, model: EmbeddingModelInterface, model_registry_name: str, model_id: str | None = None) -> EmbeddingModelInterface:
-        if model_id == "latest":
-            model_id = self._get_latest_model_id(model_registry_name=model_registry_name)
+    def load_model(self, model: Type[EmbeddingInferenceModelInterface], model_registry_name: str, model_id: str | None = None) -> EmbeddingInferenceModelInterface:
+        model_id = self._resolve_model_id(model_registry_name, model_id)
+        return self._get_or_load(model_registry_name, model_id, model, lambda: model.load(f"{self.path}/{model_registry_name}/{model_id}"))
+
+    def _get_or_load(self, model_registry_name: str, model_id: str, key: Any, load: Any) -> Any:
+        release_key = (model_registry_name, model_id)
+        with self._loaded_releases_lock:
+            loaded_release = self._loaded_releases.get(release_key)
+            if loaded_release is not None and key in loaded_release:
+                self._loaded_releases.move_to_end(release_key)
+                return loaded_release[key]
+
+        value = load()
+        if self.max_cached_releases <= 0:
+            return value
 
-        return model.load(f"{self.path}/{model_registry_name}/{model_id}")
+        with self._loaded_releases_lock:
+            self._loaded_releases.setdefault(release_key, {})[key] = value
+            self._loaded_releases.move_to_end(release_key)
+            while len(self._loaded_releases) > self.max_cached_releases:
+                evicted_model_registry_name, evicted_model_id = self._loaded_releases.popitem(last=False)[0]
+                self.logger.info(f"Evicting model {evicted_model_id} of {evicted_model_registry_name} from the loaded releases cache")
+
+        return value
 
     def _generate_model_id(self) -> str:
         return f"model-{datetime.datetime.now().strftime('%Y-%m-%d-%H-%M')}-{uuid.uuid4()}"
 
-    def _get_latest_model_id(self, model_registry_name: str) -> str:
-        model_dirs = [d for d in os.listdir(f"{self.path}/{model_registry_name}") if os.path.isdir(os.path.join(self.path, model_registry_name, d))]
-        if not model_dirs:
-            raise FileNotFoundError(f"No models found in {self.path}. Please train a model first.")
-        return max(model_dirs, key=lambda d: os.path.getctime(os.path.join(self.path, model_registry_name, d)))
+    def _resolve_model_id(self, model_registry_name: str, model_id: str | None) -> str:
+        manifest = self._read_manifest(model_registry_name)
+        if model_id in (None, "latest"):
+            if manifest["latest"] is None:
+                raise FileNotFoundError(f"No models found in {self.path}/{model_registry_name}. Please train a model first.")
+            return manifest["latest"]
+
+        if model_id not in manifest["releases"] and not os.path.isdir(f"{self.path}/{model_registry_name}/{model_id}"):
+            raise FileNotFoundError(f"Model {model_id} not found in {self.path}/{model_registry_name}")
+        return model_id
+
+    def _read_manifest(self, model_registry_name: str) -> Dict[str, Any]:
+        manifest_path = f"{self.path}/{model_registry_name}/{MANIFEST_FILE_NAME}"
+        if not os.path.isdir(f"{self.path}/{model_registry_name}"):
+            raise FileNotFoundError(f"No models found in {self.path}/{model_registry_name}. Please train a model first.")
+        if not os.path.exists(manifest_path):
+            with self._update_manifest(model_registry_name) as manifest:
+                return manifest
+
+        stat = os.stat(manifest_path)
+        cached_manifest = self._manifests.get(model_registry_name)
+        if cached_manifest is not None and cached_manifest[0] == (stat.st_mtime_ns, stat.st_size):
+            return cached_manifest[1]
+
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        self._manifests[model_registry_name] = ((stat.st_mtime_ns, stat.st_size), manifest)
+        return manifest
+
+    @contextmanager
+    def _update_manifest(self, model_registry_name: str) -> Iterator[Dict[str, Any]]:
+        registry_path = f"{self.path}/{model_registry_name}"
+        manifest_path = f"{registry_path}/{MANIFEST_FILE_NAME}"
+        os.makedirs(registry_path, exist_ok=True)
+
+        with open(f"{registry_path}/{MANIFEST_LOCK_FILE_NAME}", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            if os.path.exists(manifest_path):
+                with open(manifest_path, "r") as f:
+                    manifest = json.load(f)
+            else:
+                manifest = self._build_manifest_from_directories(registry_path)
+
+            yield manifest
+
+            temporary_path = f"{manifest_path}.{os.getpid()}.tmp"
+            with open(temporary_path, "w") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(temporary_path, manifest_path)
+
+    def _build_manifest_from_directories(self, registry_path: str) -> Dict[str, Any]:
+        model_dirs = sorted((d for d in os.listdir(registry_path) if os.path.isdir(os.path.join(registry_path, d))), key=lambda d: os.path.getctime(os.path.join(registry_path, d)))
+        if model_dirs:
+            self.logger.warning(f"⚠️ Building the {MANIFEST_FILE_NAME} of {registry_path} from {len(model_dirs)} model directories ordered by creation time")
+
+        return {
+            "latest": model_dirs[-1] if model_dirs else None,
+            "releases": {
+                model_dir: {
+                    "created_at": datetime.datetime.fromtimestamp(os.path.getctime(os.path.join(registry_path, model_dir))).isoformat(),
+                    "data_fingerprint": None,
+                    "metrics": {},
+                    "artifact_sizes": self._get_artifact_sizes(os.path.join(registry_path, model_dir)),
+                }
+                for model_dir in model_dirs
+            },
+        }
+
+    @staticmethod
+    def _get_artifact_sizes(path: str) -> Dict[str, int]:
+        return {
+            os.path.relpath(os.path.join(directory, file_name), path): os.path.getsize(os.path.join(directory, file_name))
+            for directory, _, file_names in os.walk(path)
+            for file_name in file_names
+        }
@@ -0,0 +1,7 @@
+def configure_tensorflow_runtime(intra_op_threads: int | None = None, inter_op_threads: int | None = None) -> None:
+    import tensorflow as tf
+
+    if intra_op_threads is not None:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    if inter_op_threads is not None:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
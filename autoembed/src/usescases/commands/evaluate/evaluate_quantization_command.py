@@ -0,0 +1,12 @@
+from dataclasses import dataclass, field
+
+from autoembed.src.yaml.auto_embed_yaml_schema import PredictionData, Runtime, VectorStore
+
+
+@dataclass
+class EvaluateQuantizationCommand:
+    project_name: str
+    model_version: str
+    vector_store: VectorStore
+    prediction_data: PredictionData
+    runtime: Runtime = field(default_factory=Runtime)
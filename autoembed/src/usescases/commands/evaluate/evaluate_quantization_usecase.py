@@ -0,0 +1,93 @@
+import time
+from logging import Logger
+
+import numpy as np
+import pandas as pd
+from kink import inject
+
+from autoembed.src.domain.embedding_quantizer import get_quantizer, recall_at_k
+from autoembed.src.domain.interfaces.data_repository_interface import (
+    DataRepositoryInterface,
+)
+from autoembed.src.domain.interfaces.embedding_inference_model_interface import (
+    EmbeddingInferenceModelInterface,
+)
+from autoembed.src.domain.interfaces.model_registry_interface import (
+    ModelRegistryInterface,
+)
+from autoembed.src.usescases.commands.evaluate.evaluate_quantization_command import (
+    EvaluateQuantizationCommand,
+)
+
+
+QUANTIZATION_EVALUATION_FILE_NAME = "quantization_evaluation_{vector_collection_name}.csv"
+
+
+@inject()
+class EvaluateQuantizationUseCase:
+    def __init__(
+        self,
+        data_repository: DataRepositoryInterface,
+        model_registry: ModelRegistryInterface,
+        embedding_model: EmbeddingInferenceModelInterface,
+        logger: Logger,
+    ):
+        self.data_repository = data_repository
+        self.model_registry = model_registry
+        self.embedding_model = embedding_model
+        self.logger = logger
+
+    def execute(self, command: EvaluateQuantizationCommand) -> pd.DataFrame:
+        evaluation = command.vector_store.quantization_evaluation
+        self.logger.info(f"✅ Evaluating {len(evaluation.candidates)} quantization settings with recall@{evaluation.k} on {evaluation.sample_size} embeddings")
+
+        dataset_preprocessor = self.model_registry.load_preprocessor(command.project_name, command.model_version)
+        model = self.model_registry.load_model(self.embedding_model, command.project_name, command.model_version)
+        model.set_jit_compile(command.runtime.jit_compile)
+
+        columns = list(dict.fromkeys(dataset_preprocessor.numerical_columns_names + dataset_preprocessor.categorical_columns_names))
+        prediction_data = self.data_repository.get_prediction_data(command.prediction_data.path, columns=columns)
+        if len(prediction_data) > evaluation.sample_size:
+            prediction_data = prediction_data.sample(n=evaluation.sample_size, random_state=42)
+
+        inference_batch_size = command.runtime.inference_batch_size if command.runtime.inference_batch_size != "auto" else None
+        reference = np.asarray(model.embed(dataset_preprocessor.preprocess(prediction_data), batch_size=inference_batch_size), dtype=np.float32)
+
+        rng = np.random.default_rng(42)
+        query_indices = rng.choice(len(reference), size=min(evaluation.queries, len(reference)), replace=False)
+        k = min(evaluation.k, len(reference) - 2)
+
+        results = []
+        for quantization in evaluation.candidates:
+            quantizer = get_quantizer(quantization.type, n_subvectors=quantization.n_subvectors, n_bits=quantization.n_bits)
+
+            start = time.perf_counter()
+            quantizer.fit(reference[rng.choice(len(reference), size=min(len(reference), quantization.train_sample_size), replace=False)])
+            fit_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            codes = quantizer.encode(reference)
+            encode_seconds = time.perf_counter() - start
+
+            bytes_per_vector = quantizer.bytes_per_vector(reference.shape[1])
+            results.append(
+                {
+                    "quantization": quantizer.name,
+                    "bytes_per_vector": bytes_per_vector,
+                    "compression_ratio": 4 * reference.shape[1] / bytes_per_vector,
+                    f"recall_at_{k}": recall_at_k(reference, quantizer.decode(codes), query_indices, k),
+                    "fit_seconds": fit_seconds,
+                    "encode_rows_per_second": len(reference) / max(encode_seconds, 1e-9),
+                }
+            )
+
+        results = pd.DataFrame(results)
+        self.logger.info(f"📊 Quantization evaluation:\n{results.to_string(index=False)}")
+
+        self.model_registry.save_artifact(
+            command.project_name,
+            command.model_version,
+            QUANTIZATION_EVALUATION_FILE_NAME.format(vector_collection_name=command.vector_store.vector_collection_name),
+            results.to_csv(index=False),
+        )
+        return results
@@ -1,6 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
-from autoembed.src.yaml.auto_embed_yaml_schema import IdColumn, Modeling, PredictionData, VectorStore
+from autoembed.src.yaml.auto_embed_yaml_schema import IdColumn, Modeling, PredictionData, Runtime, VectorStore
 
 
 @dataclass
@@ -11,3 +11,4 @@ class PredictForModelReleaseCommand:
     vector_store: VectorStore
     prediction_data: PredictionData
     modeling: Modeling
+    runtime: Runtime = field(default_factory=Runtime)
@@ -1,18 +1,31 @@
+import time
+import hashlib
+import datetime
 from logging import Logger
+from typing import Dict, List
 
-import tqdm
+import numpy as np
+import pandas as pd
 from kink import inject
 
-from autoembed.src.domain.entites.embeddings import BatchOfEmbeddings, BusinessEmbeddings
-from autoembed.src.domain.interfaces.embedding_model_interface import (
-    EmbeddingModelInterface,
+from autoembed.src.domain.dataset_preprocessor import DatasetPreprocessor
+from autoembed.src.domain.stage_profiler import StageProfiler, log_performance_report, save_performance_report
+from autoembed.src.domain.entites.embeddings import BatchOfEmbeddings
+from autoembed.src.domain.interfaces.embedding_inference_model_interface import (
+    EmbeddingInferenceModelInterface,
 )
 from autoembed.src.domain.interfaces.embeddings_repository_interface import (
     EmbeddingsRepositoryInterface,
 )
+from autoembed.src.domain.interfaces.trainable_embeddings_repository_interface import (
+    TrainableEmbeddingsRepositoryInterface,
+)
 from autoembed.src.domain.interfaces.data_repository_interface import (
     DataRepositoryInterface,
 )
+from autoembed.src.domain.interfaces.features_cache_interface import (
+    FeaturesCacheInterface,
+)
 from autoembed.src.domain.interfaces.model_registry_interface import (
     ModelRegistryInterface,
 )
@@ -27,48 +40,169 @@ class PredictForModelReleaseUsecase:
         self,
         data_repository: DataRepositoryInterface,
         model_registry: ModelRegistryInterface,
-        embedding_model: EmbeddingModelInterface,
+        embedding_model: EmbeddingInferenceModelInterface,
         logger: Logger,
         embeddings_repository: EmbeddingsRepositoryInterface,
+        features_cache: FeaturesCacheInterface = None,
     ):
         self.logger = logger
         self.data_repository = data_repository
         self.model_registry = model_registry
         self.embeddings_repository = embeddings_repository
         self.embedding_model = embedding_model
+        self.features_cache = features_cache
+        self.inference_batch_size: int | None = None
 
     def execute(self, command: PredictForModelReleaseCommand) -> None:
         self.logger.info(f"Predicting for model release {command.project_name} {command.model_version} for {command.prediction_data.path}")
+        self.profiler = StageProfiler(f"predict-{datetime.datetime.now().strftime('%Y-%m-%d-%H-%M-%S')}")
 
-        prediction_data = self.data_repository.get_prediction_data(command.prediction_data.path)
         dataset_preprocessor = self.model_registry.load_preprocessor(command.project_name, command.model_version)
         model = self.model_registry.load_model(self.embedding_model, command.project_name, command.model_version)
+        model.set_jit_compile(command.runtime.jit_compile)
+
+        if command.runtime.inference_batch_size != "auto":
+            self.inference_batch_size = command.runtime.inference_batch_size
+
+        columns = self._get_columns_to_read(dataset_preprocessor, command)
 
-        preprocessed_data = dataset_preprocessor.preprocess(prediction_data)
-        embeddings = model.embed(preprocessed_data)
+        if command.prediction_data.chunk_size:
+            self.logger.info(f"🔍 Streaming prediction data by chunks of {command.prediction_data.chunk_size} rows")
+            if self._embeddings_repository_requires_training():
+                self._train_embeddings_repository_on_sample(dataset_preprocessor, model, columns, command)
 
-        if len(command.id_column.columns) > 1:
-            essential_data = prediction_data[command.id_column.columns + command.vector_store.metadata_columns.columns].to_dict(orient="records")
+            prediction_data_chunks = self.data_repository.get_prediction_data_chunks(command.prediction_data.path, command.prediction_data.chunk_size, columns=columns)
+            for prediction_data in self.profiler.iterate("read", prediction_data_chunks):
+                self._predict_and_update(prediction_data, dataset_preprocessor, model, command)
+        elif self.features_cache is not None:
+            self._predict_and_update_with_features_cache(dataset_preprocessor, model, command)
         else:
-            essential_data = prediction_data[command.id_column.columns[0] + command.vector_store.metadata_columns.columns].to_dict(orient="records")
+            with self.profiler.stage("read") as stage:
+                prediction_data = self.data_repository.get_prediction_data(command.prediction_data.path, columns=columns)
+                stage.rows = len(prediction_data)
+            self._predict_and_update(prediction_data, dataset_preprocessor, model, command)
 
-        embeddings_batch = BatchOfEmbeddings()
+        log_performance_report(self.profiler, self.logger)
+        save_performance_report(self.profiler, self.model_registry, command.project_name, command.model_version, chrome_trace=command.runtime.chrome_trace)
 
-        for essential_data, embedding in tqdm.tqdm(zip(essential_data, embeddings), desc="Generating embeddings"):
-            
-            the_id_column_needs_to_be_built_from_multiple_columns = len(command.id_column.columns) > 1
-            if the_id_column_needs_to_be_built_from_multiple_columns:
-                id = "-".join([str(essential_data[column]) for column in command.id_column.columns])
+    def _predict_and_update_with_features_cache(self, dataset_preprocessor: DatasetPreprocessor, model: EmbeddingInferenceModelInterface, command: PredictForModelReleaseCommand) -> None:
+        data_fingerprint = self.data_repository.get_data_fingerprint(command.prediction_data.path)
+        features_cache_key = hashlib.sha256(f"{data_fingerprint}:{dataset_preprocessor.fingerprint()}".encode()).hexdigest()
+        with self.profiler.stage("read") as stage:
+            cached_features = self.features_cache.load(features_cache_key)
+
+            if cached_features is not None:
+                _, preprocessed_data = cached_features
+                prediction_data = self.data_repository.get_prediction_data(command.prediction_data.path, columns=self._get_essential_columns(command))
             else:
-                id = essential_data[command.id_column.columns[0]]
-                essential_data.pop(command.id_column.columns[0])
-            
-            business_embedding = BusinessEmbeddings(
-                id=id,
-                embeddings=embedding,
-                metadata=essential_data,
-            )
-
-            embeddings_batch.add_embeddings(business_embedding)
-
-        self.embeddings_repository.update_batch(embeddings_batch)
+                prediction_data = self.data_repository.get_prediction_data(command.prediction_data.path, columns=self._get_columns_to_read(dataset_preprocessor, command))
+            stage.rows = len(prediction_data)
+
+        if cached_features is None:
+            with self.profiler.stage("preprocess", rows=len(prediction_data)):
+                preprocessed_data = dataset_preprocessor.preprocess(prediction_data)
+            self.features_cache.save(features_cache_key, dataset_preprocessor, preprocessed_data)
+
+        self._embed_and_update(prediction_data, preprocessed_data, model, command)
+
+    def _get_essential_columns(self, command: PredictForModelReleaseCommand) -> List[str]:
+        return list(dict.fromkeys(list(command.id_column.columns) + command.vector_store.metadata_columns.columns))
+
+    def _get_columns_to_read(self, dataset_preprocessor: DatasetPreprocessor, command: PredictForModelReleaseCommand) -> List[str]:
+        columns = (
+            self._get_essential_columns(command)
+            + dataset_preprocessor.numerical_columns_names
+            + dataset_preprocessor.categorical_columns_names
+        )
+        return list(dict.fromkeys(columns))
+
+    def _predict_and_update(
+        self,
+        prediction_data: pd.DataFrame,
+        dataset_preprocessor: DatasetPreprocessor,
+        model: EmbeddingInferenceModelInterface,
+        command: PredictForModelReleaseCommand,
+    ) -> None:
+        with self.profiler.stage("preprocess", rows=len(prediction_data)):
+            preprocessed_data = dataset_preprocessor.preprocess(prediction_data)
+        self._embed_and_update(prediction_data, preprocessed_data, model, command)
+
+    def _embed_and_update(
+        self,
+        prediction_data: pd.DataFrame,
+        preprocessed_data: Dict[str, np.ndarray],
+        model: EmbeddingInferenceModelInterface,
+        command: PredictForModelReleaseCommand,
+    ) -> None:
+        if self.inference_batch_size is None:
+            self.inference_batch_size = self._calibrate_inference_batch_size(preprocessed_data, model, command.runtime.inference_batch_size_candidates)
+
+        with self.profiler.stage("embed", rows=len(prediction_data)):
+            embeddings = model.embed(preprocessed_data, batch_size=self.inference_batch_size)
+
+        if self._embeddings_repository_requires_training():
+            with self.profiler.stage("train_store", rows=len(embeddings)):
+                self.embeddings_repository.train(embeddings)
+
+        with self.profiler.stage("upsert", rows=len(prediction_data)):
+            embeddings_batch = self._build_embeddings_batch(prediction_data, embeddings, command)
+            self.embeddings_repository.update_batch(embeddings_batch)
+
+    def _embeddings_repository_requires_training(self) -> bool:
+        return isinstance(self.embeddings_repository, TrainableEmbeddingsRepositoryInterface) and self.embeddings_repository.requires_training
+
+    def _train_embeddings_repository_on_sample(self, dataset_preprocessor: DatasetPreprocessor, model: EmbeddingInferenceModelInterface, columns: List[str], command: PredictForModelReleaseCommand) -> None:
+        # Keeping the rows with the smallest random keys draws a uniform sample across every chunk in one bounded-memory pass
+        sample_size = self.embeddings_repository.train_sample_size
+        rng = np.random.default_rng(42)
+        sample, sample_keys = pd.DataFrame(), np.empty(0)
+        prediction_data_chunks = self.data_repository.get_prediction_data_chunks(command.prediction_data.path, command.prediction_data.chunk_size, columns=columns)
+        for prediction_data in self.profiler.iterate("read", prediction_data_chunks):
+            candidates = pd.concat([sample, prediction_data], ignore_index=True)
+            candidates_keys = np.concatenate([sample_keys, rng.random(len(prediction_data))])
+            kept = np.argsort(candidates_keys, kind="stable")[:sample_size]
+            sample, sample_keys = candidates.iloc[kept].reset_index(drop=True), candidates_keys[kept]
+
+        self.logger.info(f"🔍 Training the vector store on {len(sample)} rows sampled across the prediction data")
+        with self.profiler.stage("preprocess", rows=len(sample)):
+            preprocessed_sample = dataset_preprocessor.preprocess(sample)
+        if self.inference_batch_size is None:
+            self.inference_batch_size = self._calibrate_inference_batch_size(preprocessed_sample, model, command.runtime.inference_batch_size_candidates)
+        with self.profiler.stage("embed", rows=len(sample)):
+            embeddings = model.embed(preprocessed_sample, batch_size=self.inference_batch_size)
+        with self.profiler.stage("train_store", rows=len(sample)):
+            self.embeddings_repository.train(embeddings)
+
+    def _calibrate_inference_batch_size(self, preprocessed_data: Dict[str, np.ndarray], model: EmbeddingInferenceModelInterface, candidate_batch_sizes: List[int]) -> int:
+        n_rows = min(len(next(iter(preprocessed_data.values()))), max(candidate_batch_sizes) * 4)
+        sample = {key: values[:n_rows] for key, values in preprocessed_data.items()}
+        candidate_batch_sizes = [batch_size for batch_size in candidate_batch_sizes if batch_size <= n_rows] or [min(candidate_batch_sizes)]
+
+        throughputs = {}
+        for batch_size in candidate_batch_sizes:
+            model.embed(sample, batch_size=batch_size)
+
+            start = time.perf_counter()
+            model.embed(sample, batch_size=batch_size)
+            throughputs[batch_size] = n_rows / (time.perf_counter() - start)
+
+            self.logger.info(f"🔍 Inference batch size {batch_size}: {throughputs[batch_size]:.0f} rows/s")
+
+        inference_batch_size = max(throughputs, key=throughputs.get)
+        self.logger.info(f"✅ Using inference batch size {inference_batch_size}")
+        return inference_batch_size
+
+    def _build_embeddings_batch(self, prediction_data: pd.DataFrame, embeddings: np.ndarray, command: PredictForModelReleaseCommand) -> BatchOfEmbeddings:
+        the_id_column_needs_to_be_built_from_multiple_columns = len(command.id_column.columns) > 1
+        if the_id_column_needs_to_be_built_from_multiple_columns:
+            ids = prediction_data[command.id_column.columns].astype(str).agg("-".join, axis=1).to_numpy(dtype=object)
+            metadata_columns = command.id_column.columns + command.vector_store.metadata_columns.columns
+        else:
+            ids = prediction_data[command.id_column.columns[0]].astype(str).to_numpy(dtype=object)
+            metadata_columns = [column for column in command.vector_store.metadata_columns.columns if column != command.id_column.columns[0]]
+
+        return BatchOfEmbeddings(
+            ids=ids,
+            vectors=embeddings,
+            metadata={column: prediction_data[column].to_numpy(dtype=object) for column in dict.fromkeys(metadata_columns)},
+        )
@@ -0,0 +1,12 @@
+from dataclasses import dataclass, field
+
+from autoembed.src.yaml.auto_embed_yaml_schema import Modeling, Runtime, Search, TrainingData
+
+
+@dataclass
+class SearchHyperparametersCommand:
+    project_name: str
+    training_data: TrainingData
+    modeling: Modeling
+    search: Search
+    runtime: Runtime = field(default_factory=Runtime)
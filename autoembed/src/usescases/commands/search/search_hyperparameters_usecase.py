@@ -0,0 +1,256 @@
+import os
+import math
+import hashlib
+import time
+import random
+import shutil
+import tempfile
+import itertools
+import dataclasses
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from logging import Logger
+from typing import Dict, Iterator, List, Tuple, Type
+
+import pandas as pd
+from kink import inject
+
+from autoembed.src.domain.dataset_preprocessor import (
+    DatasetPreprocessor,
+)
+from autoembed.src.domain.stage_profiler import StageProfiler, log_performance_report, save_performance_report
+from autoembed.src.domain.interfaces.data_repository_interface import (
+    DataRepositoryInterface,
+)
+from autoembed.src.domain.interfaces.embedding_model_interface import (
+    RECONSTRUCTION_LOSS_KEY,
+    EmbeddingModelInterface,
+)
+from autoembed.src.domain.interfaces.model_registry_interface import (
+    ModelRegistryInterface,
+)
+from autoembed.src.domain.interfaces.features_cache_interface import (
+    FeaturesCacheInterface,
+)
+from autoembed.src.infrastructure.cache.features_cache_local_mmap_adapter import FeaturesCacheLocalMmapAdapter
+from autoembed.src.infrastructure.model.tensorflow_runtime import configure_tensorflow_runtime
+from autoembed.src.usescases.commands.search.search_hyperparameters_command import (
+    SearchHyperparametersCommand,
+)
+
+
+SEARCH_FEATURES_DIRECTORY_NAME = "features"
+SEARCH_RESULTS_FILE_NAME = "search_results.csv"
+
+
+@dataclasses.dataclass
+class SearchTrial:
+    trial_id: int
+    bottle_neck_size: int
+    hidden_layer_sizes: List[int]
+    batch_size: int
+    epochs: int
+    epochs_trained: int = 0
+    val_reconstruction_loss: float = float("inf")
+    status: str = "running"
+    duration_seconds: float = 0.0
+
+
+def train_search_trial(
+    embedding_model: Type[EmbeddingModelInterface],
+    features_cache: FeaturesCacheInterface,
+    features_cache_key: str,
+    trials_path: str,
+    trial: SearchTrial,
+    epochs: int,
+    jit_compile: bool | str,
+    nested_prefix_sizes: List[int] | None = None,
+) -> Tuple[Dict[str, List[float]], float]:
+    start = time.perf_counter()
+
+    dataset_preprocessor, x = features_cache.load(features_cache_key)
+
+    trial_path = f"{trials_path}/trial-{trial.trial_id}"
+    if trial.epochs_trained == 0:
+        model = embedding_model.from_dataset_analysis(dataset_preprocessor.get_analysis(), trial.bottle_neck_size, trial.hidden_layer_sizes, jit_compile=jit_compile, nested_prefix_sizes=nested_prefix_sizes)
+    else:
+        model = embedding_model.load(trial_path)
+
+    history = model.fit(x, dataset_preprocessor.inputs_to_targets(x), epochs=epochs, batch_size=trial.batch_size)
+
+    os.makedirs(trial_path, exist_ok=True)
+    model.save(trial_path)
+
+    return history, time.perf_counter() - start
+
+
+@inject()
+class SearchHyperparametersUseCase:
+    def __init__(
+        self,
+        data_repository: DataRepositoryInterface,
+        embedding_model_registry: ModelRegistryInterface,
+        embedding_model: EmbeddingModelInterface,
+        logger: Logger,
+        features_cache: FeaturesCacheInterface = None,
+    ):
+        self.data_repository = data_repository
+        self.embedding_model_registry = embedding_model_registry
+        self.embedding_model = embedding_model
+        self.logger = logger
+        self.features_cache = features_cache
+
+    def execute(self, command: SearchHyperparametersCommand) -> None:
+        self.profiler = StageProfiler("search")
+        trials = self._get_trials(command)
+        self.logger.info(f"✅ Searching hyperparameters over {len(trials)} trials with {command.search.num_workers} workers")
+
+        trials_path = tempfile.mkdtemp(prefix="autoembed-search-")
+        try:
+            # Trials memory-map the features from the configured cache, or from a cache living as long as the search
+            features_cache = self.features_cache or FeaturesCacheLocalMmapAdapter(logger=self.logger, path=f"{trials_path}/{SEARCH_FEATURES_DIRECTORY_NAME}")
+            dataset_preprocessor, features_cache_key = self._preprocess(command, features_cache)
+
+            with self.profiler.stage("fit"):
+                self._run_successive_halving(trials, trials_path, features_cache, features_cache_key, command)
+
+            results = pd.DataFrame([dataclasses.asdict(trial) for trial in trials]).sort_values("val_reconstruction_loss")
+            self.logger.info(f"📊 Search results:\n{results.to_string(index=False)}")
+
+            best_trial = min(trials, key=lambda trial: trial.val_reconstruction_loss)
+            self.logger.info(f"🏆 Best trial {best_trial.trial_id} with val_reconstruction_loss {best_trial.val_reconstruction_loss:.4f}")
+
+            with self.profiler.stage("save"):
+                model = self.embedding_model.load(f"{trials_path}/trial-{best_trial.trial_id}")
+                model_id = self.embedding_model_registry.save_model_and_preprocessor(
+                    model,
+                    dataset_preprocessor,
+                    command.project_name,
+                    data_fingerprint=self.data_repository.get_data_fingerprint(command.training_data.path),
+                    metrics={"epochs": best_trial.epochs_trained, "val_reconstruction_loss": best_trial.val_reconstruction_loss},
+                )
+                self.embedding_model_registry.save_artifact(command.project_name, model_id, SEARCH_RESULTS_FILE_NAME, results.to_csv(index=False))
+
+            log_performance_report(self.profiler, self.logger)
+            save_performance_report(self.profiler, self.embedding_model_registry, command.project_name, model_id, chrome_trace=command.runtime.chrome_trace)
+        finally:
+            shutil.rmtree(trials_path, ignore_errors=True)
+
+    def _get_trials(self, command: SearchHyperparametersCommand) -> List[SearchTrial]:
+        grid = list(
+            itertools.product(
+                command.search.bottle_neck_size or [command.modeling.bottle_neck_size],
+                command.search.hidden_layer_sizes or [command.modeling.hidden_layer_sizes],
+                command.search.batch_size or [command.modeling.batch_size],
+                command.search.epochs or [command.modeling.epochs],
+            )
+        )
+
+        if command.search.num_trials is not None and command.search.num_trials < len(grid):
+            grid = random.Random(command.search.seed).sample(grid, command.search.num_trials)
+
+        return [
+            SearchTrial(trial_id=index, bottle_neck_size=bottle_neck_size, hidden_layer_sizes=hidden_layer_sizes, batch_size=batch_size, epochs=epochs)
+            for index, (bottle_neck_size, hidden_layer_sizes, batch_size, epochs) in enumerate(grid)
+        ]
+
+    def _preprocess(self, command: SearchHyperparametersCommand, features_cache: FeaturesCacheInterface) -> Tuple[DatasetPreprocessor, str]:
+        modeling_columns = command.modeling.modeling_columns.numerical_columns + command.modeling.modeling_columns.categorical_columns
+        columns = list(dict.fromkeys(modeling_columns))
+
+        dataset_preprocessor = DatasetPreprocessor(
+            command.modeling.modeling_columns.numerical_columns,
+            command.modeling.modeling_columns.categorical_columns,
+            categorical_columns_options=command.modeling.modeling_columns.categorical_columns_options,
+        )
+
+        features_cache_key = self._get_features_cache_key(command.training_data.path, dataset_preprocessor)
+        with self.profiler.stage("read"):
+            cached_features = features_cache.load(features_cache_key)
+        if cached_features is not None:
+            return cached_features[0], features_cache_key
+
+        if command.training_data.chunk_size:
+            rows = 0
+
+            def count_rows(chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+                nonlocal rows
+                for chunk in chunks:
+                    rows += len(chunk)
+                    yield chunk
+
+            self.logger.info(f"🔍 Fitting dataset preprocessor on the whole training data by chunks of {command.training_data.chunk_size} rows")
+            with self.profiler.stage("fit_preprocessor"):
+                dataset_preprocessor.fit(self.profiler.iterate("read", count_rows(self.data_repository.get_training_data_chunks(command.training_data.path, command.training_data.chunk_size, columns=columns))))
+
+            self.logger.info("🔍 Preprocessing training data by chunks once for all trials")
+            with self.profiler.stage("preprocess", rows=rows):
+                training_data_chunks = self.profiler.iterate("read", self.data_repository.get_training_data_chunks(command.training_data.path, command.training_data.chunk_size, columns=columns))
+                features_cache.save_chunks(features_cache_key, dataset_preprocessor, (dataset_preprocessor.preprocess(chunk) for chunk in training_data_chunks), rows)
+            return dataset_preprocessor, features_cache_key
+
+        with self.profiler.stage("read") as stage:
+            training_data = self.data_repository.get_training_data(command.training_data.path, columns=columns)
+            stage.rows = len(training_data)
+
+        self.logger.info("🔍 Fitting dataset preprocessor")
+        with self.profiler.stage("fit_preprocessor", rows=len(training_data)):
+            dataset_preprocessor.fit(training_data)
+
+        self.logger.info("🔍 Preprocessing training data once for all trials")
+        with self.profiler.stage("preprocess", rows=len(training_data)):
+            features_cache.save(features_cache_key, dataset_preprocessor, dataset_preprocessor.preprocess(training_data))
+        return dataset_preprocessor, features_cache_key
+
+    def _get_features_cache_key(self, path: str, dataset_preprocessor: DatasetPreprocessor) -> str:
+        return hashlib.sha256(f"{self.data_repository.get_data_fingerprint(path)}:{dataset_preprocessor.fingerprint()}".encode()).hexdigest()
+
+    def _run_successive_halving(self, trials: List[SearchTrial], trials_path: str, features_cache: FeaturesCacheInterface, features_cache_key: str, command: SearchHyperparametersCommand) -> None:
+        with ProcessPoolExecutor(
+            max_workers=command.search.num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=configure_tensorflow_runtime,
+            initargs=(command.search.threads_per_trial, 1),
+        ) as executor:
+            active_trials = list(trials)
+            rung_epochs = command.search.min_epochs
+
+            while active_trials:
+                requested_epochs = {trial.trial_id: min(rung_epochs, trial.epochs) - trial.epochs_trained for trial in active_trials}
+                futures = {
+                    trial.trial_id: executor.submit(
+                        train_search_trial,
+                        self.embedding_model,
+                        features_cache,
+                        features_cache_key,
+                        trials_path,
+                        trial,
+                        requested_epochs[trial.trial_id],
+                        command.runtime.jit_compile,
+                        [prefix_size for prefix_size in command.modeling.nested_prefix_sizes or [] if prefix_size < trial.bottle_neck_size],
+                    )
+                    for trial in active_trials
+                }
+
+                for trial in active_trials:
+                    history, duration = futures[trial.trial_id].result()
+                    trial.epochs_trained += len(history["loss"])
+                    # The nested prefix sizes depend on the bottleneck size, so trials are ranked without their prefix heads losses
+                    trial.val_reconstruction_loss = float(min(history[f"val_{RECONSTRUCTION_LOSS_KEY}"]))
+                    trial.duration_seconds += duration
+
+                    if trial.epochs_trained >= trial.epochs or len(history["loss"]) < requested_epochs[trial.trial_id]:
+                        trial.status = "completed"
+
+                running_trials = sorted([trial for trial in active_trials if trial.status == "running"], key=lambda trial: trial.val_reconstruction_loss)
+                promoted_trials_count = math.ceil(len(running_trials) / command.search.reduction_factor)
+                for trial in running_trials[promoted_trials_count:]:
+                    trial.status = "stopped"
+
+                self.logger.info(
+                    f"🔍 Rung of {rung_epochs} epochs: best val_reconstruction_loss {min(trial.val_reconstruction_loss for trial in active_trials):.4f}, "
+                    f"{len(running_trials) - promoted_trials_count} trials stopped, {promoted_trials_count} promoted"
+                )
+
+                active_trials = running_trials[:promoted_trials_count]
+                rung_epochs *= command.search.reduction_factor
@@ -1,6 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
-from autoembed.src.yaml.auto_embed_yaml_schema import Modeling, TrainingData, VectorStore
+from autoembed.src.yaml.auto_embed_yaml_schema import Modeling, Runtime, TrainingData, VectorStore
 
 
 @dataclass
@@ -8,4 +8,5 @@ class TrainEmbeddingModelCommand:
     project_name: str
     vector_store: VectorStore
     training_data: TrainingData
-    modeling: Modeling
\ No newline at end of file
+    modeling: Modeling
+    runtime: Runtime = field(default_factory=Runtime)
@@ -1,22 +1,33 @@
 import datetime
+import hashlib
 from logging import Logger
+from typing import Dict, List, Tuple
 import uuid
 
+import numpy as np
+import pandas as pd
 from kink import inject
 
 from autoembed.src.domain.dataset_preprocessor import (
     DatasetPreprocessor,
 )
+from autoembed.src.domain.stage_profiler import StageProfiler, log_performance_report, save_performance_report
+from autoembed.src.domain.interfaces.embedding_model_interface import (
+    EmbeddingModelInterface,
+)
 from autoembed.src.domain.interfaces.model_registry_interface import (
     ModelRegistryInterface,
 )
 from autoembed.src.domain.interfaces.data_repository_interface import (
     DataRepositoryInterface,
 )
-from autoembed.src.infrastructure.model.embedding_model_keras_adapter import KerasAutoencoder
+from autoembed.src.domain.interfaces.features_cache_interface import (
+    FeaturesCacheInterface,
+)
 from autoembed.src.usescases.commands.train.train_embedding_model_command import (
     TrainEmbeddingModelCommand,
 )
+from autoembed.src.yaml.auto_embed_yaml_schema import WarmStart
 
 
 @inject()
@@ -25,16 +36,89 @@ class TrainEmbeddingModelUseCase:
         self,
         data_repository: DataRepositoryInterface,
         embedding_model_registry: ModelRegistryInterface,
+        embedding_model: EmbeddingModelInterface,
         logger: Logger,
+        features_cache: FeaturesCacheInterface = None,
     ):
         self.data_repository = data_repository
         self.embedding_model_registry = embedding_model_registry
+        self.embedding_model = embedding_model
         self.logger = logger
+        self.features_cache = features_cache
 
     def execute(self, command: TrainEmbeddingModelCommand) -> None:
         self.logger.info(f"✅ Training embeddings model with parameters: {command}")
+        self.profiler = StageProfiler("train")
+        self.training_metrics: Dict[str, float] = {}
+
+        model, dataset_preprocessor = self._train(command)
+
+        if not model.is_chief:
+            self.logger.info("✅ Training finished on this worker, the chief worker saves the model release")
+            log_performance_report(self.profiler, self.logger)
+            return
+
+        with self.profiler.stage("save"):
+            model_id = self.embedding_model_registry.save_model_and_preprocessor(
+                model,
+                dataset_preprocessor,
+                command.project_name,
+                data_fingerprint=self.data_repository.get_data_fingerprint(command.training_data.path),
+                metrics=self.training_metrics,
+            )
+
+        log_performance_report(self.profiler, self.logger)
+        save_performance_report(self.profiler, self.embedding_model_registry, command.project_name, model_id, chrome_trace=command.runtime.chrome_trace)
+
+    def _train(self, command: TrainEmbeddingModelCommand) -> Tuple[EmbeddingModelInterface, DatasetPreprocessor]:
+        modeling_columns = command.modeling.modeling_columns.numerical_columns + command.modeling.modeling_columns.categorical_columns
+        columns = list(dict.fromkeys(modeling_columns))
+
+        dataset_preprocessor = DatasetPreprocessor(
+            command.modeling.modeling_columns.numerical_columns,
+            command.modeling.modeling_columns.categorical_columns,
+            categorical_columns_options=command.modeling.modeling_columns.categorical_columns_options,
+        )
+
+        if command.modeling.warm_start is not None:
+            return self._warm_start(dataset_preprocessor, columns, command), dataset_preprocessor
+
+        # The training path only depends on the command, so every worker of a distributed training runs the same steps whatever the state of its features cache
+        if command.training_data.chunk_size and not command.modeling.light_mode:
+            self._fit_preprocessor_by_chunks(dataset_preprocessor, columns, command)
 
-        training_data = self.data_repository.get_training_data(command.training_data.path)
+            model = self._build_model(dataset_preprocessor, command)
+
+            self.logger.info(f"🔍 Fitting embeddings model on the training data streamed by chunks of {command.training_data.chunk_size} rows")
+            with self.profiler.stage("fit"):
+                history = model.fit_from_chunks(
+                    lambda: self.data_repository.get_training_data_chunks(command.training_data.path, command.training_data.chunk_size, columns=columns),
+                    dataset_preprocessor,
+                    epochs=command.modeling.epochs,
+                    batch_size=command.modeling.batch_size,
+                    validation_split=command.modeling.validation_split,
+                    shuffle_buffer_size=command.modeling.shuffle_buffer_size,
+                )
+            self._record_training_history(history)
+            return model, dataset_preprocessor
+
+        features_cache_key = None
+        if self.features_cache is not None and not command.modeling.light_mode:
+            # The fitted columns only depend on the training data and the preprocessor configuration, so the key is known before fitting and a hit skips the fit
+            features_cache_key = self._get_features_cache_key(command.training_data.path, dataset_preprocessor)
+            with self.profiler.stage("read"):
+                cached_features = self.features_cache.load(features_cache_key)
+
+            if cached_features is not None:
+                dataset_preprocessor, preprocessed_data = cached_features
+                return self._fit_model_in_memory(dataset_preprocessor, preprocessed_data, command), dataset_preprocessor
+
+        if command.training_data.chunk_size:
+            self._fit_preprocessor_by_chunks(dataset_preprocessor, columns, command)
+
+        with self.profiler.stage("read") as stage:
+            training_data = self.data_repository.get_training_data(command.training_data.path, columns=columns)
+            stage.rows = len(training_data)
 
         if command.modeling.light_mode:
             self.logger.info("✅ Sampling training data for light mode")
@@ -43,31 +127,145 @@ class TrainEmbeddingModelUseCase:
             else:
                 self.logger.warning(f"⚠️ Training data is less than {command.modeling.light_mode_sample_size}, using all data ({len(training_data)})")
 
-        self.logger.info("🔍 Fitting dataset preprocessor")
+        if not command.training_data.chunk_size:
+            self.logger.info("🔍 Fitting dataset preprocessor")
+            with self.profiler.stage("fit_preprocessor", rows=len(training_data)):
+                dataset_preprocessor.fit(training_data)
+
+        with self.profiler.stage("preprocess", rows=len(training_data)):
+            preprocessed_data = dataset_preprocessor.preprocess(training_data)
+
+        if features_cache_key is not None:
+            self.features_cache.save(features_cache_key, dataset_preprocessor, preprocessed_data)
+
+        return self._fit_model_in_memory(dataset_preprocessor, preprocessed_data, command), dataset_preprocessor
+
+    def _fit_preprocessor_by_chunks(self, dataset_preprocessor: DatasetPreprocessor, columns: List[str], command: TrainEmbeddingModelCommand) -> None:
+        self.logger.info(f"🔍 Fitting dataset preprocessor on the whole training data by chunks of {command.training_data.chunk_size} rows")
+        with self.profiler.stage("fit_preprocessor"):
+            dataset_preprocessor.fit(self.profiler.iterate("read", self.data_repository.get_training_data_chunks(command.training_data.path, command.training_data.chunk_size, columns=columns)))
+
+    def _warm_start(self, dataset_preprocessor: DatasetPreprocessor, columns: List[str], command: TrainEmbeddingModelCommand) -> EmbeddingModelInterface:
+        warm_start = command.modeling.warm_start
+        self.logger.info(f"🔥 Warm starting from model release {warm_start.model_version}")
+
+        previous_preprocessor = self.embedding_model_registry.load_preprocessor(command.project_name, warm_start.model_version)
+        previous_model = self.embedding_model_registry.load_model(self.embedding_model, command.project_name, warm_start.model_version)
 
-        dataset_preprocessor = DatasetPreprocessor(command.modeling.modeling_columns.numerical_columns, command.modeling.modeling_columns.categorical_columns)
-        dataset_preprocessor.fit(training_data)
+        if warm_start.window_column is not None:
+            columns = list(dict.fromkeys(columns + [warm_start.window_column]))
 
-        preprocessed_data = dataset_preprocessor.preprocess(training_data)
-        preprocessed_target = dataset_preprocessor.preprocess_target(training_data)
+        if command.training_data.chunk_size:
+            window_start = self._get_window_start(
+                pd.concat(chunk[warm_start.window_column] for chunk in self.data_repository.get_training_data_chunks(command.training_data.path, command.training_data.chunk_size, columns=[warm_start.window_column]))
+                if warm_start.window_column is not None
+                else None,
+                warm_start,
+            )
+
+            def get_training_data_chunks():
+                for chunk in self.data_repository.get_training_data_chunks(command.training_data.path, command.training_data.chunk_size, columns=columns):
+                    yield self._select_window(chunk, window_start, warm_start)
+
+            with self.profiler.stage("fit_preprocessor"):
+                dataset_preprocessor.warm_start_from(previous_preprocessor, self.profiler.iterate("read", get_training_data_chunks()))
+            model = self._build_model(dataset_preprocessor, command, previous_model)
+
+            self.logger.info(f"🔍 Fine-tuning embeddings model on the recent training data streamed by chunks of {command.training_data.chunk_size} rows")
+            with self.profiler.stage("fit"):
+                history = model.fit_from_chunks(
+                    get_training_data_chunks,
+                    dataset_preprocessor,
+                    epochs=warm_start.epochs or command.modeling.epochs,
+                    batch_size=command.modeling.batch_size,
+                    validation_split=command.modeling.validation_split,
+                    shuffle_buffer_size=command.modeling.shuffle_buffer_size,
+                )
+            self._record_training_history(history)
+            return model
+
+        with self.profiler.stage("read") as stage:
+            training_data = self.data_repository.get_training_data(command.training_data.path, columns=columns)
+            training_data = self._select_window(
+                training_data, self._get_window_start(training_data[warm_start.window_column] if warm_start.window_column is not None else None, warm_start), warm_start
+            )
+            stage.rows = len(training_data)
+
+        with self.profiler.stage("fit_preprocessor", rows=len(training_data)):
+            dataset_preprocessor.warm_start_from(previous_preprocessor, training_data)
+
+        with self.profiler.stage("preprocess", rows=len(training_data)):
+            preprocessed_data = dataset_preprocessor.preprocess(training_data)
+
+        return self._fit_model_in_memory(dataset_preprocessor, preprocessed_data, command, previous_model)
+
+    def _get_window_start(self, window_values: pd.Series | None, warm_start: WarmStart) -> pd.Timestamp | None:
+        if window_values is None or warm_start.window_days is None:
+            return None
+
+        window_start = pd.to_datetime(window_values).max() - pd.Timedelta(days=warm_start.window_days)
+        self.logger.info(f"🔍 Fine-tuning on rows with {warm_start.window_column} since {window_start}")
+        return window_start
+
+    def _select_window(self, training_data: pd.DataFrame, window_start: pd.Timestamp | None, warm_start: WarmStart) -> pd.DataFrame:
+        if window_start is None:
+            return training_data
+        return training_data[pd.to_datetime(training_data[warm_start.window_column]) >= window_start]
+
+    def _get_features_cache_key(self, path: str, dataset_preprocessor: DatasetPreprocessor) -> str:
+        return hashlib.sha256(f"{self.data_repository.get_data_fingerprint(path)}:{dataset_preprocessor.fingerprint()}".encode()).hexdigest()
+
+    def _fit_model_in_memory(
+        self,
+        dataset_preprocessor: DatasetPreprocessor,
+        preprocessed_data: Dict[str, np.ndarray],
+        command: TrainEmbeddingModelCommand,
+        previous_model: EmbeddingModelInterface | None = None,
+    ) -> EmbeddingModelInterface:
+        preprocessed_target = dataset_preprocessor.inputs_to_targets(preprocessed_data)
+
+        model = self._build_model(dataset_preprocessor, command, previous_model)
+
+        epochs = command.modeling.epochs
+        if previous_model is not None and command.modeling.warm_start.epochs:
+            epochs = command.modeling.warm_start.epochs
 
         self.logger.info("🔍 Fitting embeddings model")
+        with self.profiler.stage("fit") as stage:
+            history = model.fit(
+                preprocessed_data,
+                preprocessed_target,
+                epochs=epochs,
+                batch_size=command.modeling.batch_size,
+            )
+            stage.rows = len(next(iter(preprocessed_data.values()))) * len(history["loss"])
+        self._record_training_history(history)
+
+        return model
+
+    def _record_training_history(self, history: Dict[str, List[float]]) -> None:
+        if history.get("rows_per_second"):
+            self.logger.info(f"🚀 Training throughput: {np.mean(history['rows_per_second']):.0f} rows/s over {len(history['rows_per_second'])} epochs")
+
+        best_epoch = int(np.argmin(history["val_loss"])) if history.get("val_loss") else len(history["loss"]) - 1
+        self.training_metrics = {"epochs": len(history["loss"]), **{name: float(values[best_epoch]) for name, values in history.items() if len(values) > best_epoch}}
+
+    def _build_model(self, dataset_preprocessor: DatasetPreprocessor, command: TrainEmbeddingModelCommand, previous_model: EmbeddingModelInterface | None = None) -> EmbeddingModelInterface:
         dataset_analysis = dataset_preprocessor.get_analysis()
 
-        model = KerasAutoencoder.from_dataset_analysis(
+        model = self.embedding_model.from_dataset_analysis(
             dataset_analysis,
-            command.modeling.bottle_neck_size, 
+            command.modeling.bottle_neck_size,
             command.modeling.hidden_layer_sizes,
+            jit_compile=command.runtime.jit_compile,
+            nested_prefix_sizes=command.modeling.nested_prefix_sizes,
         )
 
+        if previous_model is not None:
+            self.logger.info("🔥 Copying the previous model weights, new vocabulary values get freshly initialized rows")
+            model.warm_start_from(previous_model)
+
         self.logger.info(f"🔍 Numerical columns: {len(dataset_analysis.numerical_columns.columns)}")
         self.logger.info(f"🔍 Categorical columns: {len(dataset_analysis.categorical_columns.columns)}")
 
-        model.fit(
-            preprocessed_data,
-            preprocessed_target,
-            epochs=command.modeling.epochs,
-            batch_size=command.modeling.batch_size,
-        )
-        
-        self.embedding_model_registry.save_model_and_preprocessor(model, dataset_preprocessor, command.project_name)
\ No newline at end of file
+        return model
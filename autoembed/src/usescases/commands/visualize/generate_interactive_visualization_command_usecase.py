@@ -1,12 +1,12 @@
 from logging import Logger
 
 from kink import inject
-import numpy as np
 import pandas as pd
 from sklearn.manifold import TSNE
 import plotly.express as px
 
 
+from autoembed.src.domain.stage_profiler import StageProfiler, log_performance_report
 from autoembed.src.domain.interfaces.embeddings_repository_interface import (
     EmbeddingsRepositoryInterface,
 )
@@ -21,31 +21,36 @@ class GenerateInteractiveVisualizationCommandUsecase:
     def execute(self, command: GenerateInteractiveVisualizationCommand) -> dict:
         
         # On récupère tous les embeddings et, on échantillonne après, a voir si on ne peut pas sampler directement dans la requête chromaDb
-        all_embeddings = self.embeddings_repository.get_all_embeddings()
+        profiler = StageProfiler("visualize")
+        with profiler.stage("query") as stage:
+            all_embeddings = self.embeddings_repository.get_all_embeddings()
+            stage.rows = len(all_embeddings)
         
         self.logger.info(f"Found {len(all_embeddings)} embeddings")
 
         sampled_embeddings = all_embeddings.sample_batch(command.n_samples)
-        embeddings = np.array([business_embedding.embeddings for business_embedding in sampled_embeddings.embeddings])
+        embeddings = sampled_embeddings.vectors
 
         self.logger.info(f"Fit Reducer (TSNE) on {command.n_samples} embeddings")
         
         reducer = TSNE(n_components=2, random_state=42, n_jobs=-1)
 
-        embeddings_2d = reducer.fit_transform(embeddings)
+        with profiler.stage("fit", rows=len(embeddings)):
+            embeddings_2d = reducer.fit_transform(embeddings)
+        log_performance_report(profiler, self.logger)
     
         self.logger.info("Generate interactive visualization (Plotly)")
 
         viz_dataframe = pd.DataFrame({
             'x': embeddings_2d[:, 0],
             'y': embeddings_2d[:, 1],
-            'label': [embedding.metadata[command.visualisation_columns.color_data_column_name] for embedding in sampled_embeddings.embeddings]
+            'label': sampled_embeddings.metadata[command.visualisation_columns.color_data_column_name]
         })
 
-        viz_dataframe["id"] = [embedding.id for embedding in sampled_embeddings.embeddings]
+        viz_dataframe["id"] = sampled_embeddings.ids
         
         for column in command.visualisation_columns.hover_data_columns_name:
-            viz_dataframe[column] = [embedding.metadata[column] for embedding in sampled_embeddings.embeddings]
+            viz_dataframe[column] = sampled_embeddings.metadata[column]
 
         fig = px.scatter(
             viz_dataframe,
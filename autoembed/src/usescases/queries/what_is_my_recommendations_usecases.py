@@ -1,13 +1,15 @@
 from dataclasses import dataclass
 from logging import Logger
-from typing import List
+from typing import Dict, List, Tuple
 
 from kink import inject
 
+from autoembed.src.domain.stage_profiler import StageProfiler, log_performance_report
 from autoembed.src.domain.interfaces.embeddings_repository_interface import (
     EmbeddingsRepositoryInterface,
 )
 from autoembed.src.usescases.queries.what_is_my_recommendations_usecases_query import (
+    WhatIsMyRecommendationsBatchQuery,
     WhatIsMyRecommendationsQuery,
 )
 
@@ -25,5 +27,16 @@ class WhatIsMyRecommendationsUsecases:
 
     def ask(self, query: WhatIsMyRecommendationsQuery) -> List[str]:
         self.logger.info(f"Asking for recommendations for {query.id}")
-        most_similar_ids = self.embeddings_repository.get_most_similar_embeddings_by_id(query.id)[0]
-        return [id for id in most_similar_ids if id != query.id]
+        profiler = StageProfiler("query")
+        with profiler.stage("query", rows=1):
+            most_similar_ids = self.embeddings_repository.get_most_similar_embeddings_by_id(query.id)
+        log_performance_report(profiler, self.logger)
+        return most_similar_ids
+
+    def ask_batch(self, query: WhatIsMyRecommendationsBatchQuery) -> Dict[str, List[Tuple[str, float]]]:
+        self.logger.info(f"Asking for recommendations for {len(query.ids)} ids")
+        profiler = StageProfiler("query")
+        with profiler.stage("query", rows=len(query.ids)):
+            recommendations = self.embeddings_repository.get_most_similar_embeddings_by_ids(query.ids, query.n)
+        log_performance_report(profiler, self.logger)
+        return recommendations
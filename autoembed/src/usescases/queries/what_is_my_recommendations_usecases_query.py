@@ -1,6 +1,13 @@
 from dataclasses import dataclass
+from typing import List
 
 
 @dataclass
 class WhatIsMyRecommendationsQuery:
     id: str
+
+
+@dataclass
+class WhatIsMyRecommendationsBatchQuery:
+    ids: List[str]
+    n: int = 6
@@ -1,34 +1,80 @@
 import json
-from dataclasses import asdict, dataclass
-from typing import Any, List, Literal
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Literal
+
+from autoembed.src.domain.entites.columns import CategoricalColumnOptions
 
 
 @dataclass
 class IdColumn:
     columns: List[str]
 
+    def __post_init__(self):
+        if isinstance(self.columns, str):
+            self.columns = [self.columns]
+
 @dataclass
 class MetadataColumns:
     columns: List[str]
 
 
+class Quantization:
+    def __init__(self, **kwargs):
+        self.type = kwargs.get("type", "none")
+        self.n_subvectors = kwargs.get("n_subvectors", 8)
+        self.n_bits = kwargs.get("n_bits", 8)
+        self.train_sample_size = kwargs.get("train_sample_size", 100_000)
+
+
+class IvfPq:
+    def __init__(self, **kwargs):
+        self.nlist = kwargs.get("nlist", 1024)
+        self.nprobe = kwargs.get("nprobe", 16)
+        self.n_subvectors = kwargs.get("n_subvectors", 8)
+        self.n_bits = kwargs.get("n_bits", 8)
+        self.train_sample_size = kwargs.get("train_sample_size", 100_000)
+        self.train_from = kwargs.get("train_from")
+
+
+class QuantizationEvaluation:
+    def __init__(self, **kwargs):
+        self.sample_size = kwargs.get("sample_size", 20_000)
+        self.queries = kwargs.get("queries", 1000)
+        self.k = kwargs.get("k", 10)
+        self.candidates = [
+            Quantization(**candidate) if isinstance(candidate, dict) else Quantization(type=candidate) for candidate in kwargs.get("candidates", ["float16", "int8", "pq"])
+        ]
+
+
 @dataclass
 class VectorStore:
     def __init__(self, **kwargs):   
         self.vector_collection_name = kwargs.get("vector_collection_name")
+        self.engine = kwargs.get("engine", "chroma")
+        self.distance = kwargs.get("distance", "l2")
+        self.search_threads = kwargs.get("search_threads")
+        self.ivf_pq = IvfPq(**(kwargs.get("ivf_pq") or {}))
         self.metadata_columns = MetadataColumns(kwargs.get("metadata_columns"))
+        self.coarse_prefix_size = kwargs.get("coarse_prefix_size")
+        self.rerank_factor = kwargs.get("rerank_factor", 10)
+        self.quantization = Quantization(**(kwargs.get("quantization") or {}))
+        self.quantization_evaluation = QuantizationEvaluation(**(kwargs.get("quantization_evaluation") or {}))
 
 
 @dataclass
 class TrainingData:
     type: Literal["csv", "parquet"]
     path: str
+    chunk_size: int | None = None
+    num_workers: int | None = None
 
 
 @dataclass
 class PredictionData:
     type: Literal["csv", "parquet"]
     path: str
+    chunk_size: int | None = None
+    num_workers: int | None = None
 
 @dataclass
 class Data:
@@ -41,6 +87,26 @@ class Data:
 class ModelingColumns:
     categorical_columns: List[str]
     numerical_columns: List[str]
+    categorical_columns_options: Dict[str, CategoricalColumnOptions] = field(default_factory=dict)
+
+    def __post_init__(self):
+        categorical_columns_names = []
+        for column in self.categorical_columns:
+            if isinstance(column, dict):
+                options = dict(column)
+                column = options.pop("name")
+                self.categorical_columns_options[column] = CategoricalColumnOptions(**options)
+            categorical_columns_names.append(column)
+        self.categorical_columns = categorical_columns_names
+
+
+@dataclass
+class WarmStart:
+    def __init__(self, **kwargs):
+        self.model_version = kwargs.get("model_version", "latest")
+        self.window_column = kwargs.get("window_column")
+        self.window_days = kwargs.get("window_days")
+        self.epochs = kwargs.get("epochs")
 
 
 @dataclass
@@ -53,7 +119,11 @@ class Modeling:
         self.epochs = kwargs.get("epochs")
         self.batch_size = kwargs.get("batch_size")
         self.hidden_layer_sizes = kwargs.get("hidden_layer_sizes")
+        self.validation_split = kwargs.get("validation_split", 0.2)
+        self.shuffle_buffer_size = kwargs.get("shuffle_buffer_size", 100_000)
+        self.nested_prefix_sizes = kwargs.get("nested_prefix_sizes")
         self.modeling_columns = ModelingColumns(**kwargs.get("modeling_columns"))
+        self.warm_start = WarmStart(**kwargs.get("warm_start")) if kwargs.get("warm_start") else None
 
 
 @dataclass
@@ -69,6 +139,61 @@ class Visualisation:
         self.visualisation_columns = VisualisationColumns(**kwargs.get("visualisation_columns"))
 
 
+@dataclass
+class Cache:
+    def __init__(self, **kwargs):
+        self.path = kwargs.get("path", ".autoembed_cache")
+        self.max_size_gb = kwargs.get("max_size_gb")
+        self.max_age_days = kwargs.get("max_age_days")
+
+
+def expand_search_values(values: Any) -> List[Any] | None:
+    if values is None:
+        return None
+    if isinstance(values, dict):
+        return list(range(values["min"], values["max"] + 1, values.get("step", 1)))
+    if isinstance(values, list):
+        return values
+    return [values]
+
+
+@dataclass
+class Search:
+    def __init__(self, **kwargs):
+        self.bottle_neck_size = expand_search_values(kwargs.get("bottle_neck_size"))
+        self.hidden_layer_sizes = kwargs.get("hidden_layer_sizes")
+        if self.hidden_layer_sizes and not isinstance(self.hidden_layer_sizes[0], list):
+            self.hidden_layer_sizes = [self.hidden_layer_sizes]
+        self.batch_size = expand_search_values(kwargs.get("batch_size"))
+        self.epochs = expand_search_values(kwargs.get("epochs"))
+        self.num_trials = kwargs.get("num_trials")
+        self.num_workers = kwargs.get("num_workers", 2)
+        self.threads_per_trial = kwargs.get("threads_per_trial", 1)
+        self.min_epochs = kwargs.get("min_epochs", 1)
+        self.reduction_factor = kwargs.get("reduction_factor", 3)
+        self.seed = kwargs.get("seed", 42)
+
+
+@dataclass
+class Runtime:
+    def __init__(self, **kwargs):
+        self.intra_op_threads = kwargs.get("intra_op_threads")
+        self.inter_op_threads = kwargs.get("inter_op_threads")
+        self.jit_compile = kwargs.get("jit_compile", "auto")
+        self.inference_engine = kwargs.get("inference_engine", "keras")
+        self.inference_batch_size = kwargs.get("inference_batch_size", 1024)
+        self.inference_batch_size_candidates = kwargs.get("inference_batch_size_candidates", [256, 1024, 4096, 16384])
+        self.chrome_trace = kwargs.get("chrome_trace", False)
+
+
+@dataclass
+class Distributed:
+    def __init__(self, **kwargs):
+        self.worker_hosts = kwargs.get("worker_hosts")
+        self.worker_index = kwargs.get("worker_index", 0)
+        self.num_workers = len(self.worker_hosts) if self.worker_hosts else kwargs.get("num_workers", 2)
+
+
 @dataclass
 class AutoEmbedByYamlFileSchema:
     def __init__(self, **kwargs):
@@ -78,6 +203,10 @@ class AutoEmbedByYamlFileSchema:
         self.data = Data(**kwargs.get("data"))
         self.modeling = Modeling(**kwargs.get("modeling"))
         self.visualisation = Visualisation(**kwargs.get("visualisation"))
+        self.cache = Cache(**kwargs.get("cache")) if kwargs.get("cache") else None
+        self.runtime = Runtime(**(kwargs.get("runtime") or {}))
+        self.search = Search(**kwargs.get("search")) if kwargs.get("search") else None
+        self.distributed = Distributed(**kwargs.get("distributed")) if kwargs.get("distributed") else None
 
     @classmethod
     def from_yaml_as_dict(cls, yaml_as_dict: dict[str, Any]) -> "AutoEmbedByYamlFileSchema":
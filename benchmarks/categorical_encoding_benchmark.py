@@ -0,0 +1,78 @@
+import argparse
+import time
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+from autoembed.src.domain.entites.columns import CategoricalColumn
+
+
+COLUMNS_CARDINALITIES = {
+    "vehicle_make": 80,
+    "vehicle_version": 25_000,
+    "zip_code": 35_000,
+}
+
+
+def legacy_from_series(series: pd.Series) -> Dict[str, int]:
+    series = series.fillna(CategoricalColumn.value_used_to_fill_na)
+    series = series.astype(str).apply(lambda x: x.lower().strip())
+    vocabulary = {value: index for index, value in enumerate(series.unique())}
+    return {**vocabulary, CategoricalColumn.value_used_to_fill_na: len(vocabulary)}
+
+
+def legacy_transform(series: pd.Series, vocabulary: Dict[str, int]) -> pd.Series:
+    series = series.fillna(CategoricalColumn.value_used_to_fill_na)
+    series = series.astype(str).apply(lambda x: x.lower().strip())
+    return series.map(vocabulary)
+
+
+def generate_series(name: str, cardinality: int, n_rows: int, rng: np.random.Generator) -> pd.Series:
+    values = np.array([f" {name.upper()}_{index} " if index % 3 == 0 else f"{name}_{index}" for index in range(cardinality)], dtype=object)
+    zipf_positions = np.minimum(rng.zipf(1.3, size=n_rows) - 1, cardinality - 1)
+    series = pd.Series(values[zipf_positions], name=name)
+    series[rng.random(n_rows) < 0.01] = None
+    return series
+
+
+def timeit(function: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the categorical encoding against the legacy per-cell implementation")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+
+    print(f"{'column':<16} {'distinct':>9} {'legacy fit':>11} {'fit':>9} {'legacy transform':>17} {'transform':>10} {'speedup':>8}")
+
+    for name, cardinality in COLUMNS_CARDINALITIES.items():
+        series = generate_series(name, cardinality, args.rows, rng)
+
+        legacy_vocabulary = legacy_from_series(series)
+        column = CategoricalColumn.from_series(series)
+        assert column.vocabulary == legacy_vocabulary
+        assert np.array_equal(column.transform(series).values, legacy_transform(series, legacy_vocabulary).values)
+
+        legacy_fit_time = timeit(lambda: legacy_from_series(series), args.repeat)
+        fit_time = timeit(lambda: CategoricalColumn.from_series(series), args.repeat)
+        legacy_transform_time = timeit(lambda: legacy_transform(series, legacy_vocabulary), args.repeat)
+        transform_time = timeit(lambda: column.transform(series), args.repeat)
+
+        print(
+            f"{name:<16} {len(column.vocabulary):>9} {legacy_fit_time:>10.3f}s {fit_time:>8.3f}s "
+            f"{legacy_transform_time:>16.3f}s {transform_time:>9.3f}s {legacy_transform_time / transform_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
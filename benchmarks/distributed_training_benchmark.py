@@ -0,0 +1,100 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from autoembed.src.infrastructure.model.distributed_runtime import configure_distribution_strategy, get_worker_context, launch_local_workers
+
+
+NUMERICAL_COLUMNS = ["price", "mileage", "year"]
+CATEGORICAL_COLUMNS = ["vehicle_make", "vehicle_version", "zip_code"]
+
+
+def build_dataframe(rows: int, clusters: int, rng: np.random.Generator) -> pd.DataFrame:
+    cluster = rng.integers(0, clusters, rows)
+    return pd.DataFrame(
+        {
+            "vehicle_make": [f"make_{value}" for value in cluster // 10],
+            "vehicle_version": [f"version_{value}" for value in cluster * 20 + rng.integers(0, 20, rows)],
+            "zip_code": [f"zip_{value}" for value in rng.integers(0, 5_000, rows)],
+            "price": cluster * 100.0 + rng.normal(scale=300.0, size=rows),
+            "mileage": (cluster % 17) * 10_000.0 + rng.normal(scale=5_000.0, size=rows),
+            "year": 2000.0 + cluster % 20 + rng.integers(-1, 2, rows),
+        }
+    )
+
+
+def train(args: argparse.Namespace) -> Dict[str, List[float]]:
+    import keras
+
+    from autoembed.src.domain.dataset_preprocessor import DatasetPreprocessor
+    from autoembed.src.infrastructure.model.embedding_model_keras_adapter import KerasAutoencoder
+
+    keras.utils.set_random_seed(42)
+    dataframe = build_dataframe(args.rows, args.clusters, np.random.default_rng(42))
+
+    preprocessor = DatasetPreprocessor(NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS)
+    preprocessor.fit(dataframe)
+    x, y = preprocessor.preprocess_inputs_and_targets(dataframe)
+
+    model = KerasAutoencoder.from_dataset_analysis(preprocessor.get_analysis(), args.bottleneck, [256, 128])
+    return model.fit(x, y, epochs=args.epochs, batch_size=args.batch_size)
+
+
+def run_worker(args: argparse.Namespace) -> None:
+    configure_distribution_strategy()
+    history = train(args)
+
+    if get_worker_context().is_chief:
+        with open(args.history_path, "w") as f:
+            json.dump(history, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the loss curves of single process and multi-process data-parallel training")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--bottleneck", type=int, default=32)
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--batch_size", type=int, default=1024)
+    parser.add_argument("--num_workers", type=int, default=2)
+    parser.add_argument("--tolerance", type=float, default=0.1, help="maximum relative gap between the final validation losses")
+    parser.add_argument("--history_path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.history_path is not None:
+        run_worker(args)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        history_path = os.path.join(directory, "history.json")
+
+        start = time.perf_counter()
+        launch_local_workers(args.num_workers, [*sys.argv, "--history_path", history_path])
+        distributed_duration = time.perf_counter() - start
+        with open(history_path, "r") as f:
+            distributed_history = json.load(f)
+
+    start = time.perf_counter()
+    single_history = train(args)
+    single_duration = time.perf_counter() - start
+
+    print(f"\n{'epoch':<6} {'single val_loss':>16} {f'{args.num_workers} workers val_loss':>20}")
+    for epoch, (single_loss, distributed_loss) in enumerate(zip(single_history["val_loss"], distributed_history["val_loss"]), start=1):
+        print(f"{epoch:<6} {single_loss:>16.4f} {distributed_loss:>20.4f}")
+    print(f"{'time':<6} {single_duration:>15.1f}s {distributed_duration:>19.1f}s")
+
+    relative_gap = (min(distributed_history["val_loss"]) - min(single_history["val_loss"])) / min(single_history["val_loss"])
+    print(f"\nBest validation loss gap: {relative_gap:+.1%}")
+    if relative_gap > args.tolerance:
+        raise SystemExit(f"Distributed training did not converge like single process training, gap {relative_gap:.1%} above {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
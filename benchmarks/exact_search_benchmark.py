@@ -0,0 +1,80 @@
+import argparse
+import logging
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from autoembed.src.domain.entites.embeddings import BatchOfEmbeddings
+from autoembed.src.domain.embedding_quantizer import squared_distances
+from autoembed.src.domain.interfaces.embeddings_repository_interface import EmbeddingsRepositoryInterface
+from autoembed.src.infrastructure.embeddings.embedding_chromadb_adapter import EmbeddingsChromaDbAdapter
+from autoembed.src.infrastructure.embeddings.embedding_local_exact_adapter import EmbeddingsLocalExactSearchAdapter
+
+
+def build_embeddings(rows: int, dimensions: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.normal(size=(clusters, dimensions)).astype(np.float32)
+    return centers[rng.integers(0, clusters, rows)] + rng.normal(scale=0.3, size=(rows, dimensions)).astype(np.float32)
+
+
+def exact_neighbors(embeddings: np.ndarray, query_positions: np.ndarray, k: int) -> np.ndarray:
+    distances = squared_distances(embeddings[query_positions], embeddings)
+    distances[np.arange(len(query_positions)), query_positions] = np.inf
+    return np.argpartition(distances, k, axis=1)[:, :k]
+
+
+def benchmark(repository: EmbeddingsRepositoryInterface, ids: List[str], embeddings: np.ndarray, query_positions: np.ndarray, truth: np.ndarray, k: int) -> Dict[str, float]:
+    start = time.perf_counter()
+    repository.update_batch(BatchOfEmbeddings(ids=ids, vectors=embeddings))
+    insert_seconds = time.perf_counter() - start
+
+    query_ids = [ids[position] for position in query_positions]
+    start = time.perf_counter()
+    neighbors = repository.get_most_similar_embeddings_by_ids(query_ids, k)
+    batch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for position in query_positions[:100]:
+        repository.query_similar_embeddings(embeddings[position], k)
+    single_query_seconds = (time.perf_counter() - start) / min(len(query_positions), 100)
+
+    positions = {id: position for position, id in enumerate(ids)}
+    recall = np.mean([len(np.intersect1d([positions[id] for id, _ in neighbors[query_id]], exact)) / k for query_id, exact in zip(query_ids, truth)])
+
+    return {"insert_seconds": insert_seconds, "batch_qps": len(query_ids) / batch_seconds, "single_query_ms": single_query_seconds * 1000, "recall": recall}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local exact search repository against ChromaDB")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dimensions", type=int, default=64)
+    parser.add_argument("--clusters", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    embeddings = build_embeddings(args.rows, args.dimensions, args.clusters, rng)
+    ids = [f"id_{position}" for position in range(args.rows)]
+    query_positions = rng.choice(args.rows, size=args.queries, replace=False)
+    truth = exact_neighbors(embeddings, query_positions, args.k)
+
+    logger = logging.getLogger(__name__)
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        repositories = {
+            "chroma (hnsw)": EmbeddingsChromaDbAdapter(vector_collection_name="benchmark", logger=logger),
+            "local exact": EmbeddingsLocalExactSearchAdapter(vector_collection_name="benchmark", logger=logger, max_workers=args.threads),
+        }
+
+        print(f"{'engine':<16} {'insert s':>10} {'batch qps':>10} {'single ms':>10} {f'recall@{args.k}':>10}")
+        for name, repository in repositories.items():
+            results = benchmark(repository, ids, embeddings, query_positions, truth, args.k)
+            print(f"{name:<16} {results['insert_seconds']:>10.2f} {results['batch_qps']:>10.0f} {results['single_query_ms']:>10.2f} {results['recall']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import logging
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from autoembed.src.domain.entites.embeddings import BatchOfEmbeddings
+from autoembed.src.domain.embedding_quantizer import squared_distances
+from autoembed.src.infrastructure.embeddings.embedding_ivf_pq_adapter import EmbeddingsIvfPqAdapter
+
+
+def build_embeddings(rows: int, dimensions: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.normal(size=(clusters, dimensions)).astype(np.float32)
+    return centers[rng.integers(0, clusters, rows)] + rng.normal(scale=0.5, size=(rows, dimensions)).astype(np.float32)
+
+
+def exact_neighbors(embeddings: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    return np.argsort(squared_distances(queries, embeddings), axis=1)[:, :k]
+
+
+def benchmark(index: EmbeddingsIvfPqAdapter, queries: np.ndarray, truth: np.ndarray, k: int) -> Dict[str, float]:
+    index._search(queries[:1], k)
+
+    start = time.perf_counter()
+    neighbors_positions, _ = index._search(queries, k)
+    batch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for query in queries[:100]:
+        index.query_similar_embeddings(query, k)
+    single_query_seconds = (time.perf_counter() - start) / min(len(queries), 100)
+
+    recall = np.mean([len(np.intersect1d(exact, approximate)) / k for exact, approximate in zip(truth, neighbors_positions)])
+    return {"batch_qps": len(queries) / batch_seconds, "single_query_ms": single_query_seconds * 1000, "recall": recall}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep the recall@k and queries per second of the IVF-PQ repository over nprobe and code sizes")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dimensions", type=int, default=64)
+    parser.add_argument("--clusters", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=256)
+    parser.add_argument("--nprobes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--n_subvectors", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--n_bits", type=int, default=8)
+    parser.add_argument("--train_sample_size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    embeddings = build_embeddings(args.rows + args.queries, args.dimensions, args.clusters, np.random.default_rng(42))
+    embeddings, queries = embeddings[: args.rows], embeddings[args.rows :]
+    ids = [f"id_{position}" for position in range(args.rows)]
+    truth = exact_neighbors(embeddings, queries, args.k)
+
+    logger = logging.getLogger(__name__)
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        results: List[Dict] = []
+        for n_subvectors in args.n_subvectors:
+            start = time.perf_counter()
+            index = EmbeddingsIvfPqAdapter(
+                vector_collection_name=f"benchmark_{n_subvectors}",
+                logger=logger,
+                nlist=args.nlist,
+                n_subvectors=n_subvectors,
+                n_bits=args.n_bits,
+                train_sample_size=args.train_sample_size,
+            )
+            index.train(embeddings)
+            index.update_batch(BatchOfEmbeddings(ids=ids, vectors=embeddings))
+            build_seconds = time.perf_counter() - start
+
+            for nprobe in args.nprobes:
+                index.nprobe = nprobe
+                results.append({"code": index.product_quantizer.name, "bytes": index.product_quantizer.bytes_per_vector(args.dimensions), "build_seconds": build_seconds, "nprobe": nprobe, **benchmark(index, queries, truth, args.k)})
+
+    print(f"{'code':<10} {'bytes':>6} {'build s':>8} {'nprobe':>7} {'batch qps':>10} {'single ms':>10} {f'recall@{args.k}':>10}")
+    for result in results:
+        print(f"{result['code']:<10} {result['bytes']:>6} {result['build_seconds']:>8.1f} {result['nprobe']:>7} {result['batch_qps']:>10.0f} {result['single_query_ms']:>10.2f} {result['recall']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
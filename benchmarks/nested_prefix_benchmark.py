@@ -0,0 +1,92 @@
+import argparse
+import time
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from autoembed.src.domain.dataset_preprocessor import DatasetPreprocessor
+from autoembed.src.domain.embedding_quantizer import squared_distances
+from autoembed.src.infrastructure.model.embedding_model_keras_adapter import KerasAutoencoder
+
+
+NUMERICAL_COLUMNS = ["price", "mileage", "year"]
+CATEGORICAL_COLUMNS = ["vehicle_make", "vehicle_version", "zip_code"]
+
+
+def build_dataframe(rows: int, clusters: int, rng: np.random.Generator) -> pd.DataFrame:
+    cluster = rng.integers(0, clusters, rows)
+    return pd.DataFrame(
+        {
+            "vehicle_make": [f"make_{value}" for value in cluster // 10],
+            "vehicle_version": [f"version_{value}" for value in cluster * 20 + rng.integers(0, 20, rows)],
+            "zip_code": [f"zip_{value}" for value in rng.integers(0, 5_000, rows)],
+            "price": cluster * 100.0 + rng.normal(scale=300.0, size=rows),
+            "mileage": (cluster % 17) * 10_000.0 + rng.normal(scale=5_000.0, size=rows),
+            "year": 2000.0 + cluster % 20 + rng.integers(-1, 2, rows),
+        }
+    )
+
+
+def exact_search(database: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    return np.argpartition(squared_distances(queries, database), k, axis=1)[:, :k]
+
+
+def coarse_then_rerank(database: np.ndarray, queries: np.ndarray, k: int, prefix_size: int, rerank_factor: int) -> np.ndarray:
+    candidates = np.argpartition(squared_distances(queries[:, :prefix_size], database[:, :prefix_size]), k * rerank_factor, axis=1)[:, : k * rerank_factor]
+    distances = ((database[candidates] - queries[:, None, :]) ** 2).sum(axis=2)
+    return np.take_along_axis(candidates, np.argsort(distances, axis=1)[:, :k], axis=1)
+
+
+def evaluate(embeddings: np.ndarray, query_indices: np.ndarray, k: int, prefix_sizes: List[int], rerank_factor: int) -> List[Tuple[str, float, float, float]]:
+    queries = embeddings[query_indices]
+    rows, dimensions = embeddings.shape
+
+    start = time.perf_counter()
+    exact_neighbors = exact_search(embeddings, queries, k)
+    results = [("full", 1.0, 1.0, time.perf_counter() - start)]
+
+    for prefix_size in prefix_sizes:
+        start = time.perf_counter()
+        neighbors = coarse_then_rerank(embeddings, queries, k, prefix_size, rerank_factor)
+        duration = time.perf_counter() - start
+        recall = np.mean([len(np.intersect1d(exact, approximate)) / k for exact, approximate in zip(exact_neighbors, neighbors)])
+        relative_distance_cost = (prefix_size * rows + dimensions * k * rerank_factor) / (dimensions * rows)
+        results.append((f"prefix {prefix_size} + rerank", recall, relative_distance_cost, duration))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark coarse prefix search with full vector re-ranking on nested and regular embeddings")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--bottleneck", type=int, default=64)
+    parser.add_argument("--prefix_sizes", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank_factor", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    dataframe = build_dataframe(args.rows, args.clusters, rng)
+
+    preprocessor = DatasetPreprocessor(NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS)
+    preprocessor.fit(dataframe)
+    x, y = preprocessor.preprocess_inputs_and_targets(dataframe)
+    query_indices = rng.choice(args.rows, size=args.queries, replace=False)
+
+    for name, nested_prefix_sizes in (("regular", None), ("nested", args.prefix_sizes)):
+        model = KerasAutoencoder.from_dataset_analysis(preprocessor.get_analysis(), args.bottleneck, [256, 128], nested_prefix_sizes=nested_prefix_sizes)
+        model.fit(x, y, epochs=args.epochs, batch_size=1024)
+        embeddings = np.asarray(model.embed(x, batch_size=4096), dtype=np.float32)
+
+        print(f"\n{name} training")
+        print(f"{'search':<24} {f'recall@{args.k}':>10} {'distance cost':>14} {'seconds':>10}")
+        for search, recall, relative_distance_cost, duration in evaluate(embeddings, query_indices, args.k, args.prefix_sizes, args.rerank_factor):
+            print(f"{search:<24} {recall:>10.3f} {relative_distance_cost:>14.2f} {duration:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import tempfile
+import time
+from typing import Callable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from autoembed.src.domain.dataset_preprocessor import DatasetPreprocessor
+from autoembed.src.infrastructure.model.embedding_model_keras_adapter import KerasAutoencoder
+from autoembed.src.infrastructure.model.embedding_model_numpy_adapter import NumpyEncoder
+
+
+COLUMNS_CARDINALITIES = {
+    "vehicle_make": 80,
+    "vehicle_version": 25_000,
+    "zip_code": 35_000,
+}
+NUMERICAL_COLUMNS = ["price", "mileage", "year"]
+
+
+def timeit(function: Callable[[], object]) -> Tuple[object, float]:
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the NumPy encoder against the Keras encoder")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch_size", type=int, default=4096)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    dataframe = pd.DataFrame(
+        {
+            **{name: np.array([f"{name}_{index}" for index in range(cardinality)], dtype=object)[rng.integers(0, cardinality, args.rows)] for name, cardinality in COLUMNS_CARDINALITIES.items()},
+            **{name: rng.normal(size=args.rows) for name in NUMERICAL_COLUMNS},
+        }
+    )
+
+    preprocessor = DatasetPreprocessor(NUMERICAL_COLUMNS, list(COLUMNS_CARDINALITIES))
+    preprocessor.fit(dataframe)
+    features = preprocessor.preprocess(dataframe)
+
+    with tempfile.TemporaryDirectory() as path:
+        KerasAutoencoder.from_dataset_analysis(preprocessor.get_analysis(), 96, [512, 256, 128]).save(path)
+
+        keras_model, keras_load_time = timeit(lambda: KerasAutoencoder.load(path))
+        numpy_model, numpy_load_time = timeit(lambda: NumpyEncoder.load(path))
+
+    keras_model.embed({key: values[: args.batch_size] for key, values in features.items()}, batch_size=args.batch_size)
+    keras_embeddings, keras_embed_time = timeit(lambda: keras_model.embed(features, batch_size=args.batch_size))
+    numpy_embeddings, numpy_embed_time = timeit(lambda: numpy_model.embed(features, batch_size=args.batch_size))
+
+    print(f"max absolute difference: {np.abs(keras_embeddings - numpy_embeddings).max():.2e}")
+    print(f"{'engine':<8} {'load':>8} {f'embed {args.rows} rows':>20} {'rows/s':>10}")
+    print(f"{'keras':<8} {keras_load_time:>7.3f}s {keras_embed_time:>19.3f}s {args.rows / keras_embed_time:>10.0f}")
+    print(f"{'numpy':<8} {numpy_load_time:>7.3f}s {numpy_embed_time:>19.3f}s {args.rows / numpy_embed_time:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import dataclasses
+import json
+import logging
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from autoembed.src.domain.dataset_preprocessor import DatasetPreprocessor
+from autoembed.src.infrastructure.model.local_model_registry_adapter import LocalModelRegistryAdapter
+
+
+COLUMNS_CARDINALITIES = {
+    "vehicle_make": 80,
+    "vehicle_version": 250_000,
+    "zip_code": 350_000,
+}
+
+
+def save_legacy_json_preprocessor(preprocessor: DatasetPreprocessor, path: str) -> None:
+    preprocessor_data = {
+        "numerical_columns": [{column_name: dataclasses.asdict(column)} for column_name, column in preprocessor.numerical_columns.columns.items()],
+        "categorical_columns": [{column_name: dataclasses.asdict(column)} for column_name, column in preprocessor.categorical_columns.columns.items()],
+        "categorical_features_loss_weights": preprocessor.categorical_features_loss_weights,
+    }
+
+    with open(f"{path}/preprocessor.json", "w") as f:
+        json.dump(preprocessor_data, f)
+
+
+def measure(function: Callable[[], object]) -> Tuple[object, float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loading the binary preprocessor artifact against the legacy JSON one")
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    n_rows = max(COLUMNS_CARDINALITIES.values())
+    dataframe = pd.DataFrame({name: np.resize(np.array([f"{name}_{index}" for index in range(cardinality)], dtype=object), n_rows) for name, cardinality in COLUMNS_CARDINALITIES.items()})
+    dataframe["price"] = rng.normal(10_000, 2_000, len(dataframe))
+
+    preprocessor = DatasetPreprocessor(["price"], list(COLUMNS_CARDINALITIES))
+    preprocessor.fit(dataframe)
+
+    sample = dataframe.sample(args.rows, replace=True, random_state=42)
+
+    with tempfile.TemporaryDirectory() as path:
+        registry = LocalModelRegistryAdapter(logger=logging.getLogger(__name__), base_path=path)
+        registry._save_preprocessor(preprocessor, path)
+        save_legacy_json_preprocessor(preprocessor, path)
+
+        legacy_preprocessor, legacy_load_time, legacy_load_memory = measure(lambda: registry._load_legacy_json_preprocessor(f"{path}/preprocessor.json"))
+        binary_preprocessor, load_time, load_memory = measure(lambda: registry._load_preprocessor(f"{path}/preprocessor"))
+
+        legacy_features, legacy_preprocess_time, _ = measure(lambda: legacy_preprocessor.preprocess(sample))
+        features, preprocess_time, _ = measure(lambda: binary_preprocessor.preprocess(sample))
+
+        for key, values in legacy_features.items():
+            assert np.array_equal(values, features[key]), key
+
+    print(f"{'artifact':<8} {'load':>9} {'load peak memory':>17} {f'preprocess {args.rows} rows':>22}")
+    print(f"{'json':<8} {legacy_load_time:>8.3f}s {legacy_load_memory / 1e6:>15.1f}MB {legacy_preprocess_time:>21.3f}s")
+    print(f"{'binary':<8} {load_time:>8.3f}s {load_memory / 1e6:>15.1f}MB {preprocess_time:>21.3f}s")
+
+
+if __name__ == "__main__":
+    main()
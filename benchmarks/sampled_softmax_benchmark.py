@@ -0,0 +1,60 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from autoembed.src.domain.dataset_preprocessor import DatasetPreprocessor
+from autoembed.src.domain.entites.columns import CategoricalColumnOptions
+from autoembed.src.infrastructure.model.embedding_model_keras_adapter import KerasAutoencoder
+
+
+COLUMNS_CARDINALITIES = {
+    "vehicle_make": 80,
+    "vehicle_version": 25_000,
+    "zip_code": 35_000,
+}
+NUMERICAL_COLUMNS = ["price", "mileage", "year"]
+HIGH_CARDINALITY_COLUMNS = ["vehicle_version", "zip_code"]
+
+
+def train_throughput(dataframe: pd.DataFrame, sampled_softmax_negatives: int | None, epochs: int, batch_size: int) -> float:
+    preprocessor = DatasetPreprocessor(
+        NUMERICAL_COLUMNS,
+        list(COLUMNS_CARDINALITIES),
+        categorical_columns_options={column: CategoricalColumnOptions(sampled_softmax_negatives=sampled_softmax_negatives) for column in HIGH_CARDINALITY_COLUMNS},
+    )
+    preprocessor.fit(dataframe)
+    x, y = preprocessor.preprocess_inputs_and_targets(dataframe)
+
+    model = KerasAutoencoder.from_dataset_analysis(preprocessor.get_analysis(), 96, [512, 256, 128])
+    history = model.fit(x, y, epochs=epochs, batch_size=batch_size)
+    return history["rows_per_second"][-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the training throughput of sampled softmax heads against full softmax heads")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--epochs", type=int, default=2)
+    parser.add_argument("--batch_size", type=int, default=1024)
+    parser.add_argument("--negatives", type=int, default=256)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    dataframe = pd.DataFrame(
+        {
+            **{name: np.array([f"{name}_{index}" for index in range(cardinality)], dtype=object)[rng.integers(0, cardinality, args.rows)] for name, cardinality in COLUMNS_CARDINALITIES.items()},
+            **{name: rng.normal(size=args.rows) for name in NUMERICAL_COLUMNS},
+        }
+    )
+
+    full_softmax_throughput = train_throughput(dataframe, None, args.epochs, args.batch_size)
+    sampled_softmax_throughput = train_throughput(dataframe, args.negatives, args.epochs, args.batch_size)
+
+    print(f"{'heads':<24} {'rows/s':>10}")
+    print(f"{'full softmax':<24} {full_softmax_throughput:>10.0f}")
+    print(f"{f'sampled softmax ({args.negatives})':<24} {sampled_softmax_throughput:>10.0f}")
+    print(f"throughput gain: {sampled_softmax_throughput / full_softmax_throughput:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from autoembed.src.domain.dataset_preprocessor import DatasetPreprocessor
+from autoembed.src.domain.entites.columns import CategoricalColumnOptions
+
+
+NUMERICAL_COLUMNS = ["price"]
+CATEGORICAL_COLUMNS = ["vehicle_make", "doors"]
+ROWS = 1000
+
+
+@pytest.mark.parametrize("chunk_size", [50, 300])
+@pytest.mark.parametrize("options", [CategoricalColumnOptions(), CategoricalColumnOptions(min_count=5, top_k=3)])
+def test_chunked_fit_builds_the_vocabulary_of_the_full_fit(chunk_size, options):
+    rng = np.random.default_rng(0)
+    dataframe = pd.DataFrame(
+        {
+            "vehicle_make": [f"make_{value}" for value in rng.integers(0, 10, ROWS)],
+            "doors": rng.integers(2, 6, ROWS),
+            "price": rng.normal(20_000.0, 5_000.0, ROWS),
+        }
+    )
+    # Chunks read from a file type the integer column as float only where a value is missing, like the whole file does
+    chunks = [dataframe.iloc[start : start + chunk_size].copy() for start in range(0, ROWS, chunk_size)]
+    chunks[0]["doors"] = chunks[0]["doors"].astype(float)
+    chunks[0].loc[chunks[0].index[0], "doors"] = np.nan
+    full_data = pd.concat(chunks)
+    assert full_data["doors"].dtype.kind == "f" and chunks[1]["doors"].dtype.kind == "i"
+
+    full_preprocessor = DatasetPreprocessor(NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS, categorical_columns_options={"doors": options})
+    full_preprocessor.fit(full_data)
+    chunked_preprocessor = DatasetPreprocessor(NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS, categorical_columns_options={"doors": options})
+    chunked_preprocessor.fit(iter(chunks))
+
+    for column_name in CATEGORICAL_COLUMNS:
+        assert dict(chunked_preprocessor.categorical_columns.columns[column_name].vocabulary) == dict(full_preprocessor.categorical_columns.columns[column_name].vocabulary)
+    assert not any(key.endswith(".0") for key in chunked_preprocessor.categorical_columns.columns["doors"].vocabulary)
@@ -0,0 +1,45 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from autoembed.src.domain.dataset_preprocessor import DatasetPreprocessor
+from autoembed.src.infrastructure.data_repository.data_repository_local_csv_adapter import DataRepositoryLocalCSVAdapter
+
+
+NUMERICAL_COLUMNS = ["price"]
+CATEGORICAL_COLUMNS = ["vehicle_make", "doors"]
+ROWS = 1000
+CHUNK_SIZE = 100
+
+
+def test_chunked_encoding_matches_the_in_memory_encoding(tmp_path):
+    rng = np.random.default_rng(0)
+    doors = rng.integers(2, 6, ROWS).astype(object)
+    # Only the first chunk has a missing value, the whole file then reads the column as float and the other chunks as int
+    doors[3] = None
+    path = tmp_path / "data.csv"
+    pd.DataFrame(
+        {
+            "vehicle_make": [f"make_{value}" for value in rng.integers(0, 10, ROWS)],
+            "doors": doors,
+            "price": rng.normal(20_000.0, 5_000.0, ROWS),
+        }
+    ).to_csv(path, index=False)
+
+    data_repository = DataRepositoryLocalCSVAdapter(logger=logging.getLogger(__name__))
+    training_data = data_repository.get_training_data(str(path))
+    assert training_data["doors"].dtype.kind == "f"
+
+    preprocessor = DatasetPreprocessor(NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS)
+    preprocessor.fit(training_data)
+    in_memory_features = preprocessor.preprocess(training_data)
+
+    chunks = list(data_repository.get_training_data_chunks(str(path), CHUNK_SIZE))
+    assert chunks[1]["doors"].dtype.kind == "i"
+    chunked_features = [preprocessor.preprocess(chunk) for chunk in chunks]
+
+    unknown_value_code = preprocessor.categorical_columns.columns["doors"].unknown_value_code
+    assert (chunked_features[1]["doors"] != unknown_value_code).all()
+    for feature_name, feature in in_memory_features.items():
+        np.testing.assert_array_equal(np.concatenate([features[feature_name] for features in chunked_features]), feature)
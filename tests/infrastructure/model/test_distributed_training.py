@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from autoembed.src.domain.dataset_preprocessor import DatasetPreprocessor
+from autoembed.src.infrastructure.model.distributed_runtime import configure_distribution_strategy, get_worker_context, launch_local_workers
+
+
+NUMERICAL_COLUMNS = ["price", "mileage"]
+CATEGORICAL_COLUMNS = ["vehicle_make", "zip_code"]
+NUM_WORKERS = 2
+ROWS = 1000
+EPOCHS = 3
+# One batch holds every training row, so each epoch is the same full-batch step whatever the sharding and the shuffling
+BATCH_SIZE = 800
+LOSS_TOLERANCE = 1e-4
+WEIGHTS_TOLERANCE = 1e-5
+
+
+def build_features():
+    rng = np.random.default_rng(0)
+    dataframe = pd.DataFrame(
+        {
+            "vehicle_make": [f"make_{value}" for value in rng.integers(0, 10, ROWS)],
+            "zip_code": [f"zip_{value}" for value in rng.integers(0, 30, ROWS)],
+            "price": rng.normal(20_000.0, 5_000.0, ROWS),
+            "mileage": rng.normal(80_000.0, 30_000.0, ROWS),
+        }
+    )
+
+    preprocessor = DatasetPreprocessor(NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS)
+    preprocessor.fit(dataframe)
+    return preprocessor, *preprocessor.preprocess_inputs_and_targets(dataframe)
+
+
+def train():
+    import keras
+
+    from autoembed.src.infrastructure.model.embedding_model_keras_adapter import KerasAutoencoder
+
+    keras.utils.set_random_seed(42)
+    preprocessor, x, y = build_features()
+
+    # Without hidden layers the autoencoder has no dropout, the single and multi-worker runs are then deterministic
+    model = KerasAutoencoder.from_dataset_analysis(preprocessor.get_analysis(), 4, [])
+    history = model.fit(x, y, epochs=EPOCHS, batch_size=BATCH_SIZE)
+    return history, model.autoencoder.get_weights()
+
+
+def run_worker(output_path: str) -> None:
+    configure_distribution_strategy()
+    history, weights = train()
+
+    if get_worker_context().is_chief:
+        with open(f"{output_path}.json", "w") as f:
+            json.dump(history, f)
+        np.savez(f"{output_path}.npz", *weights)
+
+
+def test_multi_worker_training_matches_single_worker(tmp_path, monkeypatch):
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join(filter(None, [str(Path(__file__).parents[3]), os.environ.get("PYTHONPATH")])))
+    output_path = str(tmp_path / "distributed")
+    launch_local_workers(NUM_WORKERS, [__file__, output_path])
+
+    with open(f"{output_path}.json", "r") as f:
+        distributed_history = json.load(f)
+    with np.load(f"{output_path}.npz") as f:
+        distributed_weights = [f[f"arr_{index}"] for index in range(len(f.files))]
+
+    single_history, single_weights = train()
+
+    for metric in ("loss", "val_loss", "val_reconstruction_loss"):
+        assert len(distributed_history[metric]) == EPOCHS
+        np.testing.assert_allclose(distributed_history[metric], single_history[metric], rtol=LOSS_TOLERANCE)
+
+    assert len(distributed_weights) == len(single_weights)
+    for distributed_weight, single_weight in zip(distributed_weights, single_weights):
+        np.testing.assert_allclose(distributed_weight, single_weight, atol=WEIGHTS_TOLERANCE)
+
+
+if __name__ == "__main__":
+    run_worker(sys.argv[1])
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from autoembed.src.domain.dataset_preprocessor import DatasetPreprocessor
+from autoembed.src.infrastructure.model.embedding_model_keras_adapter import KerasAutoencoder
+from autoembed.src.infrastructure.model.embedding_model_numpy_adapter import NumpyEncoder
+
+
+NUMERICAL_COLUMNS = ["price", "mileage"]
+CATEGORICAL_COLUMNS = ["vehicle_make", "zip_code"]
+PARITY_TOLERANCE = 1e-4
+
+
+@pytest.fixture(scope="module")
+def preprocessor_and_features():
+    rng = np.random.default_rng(0)
+    dataframe = pd.DataFrame(
+        {
+            "vehicle_make": [f"make_{value}" for value in rng.integers(0, 20, 2000)],
+            "zip_code": [f"zip_{value}" for value in rng.integers(0, 300, 2000)],
+            "price": rng.normal(20_000.0, 5_000.0, 2000),
+            "mileage": rng.normal(80_000.0, 30_000.0, 2000),
+        }
+    )
+
+    preprocessor = DatasetPreprocessor(NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS)
+    preprocessor.fit(dataframe)
+    return preprocessor, *preprocessor.preprocess_inputs_and_targets(dataframe)
+
+
+@pytest.mark.parametrize("hidden_layer_sizes, nested_prefix_sizes", [([32, 16], None), ([64], [2, 4])])
+def test_numpy_encoder_embeds_like_the_keras_encoder(tmp_path, preprocessor_and_features, hidden_layer_sizes, nested_prefix_sizes):
+    preprocessor, x, y = preprocessor_and_features
+    model = KerasAutoencoder.from_dataset_analysis(preprocessor.get_analysis(), 8, hidden_layer_sizes, nested_prefix_sizes=nested_prefix_sizes)
+    model.fit(x, y, epochs=1, batch_size=256)
+
+    model.save(str(tmp_path))
+    numpy_encoder = NumpyEncoder.load(str(tmp_path))
+
+    keras_embeddings = model.embed(x, batch_size=512)
+    numpy_embeddings = numpy_encoder.embed(x, batch_size=512)
+
+    assert numpy_embeddings.dtype == np.float32
+    assert numpy_embeddings.shape == keras_embeddings.shape
+    np.testing.assert_allclose(numpy_embeddings, keras_embeddings, atol=PARITY_TOLERANCE)
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from autoembed.src.domain.dataset_preprocessor import DatasetPreprocessor
+from autoembed.src.infrastructure.model.embedding_model_keras_adapter import KerasAutoencoder
+
+
+NUMERICAL_COLUMNS = ["price", "mileage"]
+CATEGORICAL_COLUMNS = ["vehicle_make", "zip_code"]
+ROWS = 2000
+CHUNK_SIZE = 250
+EPOCHS = 3
+
+
+@pytest.mark.parametrize("encoding_workers", [1, 2])
+def test_fit_from_chunks_reads_the_holdout_rows_once(encoding_workers):
+    rng = np.random.default_rng(0)
+    dataframe = pd.DataFrame(
+        {
+            "vehicle_make": [f"make_{value}" for value in rng.integers(0, 20, ROWS)],
+            "zip_code": [f"zip_{value}" for value in rng.integers(0, 300, ROWS)],
+            "price": rng.normal(20_000.0, 5_000.0, ROWS),
+            "mileage": rng.normal(80_000.0, 30_000.0, ROWS),
+        }
+    )
+    preprocessor = DatasetPreprocessor(NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS)
+    preprocessor.fit(dataframe)
+
+    passes = []
+
+    def chunks():
+        passes.append(0)
+        for start in range(0, ROWS, CHUNK_SIZE):
+            passes[-1] += 1
+            yield dataframe.iloc[start : start + CHUNK_SIZE]
+
+    model = KerasAutoencoder.from_dataset_analysis(preprocessor.get_analysis(), 8, [32])
+    history = model.fit_from_chunks(chunks, preprocessor, epochs=EPOCHS, batch_size=256, shuffle_buffer_size=1000, encoding_workers=encoding_workers)
+
+    assert len(history["loss"]) == len(history["val_loss"]) == EPOCHS
+    # One pass over the source per training epoch and a single pass for the cached holdout rows
+    assert passes == [ROWS // CHUNK_SIZE] * (EPOCHS + 1)
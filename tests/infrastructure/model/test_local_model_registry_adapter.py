@@ -0,0 +1,36 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from autoembed.src.domain.dataset_preprocessor import DatasetPreprocessor
+from autoembed.src.domain.entites.columns import SortedArrayVocabulary
+from autoembed.src.infrastructure.model.local_model_registry_adapter import LocalModelRegistryAdapter
+
+
+NUMERICAL_COLUMNS = ["price"]
+CATEGORICAL_COLUMNS = ["vehicle_make", "zip_code"]
+
+
+def test_loading_a_preprocessor_does_not_decode_its_vocabularies(tmp_path):
+    rng = np.random.default_rng(0)
+    dataframe = pd.DataFrame(
+        {
+            "vehicle_make": [f"make_{value}" for value in rng.integers(0, 20, 1000)],
+            "zip_code": [f"zip_{value}" for value in rng.integers(0, 300, 1000)],
+            "price": rng.normal(20_000.0, 5_000.0, 1000),
+        }
+    )
+    preprocessor = DatasetPreprocessor(NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS)
+    preprocessor.fit(dataframe)
+
+    registry = LocalModelRegistryAdapter(logger=logging.getLogger(__name__), base_path=str(tmp_path))
+    registry._save_preprocessor(preprocessor, str(tmp_path))
+    loaded_preprocessor = registry._load_preprocessor(f"{tmp_path}/preprocessor")
+
+    for column_name, column in loaded_preprocessor.categorical_columns.columns.items():
+        assert isinstance(column.vocabulary, SortedArrayVocabulary)
+        assert column.unknown_value_code == preprocessor.categorical_columns.columns[column_name].unknown_value_code
+        assert "sorted_keys" not in column.vocabulary.__dict__
+
+    np.testing.assert_array_equal(loaded_preprocessor.preprocess(dataframe)["zip_code"], preprocessor.preprocess(dataframe)["zip_code"])
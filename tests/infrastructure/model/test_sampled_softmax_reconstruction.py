@@ -0,0 +1,64 @@
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from autoembed.src.domain.dataset_preprocessor import DatasetPreprocessor
+from autoembed.src.domain.entites.columns import CategoricalColumnOptions
+from autoembed.src.infrastructure.model.embedding_model_keras_adapter import KerasAutoencoder
+
+
+NUMERICAL_COLUMNS = ["price", "mileage"]
+CATEGORICAL_COLUMNS = ["vehicle_make", "zip_code"]
+ROWS = 1000
+EPOCHS = 2
+
+
+def build_preprocessor_and_dataframe() -> Tuple[DatasetPreprocessor, pd.DataFrame]:
+    rng = np.random.default_rng(0)
+    dataframe = pd.DataFrame(
+        {
+            "vehicle_make": [f"make_{value}" for value in rng.integers(0, 20, ROWS)],
+            "zip_code": [f"zip_{value}" for value in rng.integers(0, 300, ROWS)],
+            "price": rng.normal(20_000.0, 5_000.0, ROWS),
+            "mileage": rng.normal(80_000.0, 30_000.0, ROWS),
+        }
+    )
+    preprocessor = DatasetPreprocessor(NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS, categorical_columns_options={"zip_code": CategoricalColumnOptions(sampled_softmax_negatives=16)})
+    preprocessor.fit(dataframe)
+    return preprocessor, dataframe
+
+
+def test_sampled_softmax_head_tracks_its_full_softmax_loss():
+    preprocessor, dataframe = build_preprocessor_and_dataframe()
+    x, y = preprocessor.preprocess_inputs_and_targets(dataframe)
+
+    model = KerasAutoencoder.from_dataset_analysis(preprocessor.get_analysis(), 8, [32], nested_prefix_sizes=[2, 4])
+    history = model.fit(x, y, epochs=EPOCHS, batch_size=128)
+
+    assert len(history["zip_code_outputs_loss"]) == len(history["val_zip_code_outputs_loss"]) == EPOCHS
+
+    # The head returns the full softmax cross entropy of every row at inference, the prefix decoders calling the same head are not tracked
+    x, y = model._add_sampled_softmax_labels(x, y, model._get_sampled_softmax_features())
+    y = model._add_nested_prefix_targets(y, model._get_nested_prefix_sizes())
+    full_width_losses = model.autoencoder.predict(x, batch_size=ROWS)["zip_code_outputs"]
+    logs = model.autoencoder.evaluate(x, y, batch_size=ROWS, return_dict=True)
+    np.testing.assert_allclose(logs["zip_code_outputs_loss"], np.mean(full_width_losses), rtol=1e-5)
+
+
+def test_reconstruction_loss_leaves_out_the_nested_prefix_heads():
+    preprocessor, dataframe = build_preprocessor_and_dataframe()
+    x, y = preprocessor.preprocess_inputs_and_targets(dataframe)
+
+    model = KerasAutoencoder.from_dataset_analysis(preprocessor.get_analysis(), 8, [32], nested_prefix_sizes=[2, 4])
+    history = model.fit(x, y, epochs=EPOCHS, batch_size=128)
+
+    loss_weights = preprocessor.get_analysis().categorical_features_loss_weights
+    for logs_prefix in ("", "val_"):
+        expected = [
+            numerical_loss + loss_weights["vehicle_make"] * vehicle_make_loss + loss_weights["zip_code"] * zip_code_loss
+            for numerical_loss, vehicle_make_loss, zip_code_loss in zip(
+                history[f"{logs_prefix}numerical_outputs_loss"], history[f"{logs_prefix}vehicle_make_outputs_loss"], history[f"{logs_prefix}zip_code_outputs_loss"]
+            )
+        ]
+        np.testing.assert_allclose(history[f"{logs_prefix}reconstruction_loss"], expected, rtol=1e-6)
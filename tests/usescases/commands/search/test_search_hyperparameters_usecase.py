@@ -0,0 +1,85 @@
+import io
+import json
+import logging
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from autoembed.src.infrastructure.data_repository.data_repository_local_csv_adapter import DataRepositoryLocalCSVAdapter
+from autoembed.src.infrastructure.model.local_model_registry_adapter import LocalModelRegistryAdapter
+from autoembed.src.usescases.commands.search.search_hyperparameters_command import SearchHyperparametersCommand
+from autoembed.src.usescases.commands.search.search_hyperparameters_usecase import SEARCH_RESULTS_FILE_NAME, SearchHyperparametersUseCase
+from autoembed.src.yaml.auto_embed_yaml_schema import Modeling, Search, TrainingData
+
+
+ROWS = 500
+NESTED_PREFIX_SIZES = [2, 4]
+
+
+class BottleneckSizedEmbeddingModel:
+    def __init__(self, bottleneck_layer_dim: int, nested_prefix_sizes: List[int]):
+        self.bottleneck_layer_dim = bottleneck_layer_dim
+        self.nested_prefix_sizes = nested_prefix_sizes
+
+    @classmethod
+    def from_dataset_analysis(cls, dataset_analysis, bottleneck_layer_dim, hidden_layer_dim, jit_compile="auto", nested_prefix_sizes=None) -> "BottleneckSizedEmbeddingModel":
+        return cls(bottleneck_layer_dim, nested_prefix_sizes or [])
+
+    def fit(self, x, y, epochs, batch_size) -> Dict[str, List[float]]:
+        # Wider heads reconstruct better, the loss of every head only depends on its width
+        reconstruction_loss = 8.0 / self.bottleneck_layer_dim
+        prefix_losses = sum(8.0 / prefix_size for prefix_size in self.nested_prefix_sizes)
+        return {"loss": [reconstruction_loss + prefix_losses] * epochs, "val_loss": [reconstruction_loss + prefix_losses] * epochs, "val_reconstruction_loss": [reconstruction_loss] * epochs}
+
+    def save(self, path: str) -> None:
+        with open(f"{path}/model.json", "w") as f:
+            json.dump({"bottleneck_layer_dim": self.bottleneck_layer_dim, "nested_prefix_sizes": self.nested_prefix_sizes}, f)
+
+    @classmethod
+    def load(cls, path: str) -> "BottleneckSizedEmbeddingModel":
+        with open(f"{path}/model.json") as f:
+            return cls(**json.load(f))
+
+
+def test_trials_with_different_bottleneck_sizes_are_ranked_on_the_full_width_reconstruction(tmp_path):
+    rng = np.random.default_rng(0)
+    path = str(tmp_path / "data.csv")
+    pd.DataFrame(
+        {
+            "vehicle_make": [f"make_{value}" for value in rng.integers(0, 10, ROWS)],
+            "price": rng.normal(20_000.0, 5_000.0, ROWS),
+        }
+    ).to_csv(path, index=False)
+
+    logger = logging.getLogger(__name__)
+    embedding_model_registry = LocalModelRegistryAdapter(logger=logger, base_path=str(tmp_path / "models"))
+    usecase = SearchHyperparametersUseCase(
+        data_repository=DataRepositoryLocalCSVAdapter(logger=logger),
+        embedding_model_registry=embedding_model_registry,
+        embedding_model=BottleneckSizedEmbeddingModel,
+        logger=logger,
+    )
+    usecase.execute(
+        SearchHyperparametersCommand(
+            project_name="test",
+            training_data=TrainingData(type="csv", path=path),
+            modeling=Modeling(
+                light_mode=False,
+                bottle_neck_size=4,
+                epochs=2,
+                batch_size=64,
+                hidden_layer_sizes=[8],
+                nested_prefix_sizes=NESTED_PREFIX_SIZES,
+                modeling_columns={"categorical_columns": ["vehicle_make"], "numerical_columns": ["price"]},
+            ),
+            search=Search(bottle_neck_size=[4, 8], epochs=[2], num_workers=1, reduction_factor=2),
+        )
+    )
+
+    results = pd.read_csv(io.StringIO(embedding_model_registry.load_artifact("test", "latest", SEARCH_RESULTS_FILE_NAME))).set_index("bottle_neck_size")
+    # The bottleneck of 8 also trains the prefix of 4, its summed val_loss (1 + 4 + 2) is above the one of the bottleneck of 4 (2 + 4)
+    assert results.loc[8, "status"] == "completed"
+    assert results.loc[4, "status"] == "stopped"
+    assert results["val_reconstruction_loss"].to_dict() == {8: 1.0, 4: 2.0}
+    assert embedding_model_registry.get_release("test", "latest")["metrics"]["val_reconstruction_loss"] == 1.0
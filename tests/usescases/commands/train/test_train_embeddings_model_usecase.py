@@ -0,0 +1,87 @@
+import logging
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from autoembed.src.infrastructure.cache.features_cache_local_mmap_adapter import FeaturesCacheLocalMmapAdapter
+from autoembed.src.infrastructure.data_repository.data_repository_local_csv_adapter import DataRepositoryLocalCSVAdapter
+from autoembed.src.infrastructure.model.local_model_registry_adapter import LocalModelRegistryAdapter
+from autoembed.src.usescases.commands.train.train_embedding_model_command import TrainEmbeddingModelCommand
+from autoembed.src.usescases.commands.train.train_embeddings_model_usecase import TrainEmbeddingModelUseCase
+from autoembed.src.yaml.auto_embed_yaml_schema import Modeling, TrainingData, VectorStore
+
+
+ROWS = 500
+
+
+class RecordingEmbeddingModel:
+    training_paths: List[str] = []
+
+    @classmethod
+    def from_dataset_analysis(cls, dataset_analysis, bottleneck_layer_dim, hidden_layer_dim, jit_compile="auto", nested_prefix_sizes=None) -> "RecordingEmbeddingModel":
+        return cls()
+
+    def fit(self, x, y, epochs, batch_size) -> Dict[str, List[float]]:
+        self.training_paths.append("fit")
+        return {"loss": [1.0], "val_loss": [1.0]}
+
+    def fit_from_chunks(self, chunks, dataset_preprocessor, epochs, batch_size, validation_split, shuffle_buffer_size) -> Dict[str, List[float]]:
+        self.training_paths.append("fit_from_chunks")
+        return {"loss": [1.0], "val_loss": [1.0]}
+
+    @property
+    def is_chief(self) -> bool:
+        # Like a non-chief worker, the use case stops after training and does not save a release
+        return False
+
+
+def build_command(path: str, chunk_size: int | None) -> TrainEmbeddingModelCommand:
+    return TrainEmbeddingModelCommand(
+        project_name="test",
+        vector_store=VectorStore(vector_collection_name="test"),
+        training_data=TrainingData(type="csv", path=path, chunk_size=chunk_size),
+        modeling=Modeling(
+            light_mode=False,
+            bottle_neck_size=4,
+            epochs=1,
+            batch_size=64,
+            hidden_layer_sizes=[8],
+            modeling_columns={"categorical_columns": ["vehicle_make"], "numerical_columns": ["price"]},
+        ),
+    )
+
+
+@pytest.mark.parametrize("chunk_size, expected_training_path", [(None, "fit"), (100, "fit_from_chunks")])
+def test_cache_hit_and_miss_take_the_same_training_path(tmp_path, chunk_size, expected_training_path):
+    rng = np.random.default_rng(0)
+    path = str(tmp_path / "data.csv")
+    pd.DataFrame(
+        {
+            "vehicle_make": [f"make_{value}" for value in rng.integers(0, 10, ROWS)],
+            "price": rng.normal(20_000.0, 5_000.0, ROWS),
+        }
+    ).to_csv(path, index=False)
+
+    logger = logging.getLogger(__name__)
+    training_paths = {}
+    for cache_state in ("miss", "hit"):
+        features_cache = FeaturesCacheLocalMmapAdapter(logger=logger, path=str(tmp_path / f"cache_{cache_state}"))
+        usecase = TrainEmbeddingModelUseCase(
+            data_repository=DataRepositoryLocalCSVAdapter(logger=logger),
+            embedding_model_registry=LocalModelRegistryAdapter(logger=logger, base_path=str(tmp_path / "models")),
+            embedding_model=RecordingEmbeddingModel,
+            logger=logger,
+            features_cache=features_cache,
+        )
+        if cache_state == "hit":
+            # An in-memory training fills the cache with the features of the same data and columns
+            usecase.execute(build_command(path, None))
+            assert features_cache._list_entries()
+
+        RecordingEmbeddingModel.training_paths = []
+        usecase.execute(build_command(path, chunk_size))
+        training_paths[cache_state] = list(RecordingEmbeddingModel.training_paths)
+
+    assert training_paths["miss"] == training_paths["hit"] == [expected_training_path]